@@ -32,6 +32,7 @@ from services.profiles.models import Profile
 from services.social.models import Post, Follow, Like, Comment
 from services.discovery.models import Swipe, Match
 from services.chat.models import ChatRoom, Message
+from services.media.models import OrphanedMedia
 
 target_metadata = Base.metadata
 
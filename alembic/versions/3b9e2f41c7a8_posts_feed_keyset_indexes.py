@@ -0,0 +1,31 @@
+"""posts feed keyset indexes
+
+Revision ID: 3b9e2f41c7a8
+Revises: 166d3f76dd5b
+Create Date: 2026-10-19 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e2f41c7a8'
+down_revision: Union[str, Sequence[str], None] = '166d3f76dd5b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Composite indexes backing (created_at, id) cursor pagination on the feeds
+    op.create_index('idx_posts_public_created', 'posts', ['is_public', 'created_at', 'id'], unique=False)
+    op.create_index('idx_posts_user_created', 'posts', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_posts_user_created', table_name='posts')
+    op.drop_index('idx_posts_public_created', table_name='posts')
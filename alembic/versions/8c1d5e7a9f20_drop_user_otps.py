@@ -0,0 +1,37 @@
+"""drop user_otps (codes now live in Redis)
+
+Revision ID: 8c1d5e7a9f20
+Revises: 3b9e2f41c7a8
+Create Date: 2026-10-19 14:58:06.219845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1d5e7a9f20'
+down_revision: Union[str, Sequence[str], None] = '3b9e2f41c7a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Outstanding codes expire within minutes anyway; users can request a new one
+    op.drop_table('user_otps')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('user_otps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('otp_code', sa.String(length=6), nullable=True),
+        sa.Column('purpose', sa.String(length=20), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
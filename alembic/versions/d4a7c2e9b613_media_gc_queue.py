@@ -0,0 +1,39 @@
+"""media gc queue
+
+Revision ID: d4a7c2e9b613
+Revises: 8c1d5e7a9f20
+Create Date: 2026-10-19 16:20:44.581302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c2e9b613'
+down_revision: Union[str, Sequence[str], None] = '8c1d5e7a9f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_gc_queue',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('object_key', sa.String(length=512), nullable=False),
+        sa.Column('reason', sa.String(length=50), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('delete_after', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('object_key')
+    )
+    op.create_index('idx_media_gc_delete_after', 'media_gc_queue', ['delete_after'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_media_gc_delete_after', table_name='media_gc_queue')
+    op.drop_table('media_gc_queue')
@@ -0,0 +1,30 @@
+"""media variant columns
+
+Revision ID: e7f3a1c9b254
+Revises: d4a7c2e9b613
+Create Date: 2026-10-19 18:05:12.734190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f3a1c9b254'
+down_revision: Union[str, Sequence[str], None] = 'd4a7c2e9b613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('media_variants', sa.JSON(), nullable=True))
+    op.add_column('profiles', sa.Column('avatar_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('profiles', 'avatar_variants')
+    op.drop_column('posts', 'media_variants')
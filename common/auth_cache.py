@@ -0,0 +1,139 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.config import settings
+from common.database import AsyncSessionLocal
+from common.security import decode_access_token
+from services.auth.models import User
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight, immutable copy of the authenticated user's row."""
+    id: int
+    email: str
+    is_active: bool
+    is_verified: bool
+    firebase_uid: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_verified=bool(user.is_verified),
+            firebase_uid=user.firebase_uid,
+        )
+
+
+class _LRUTTLCache:
+    """Bounded mapping where each entry also carries its own expiry time."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PrincipalCache:
+    """
+    Resolves bearer tokens to principals without decoding the JWT or
+    querying `users` on every request.
+
+    Decoded tokens are cached until min(TTL, token expiry); active user
+    records for the TTL. Inactive users never resolve and are not cached,
+    so a reactivation applies at once. Call invalidate_user() whenever
+    `is_active` or the password changes. Each worker holds its own cache,
+    so other workers (and changes made directly in the database) are picked
+    up within one TTL.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl = ttl_seconds
+        self._tokens = _LRUTTLCache(max_entries)
+        self._users = _LRUTTLCache(max_entries)
+
+    def decode(self, token: str) -> Optional[int]:
+        """Returns the user id in a valid token, or None."""
+        user_id = self._tokens.get(token)
+        if user_id is not None:
+            return user_id
+
+        payload = decode_access_token(token)
+        if not payload:
+            return None
+        try:
+            user_id = int(payload.get("sub"))
+        except (TypeError, ValueError):
+            return None
+
+        expires_at = min(time.time() + self.ttl, float(payload.get("exp", 0)))
+        self._tokens.set(token, user_id, expires_at)
+        return user_id
+
+    async def get_user(self, user_id: int, db: Optional[AsyncSession] = None) -> Optional[Principal]:
+        principal = self._users.get(user_id)
+        if principal is not None:
+            return principal
+
+        if db is None:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(select(User).where(User.id == user_id))
+        else:
+            result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+
+        principal = Principal.from_user(user)
+        if principal.is_active:
+            self._users.set(user_id, principal, time.time() + self.ttl)
+        return principal
+
+    async def resolve(self, token: str, db: Optional[AsyncSession] = None) -> Optional[Principal]:
+        """Token -> principal, or None when the token is invalid or the user missing or deactivated."""
+        user_id = self.decode(token)
+        if user_id is None:
+            return None
+        principal = await self.get_user(user_id, db)
+        if principal is None or not principal.is_active:
+            return None
+        return principal
+
+    def invalidate_user(self, user_id: int):
+        self._users.pop(user_id)
+
+
+# Single global instance shared by HTTP dependencies and WebSocket endpoints
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES
+)
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # --- App Info ---
@@ -8,6 +9,16 @@ class Settings(BaseSettings):
     
     # --- Database ---
     MYSQL_URL: str
+    # Optional read replica for read-only routes (falls back to MYSQL_URL)
+    MYSQL_READ_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # seconds; below MySQL's wait_timeout
+    DB_POOL_TIMEOUT: int = 30
+    # Reads go back to the primary while the replica is further behind than this
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+    # Use "memory://" for an in-process stand-in (local dev/tests)
     REDIS_URL: str
     
     # --- Security ---
@@ -16,11 +27,53 @@ class Settings(BaseSettings):
     # Set to 30 days so users don't have to login constantly (better UX)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30 
     
+    # bcrypt runs in a dedicated thread pool; calls beyond the pending limit get a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Authenticated principals (decoded token + user record) are cached per worker
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 50_000
+
+    # One-time codes (registration / password reset) live in Redis
+    OTP_TTL_SECONDS: int = 600
+    OTP_MAX_ATTEMPTS: int = 5
+    
     # --- Cloudflare R2 ---
     R2_BUCKET_NAME: str
     R2_ACCOUNT_ID: str
     R2_ACCESS_KEY: str
     R2_SECRET_KEY: str
+    # Overrides the account endpoint (e.g. a local S3-compatible server)
+    R2_ENDPOINT_URL: Optional[str] = None
+    R2_MAX_POOL_CONNECTIONS: int = 50
+    R2_TCP_KEEPALIVE: bool = True
+
+    # --- Media ---
+    # Public bucket domain that serves uploaded objects
+    MEDIA_PUBLIC_BASE_URL: str = "https://media.meixup.com"
+    MEDIA_UPLOAD_URL_EXPIRES: int = 900
+    # Signed GETs for private media are reused until 90% of this lifetime has passed
+    MEDIA_READ_URL_EXPIRES: int = 3600
+    MEDIA_READ_URL_CACHE_SIZE: int = 50_000
+    MEDIA_MAX_BATCH_UPLOADS: int = 10
+    # Multipart uploads: every part but the last must be >= 5 MiB
+    MEDIA_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    MEDIA_MULTIPART_CONCURRENCY: int = 4
+    # Hard cap on a single /media/stream upload; the multipart upload is aborted past it
+    MEDIA_MAX_STREAM_BYTES: int = 1024 * 1024 * 1024
+    # Thumbnails / resized variants are rendered in a process pool
+    MEDIA_PROCESS_WORKERS: int = 2
+    MEDIA_MAX_IMAGE_BYTES: int = 25 * 1024 * 1024
+    # Orphaned object cleanup: queued keys wait out the grace period, then are
+    # deleted in DeleteObjects batches, at most MEDIA_GC_MAX_DELETES_PER_RUN per run
+    MEDIA_GC_INTERVAL_SECONDS: int = 300
+    MEDIA_GC_GRACE_SECONDS: int = 3600
+    MEDIA_GC_MAX_DELETES_PER_RUN: int = 5000
+    MEDIA_GC_BATCH_PAUSE_SECONDS: float = 1.0
+    # Full bucket vs. database comparison; objects younger than the min age are skipped
+    MEDIA_GC_RECONCILE_INTERVAL_HOURS: int = 24
+    MEDIA_GC_RECONCILE_MIN_AGE_HOURS: int = 24
 
     # --- SMTP Email Service (NEW) ---
     MAIL_USERNAME: str
@@ -29,10 +82,86 @@ class Settings(BaseSettings):
     # You can also add these if you want to change providers later
     MAIL_PORT: int = 587
     MAIL_SERVER: str = "smtp.gmail.com"
+    # Turn both off to point at a local SMTP sink
+    MAIL_STARTTLS: bool = True
+    MAIL_USE_CREDENTIALS: bool = True
+    # Persistent SMTP connections draining the outgoing queue
+    MAIL_POOL_SIZE: int = 2
+    MAIL_QUEUE_MAX_SIZE: int = 10_000
+    MAIL_MAX_RETRIES: int = 3
+
+    # --- Follow Graph ---
+    # Delay between attempts when the startup load of the in-memory graph fails
+    FOLLOW_GRAPH_RETRY_SECONDS: float = 30.0
+
+    # --- Trending Feed ---
+    # Engagement loses half its weight every TRENDING_HALF_LIFE_HOURS
+    TRENDING_HALF_LIFE_HOURS: float = 6.0
+    TRENDING_CAPACITY: int = 5000
+    # How far back to replay likes/comments when warming the index at startup
+    TRENDING_WARMUP_HOURS: int = 72
+
+    # --- Search ---
+    # Upper bound for the in-memory username typeahead index
+    TYPEAHEAD_MEMORY_BUDGET_MB: int = 64
+    # Caption index is restored from here on startup and saved on shutdown
+    POST_INDEX_SNAPSHOT_PATH: str = "data/post_index.snapshot"
+    SEARCH_CACHE_MAX_ENTRIES: int = 10_000
+    SEARCH_CACHE_TTL_SECONDS: int = 60
+    # Per-backend budget for the unified /search endpoint
+    SEARCH_BACKEND_TIMEOUT_MS: int = 300
+
+    # --- Rate Limiting ---
+    # "METHOD /path" -> comma separated "<ip|user>:<count>/<second|minute|hour>"
+    RATE_LIMITS: Dict[str, str] = {
+        "POST /api/v1/auth/login": "ip:10/minute",
+        "POST /api/v1/auth/register": "ip:5/minute",
+        "POST /api/v1/auth/forgot-password": "ip:3/minute",
+        "POST /api/v1/auth/verify-registration": "ip:10/minute",
+        "POST /api/v1/auth/reset-password": "ip:10/minute",
+        "POST /api/v1/auth/google-login": "ip:20/minute",
+        "POST /api/v1/dating/swipe": "user:60/minute",
+    }
+    # Per-user limit on messages sent over the chat socket
+    CHAT_MESSAGE_RATE_LIMIT: str = "user:30/minute"
+    # Proxies in front of the app that append to X-Forwarded-For (0 = use the socket peer).
+    # The client is the entry this many hops from the right; anything left of it is client-supplied.
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0
+
+    # --- SQL Instrumentation ---
+    # Requests over either budget are logged with their query count and DB time
+    SQL_QUERY_BUDGET: int = 30
+    SQL_TIME_BUDGET_MS: int = 250
+    # A statement shape seen this many times in one request is reported as a likely N+1
+    SQL_REPEAT_THRESHOLD: int = 5
+    # Adds X-DB-Queries / X-DB-Time-Ms / X-DB-Repeated to every response (debugging only)
+    SQL_DEBUG_HEADERS: bool = False
+
+    # --- Metrics ---
+    # Event-loop lag probe period; Redis queue depths are sampled at the same rate
+    METRICS_SAMPLE_INTERVAL_SECONDS: float = 1.0
+    # Per-dependency budget for the /ready check
+    READINESS_TIMEOUT_SECONDS: float = 2.0
+
+    # --- Background Jobs ---
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 5
+    # A worker's in-flight jobs are reclaimed only after it misses heartbeats for this long
+    JOB_LEASE_SECONDS: int = 60
+    # Failed jobs are retried after base * 2^(attempt-1) seconds, capped
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+    JOB_RETRY_MAX_SECONDS: float = 900.0
+
+    # --- Geo-IP (MaxMind GeoLite2 City database) ---
+    GEOIP_DB_PATH: str = "GeoLite2-City.mmdb"
 
     # --- Firebase Admin ---
     # Path to your firebase-service-account.json file
     FIREBASE_SERVICE_ACCOUNT_PATH: str = "firebase-adminsdk.json"
+    # Read from the service account file when unset
+    FIREBASE_PROJECT_ID: Optional[str] = None
+    # Public keys for ID-token signatures (point at a local key server in tests)
+    FIREBASE_CERTS_URL: str = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
 
     model_config = SettingsConfigDict(
         env_file=".env", 
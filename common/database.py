@@ -1,8 +1,17 @@
+import asyncio
+import logging
 import ssl
 import os
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from .config import settings
+from .query_stats import instrument
+
+logger = logging.getLogger("uvicorn")
 
 # 1. Locate the ca.pem file
 # We look for it in the root directory (one level up from 'common' folder)
@@ -10,21 +19,44 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CA_PATH = os.path.join(BASE_DIR, "ca.pem")
 
 # 2. Create the SSL Context
-# We create a default context and load the CA cert provided by Aiven
-ssl_context = ssl.create_default_context(cafile=CA_PATH)
-# Some environments require check_hostname to be False for self-signed or internal CA certs
-ssl_context.check_hostname = False 
+def _ssl_context() -> ssl.SSLContext:
+    # We create a default context and load the CA cert provided by Aiven
+    context = ssl.create_default_context(cafile=CA_PATH)
+    # Some environments require check_hostname to be False for self-signed or internal CA certs
+    context.check_hostname = False
+    return context
+
+def _engine_kwargs(url: str) -> dict:
+    kwargs = {"echo": False, "pool_pre_ping": True}
+    # SQLite (local runs and tests) has no server-side pool or TLS to configure,
+    # so the CA file is only needed for MySQL
+    if make_url(url).get_backend_name() != "sqlite":
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            connect_args={
+                "ssl": _ssl_context()  # Pass the full SSL context with the CA file
+            }
+        )
+    return kwargs
 
 # --- DATABASE ENGINE CONFIGURATION ---
-engine = create_async_engine(
-    settings.MYSQL_URL,
-    echo=False,
-    pool_pre_ping=True,
-    connect_args={
-        "ssl": ssl_context  # Pass the full SSL context with the CA file
-    }
+# Primary: every write, plus reads that must see the caller's own writes
+engine = create_async_engine(settings.MYSQL_URL, **_engine_kwargs(settings.MYSQL_URL))
+
+# Read replica (optional): feeds, search, inbox and other read-only routes
+read_engine = (
+    create_async_engine(settings.MYSQL_READ_URL, **_engine_kwargs(settings.MYSQL_READ_URL))
+    if settings.MYSQL_READ_URL else None
 )
 
+# Per-request statement counts / timings (see common/query_stats.py)
+instrument(engine)
+if read_engine is not None:
+    instrument(read_engine)
+
 # --- SESSION FACTORY ---
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -33,14 +65,104 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+) if read_engine is not None else None
+
 # --- BASE MODEL ---
 class Base(DeclarativeBase):
     pass
 
+# --- REPLICA HEALTH ---
+class ReplicaMonitor:
+    """
+    Polls the replica's replication lag in the background. Reads are routed
+    to the replica only while its lag is known and within
+    DB_REPLICA_MAX_LAG_SECONDS; if the replica is lagging, replication is
+    stopped or the check fails, read-only routes fall back to the primary.
+    """
+
+    def __init__(self, max_lag: float, interval: float):
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.checked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def measure_lag(self) -> Optional[float]:
+        """Seconds the replica is behind the primary; None while replication is stopped."""
+        async with read_engine.connect() as conn:
+            if conn.dialect.name == "sqlite":
+                return 0.0
+            row = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+            if row is None:
+                # Not a replication replica (e.g. a managed read endpoint): nothing to lag behind
+                return 0.0
+            behind = row.get("Seconds_Behind_Source")
+            return float(behind) if behind is not None else None
+
+    async def check(self):
+        try:
+            lag = await self.measure_lag()
+        except Exception as e:
+            logger.warning(f"Replica health check failed: {e}")
+            lag = None
+
+        was_healthy = self.healthy
+        self.lag = lag
+        self.healthy = lag is not None and lag <= self.max_lag
+        self.checked_at = time.time()
+        if was_healthy != self.healthy:
+            state = "serving reads" if self.healthy else f"bypassed (lag={lag})"
+            logger.info(f"🗄️ Read replica {state}")
+
+    async def _loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if read_engine is not None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+replica_monitor = ReplicaMonitor(
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    interval=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS
+)
+
+def read_session() -> AsyncSession:
+    """A session on the replica when it is healthy, otherwise on the primary."""
+    if ReadSessionLocal is not None and replica_monitor.healthy:
+        return ReadSessionLocal()
+    return AsyncSessionLocal()
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
+
 # --- DEPENDENCY ---
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_read_db():
+    """Session for read-only routes: replica when healthy, primary otherwise."""
+    async with read_session() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
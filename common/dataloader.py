@@ -0,0 +1,174 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.database import get_read_db
+from common.deps import get_current_user
+from services.auth.models import User
+from services.profiles.models import Profile
+from services.social.models import Post, Like, Comment
+from services.chat.models import ChatRoom, Message
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class DataLoader:
+    """
+    Collects keys while a response is being assembled and resolves them
+    with a single batch call. Results are memoized for the lifetime of the
+    loader, which is one request.
+    """
+
+    def __init__(self, batch_fn: BatchFn, default: Any = None):
+        self.batch_fn = batch_fn
+        self.default = default
+        self._cache: Dict[Hashable, Any] = {}
+        self._pending: set = set()
+
+    def queue(self, keys: Iterable[Hashable]):
+        """Registers keys for the next dispatch without running a query."""
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._pending.add(key)
+
+    async def dispatch(self):
+        """Resolves every queued key with one call to the batch function."""
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        found = await self.batch_fn(keys)
+        for key in keys:
+            self._cache[key] = found.get(key, self.default)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        keys = list(keys)
+        self.queue(keys)
+        await self.dispatch()
+        return {key: self._cache.get(key, self.default) for key in keys}
+
+    async def load(self, key: Hashable) -> Any:
+        return (await self.load_many([key]))[key]
+
+
+class RequestLoaders:
+    """One set of loaders per request, sharing the request's DB session."""
+
+    def __init__(self, db: AsyncSession, viewer_id: Optional[int] = None):
+        self.db = db
+        self.viewer_id = viewer_id
+        self.profiles = DataLoader(self._batch_profiles)
+        self.like_counts = DataLoader(self._batch_like_counts, default=0)
+        self.comment_counts = DataLoader(self._batch_comment_counts, default=0)
+        self.liked_by_viewer = DataLoader(self._batch_liked_by_viewer, default=False)
+        self.rooms_by_match = DataLoader(self._batch_rooms_by_match)
+        self.last_messages = DataLoader(self._batch_last_messages)
+
+    # --- Batch functions (one IN query each) ---
+
+    async def _batch_profiles(self, user_ids):
+        result = await self.db.execute(select(Profile).where(Profile.user_id.in_(user_ids)))
+        return {p.user_id: p for p in result.scalars().all()}
+
+    async def _batch_like_counts(self, post_ids):
+        result = await self.db.execute(
+            select(Like.post_id, func.count(Like.id))
+            .where(Like.post_id.in_(post_ids))
+            .group_by(Like.post_id)
+        )
+        return dict(result.all())
+
+    async def _batch_comment_counts(self, post_ids):
+        result = await self.db.execute(
+            select(Comment.post_id, func.count(Comment.id))
+            .where(Comment.post_id.in_(post_ids))
+            .group_by(Comment.post_id)
+        )
+        return dict(result.all())
+
+    async def _batch_liked_by_viewer(self, post_ids):
+        if self.viewer_id is None:
+            return {}
+        result = await self.db.execute(
+            select(Like.post_id).where(
+                (Like.user_id == self.viewer_id) & (Like.post_id.in_(post_ids))
+            )
+        )
+        return {post_id: True for post_id in result.scalars().all()}
+
+    async def _batch_rooms_by_match(self, match_ids):
+        result = await self.db.execute(select(ChatRoom).where(ChatRoom.match_id.in_(match_ids)))
+        return {room.match_id: room for room in result.scalars().all()}
+
+    async def _batch_last_messages(self, room_ids):
+        # Latest message per room: ids are monotonic, so MAX(id) is the newest row
+        latest_ids = (
+            select(func.max(Message.id))
+            .where(Message.room_id.in_(room_ids))
+            .group_by(Message.room_id)
+        )
+        result = await self.db.execute(select(Message).where(Message.id.in_(latest_ids)))
+        return {msg.room_id: msg for msg in result.scalars().all()}
+
+
+# --- Serialization helpers ---
+
+def author_to_dict(user_id: int, profile: Optional[Profile]) -> Dict[str, Any]:
+    return {
+        "id": user_id,
+        "username": profile.username if profile else None,
+        "name": profile.full_name if profile else "User",
+        "avatar": profile.avatar_url if profile else None,
+        "avatar_variants": profile.avatar_variants if profile else None,
+    }
+
+
+async def hydrate_posts(posts: List[Post], loaders: RequestLoaders) -> List[Dict[str, Any]]:
+    """
+    Attaches author, counts and (when a viewer is known) liked-by-me flags
+    to a list of posts. Each entity type is resolved with one query,
+    regardless of the number of posts.
+    """
+    post_ids = [p.id for p in posts]
+    authors = await loaders.profiles.load_many(p.user_id for p in posts)
+    likes = await loaders.like_counts.load_many(post_ids)
+    comments = await loaders.comment_counts.load_many(post_ids)
+
+    liked = {}
+    if loaders.viewer_id is not None:
+        liked = await loaders.liked_by_viewer.load_many(post_ids)
+
+    return [
+        {
+            "id": post.id,
+            "user_id": post.user_id,
+            "content_type": post.content_type,
+            "caption": post.caption,
+            "media_url": post.media_url,
+            "thumbnail_url": post.thumbnail_url,
+            "media_variants": post.media_variants,
+            "is_public": post.is_public,
+            "created_at": post.created_at,
+            "author": author_to_dict(post.user_id, authors[post.user_id]),
+            "like_count": likes[post.id],
+            "comment_count": comments[post.id],
+            "liked_by_me": liked.get(post.id, False),
+        }
+        for post in posts
+    ]
+
+
+# --- DEPENDENCY ---
+async def get_loaders(db: AsyncSession = Depends(get_read_db)) -> RequestLoaders:
+    """Request-scoped loaders without a viewer (public endpoints)."""
+    return RequestLoaders(db)
+
+
+async def get_viewer_loaders(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+) -> RequestLoaders:
+    """Request-scoped loaders bound to the authenticated viewer."""
+    return RequestLoaders(db, viewer_id=current_user.id)
@@ -1,45 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from common.config import settings
-from common.database import get_db
-from services.auth.models import User
+from common.auth_cache import Principal, principal_cache
 
 # Standard OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), 
-    db: AsyncSession = Depends(get_db)
-) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        # Decode JWT
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        
-        if user_id is None:
-            raise credentials_exception
-            
-        # Ensure user_id is a valid integer string
-        uid = int(user_id)
-        
-    except (JWTError, ValueError):
-        raise credentials_exception
-
-    # Database lookup
-    result = await db.execute(select(User).where(User.id == uid))
-    user = result.scalar_one_or_none()
+    # Decoded tokens and user records are cached, so a warm request
+    # neither re-verifies the JWT nor touches the users table.
+    user = await principal_cache.resolve(token)
     
     if user is None:
         raise credentials_exception
         
-    return user
\ No newline at end of file
+    return user
@@ -1,43 +1,192 @@
-from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
-from common.config import settings
+import asyncio
+import logging
+from email.message import EmailMessage
 from pathlib import Path
+from typing import List, Optional
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from common.config import settings
+
+logger = logging.getLogger("uvicorn")
 
 # 1. Dynamically find the absolute path to the project root
 # This ensures that no matter where you run uvicorn from, the folder is found.
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATE_DIR = BASE_DIR / "email_templates"
 
-# 2. Configuration for FastAPI-Mail
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,  # Using settings for flexibility
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    TEMPLATE_FOLDER=TEMPLATE_DIR
+# 2. Compile every template once at import (user-supplied values are HTML-escaped)
+_jinja = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"])
+)
+TEMPLATES = {path.name: _jinja.get_template(path.name) for path in TEMPLATE_DIR.glob("*.html")}
+
+
+def render_email(email_to: str, subject: str, template_name: str, context: dict) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.MAIL_FROM
+    message["To"] = email_to
+    message["Subject"] = subject
+    message.set_content(TEMPLATES[template_name].render(**context), subtype="html")
+    return message
+
+
+class EmailDelivery:
+    """
+    Background SMTP sender.
+
+    Messages are rendered by the caller and put on an in-process queue.
+    `pool_size` workers each keep one authenticated SMTP connection open
+    and reuse it for every message they take, reconnecting only when the
+    server drops it. A failed send is retried with exponential backoff
+    (1s, 2s, 4s, ...) up to `max_retries` times before it is logged and
+    dropped. Callers that need the outcome (background jobs) use send(),
+    which waits for the SMTP transaction and raises on failure instead of
+    retrying in process, so the job queue's durable retries apply.
+    """
+
+    def __init__(self, pool_size: int, max_queue: int, max_retries: int):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.queue: "asyncio.Queue[tuple]" = asyncio.Queue(maxsize=max_queue)
+        self._workers: List[asyncio.Task] = []
+        self.sent = 0
+        self.failed = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            start_tls=settings.MAIL_STARTTLS,
+            timeout=30
+        )
+        await smtp.connect()
+        if settings.MAIL_USE_CREDENTIALS:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        return smtp
+
+    async def _worker(self, index: int):
+        smtp: Optional[aiosmtplib.SMTP] = None
+        try:
+            while True:
+                message, attempt, waiter = await self.queue.get()
+                try:
+                    smtp = await self._deliver(smtp, message, attempt, waiter)
+                except Exception as e:
+                    # One bad message must never take a pool connection down
+                    logger.error(f"📧 Email worker {index} error: {e}")
+                finally:
+                    self.queue.task_done()
+        finally:
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await asyncio.wait_for(smtp.quit(), timeout=5)
+                except Exception:
+                    smtp.close()
+
+    async def _deliver(self, smtp: Optional[aiosmtplib.SMTP], message: EmailMessage, attempt: int,
+                       waiter: Optional[asyncio.Future]) -> Optional[aiosmtplib.SMTP]:
+        """Sends one message; returns the connection to keep using (None after a failure)."""
+        # The sender gave up waiting (timeout, or its job was cancelled and will re-run)
+        if waiter is not None and waiter.done():
+            return smtp
+        try:
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            await smtp.send_message(message)
+        except Exception as e:
+            # Drop the connection; the next message reconnects
+            if smtp is not None:
+                smtp.close()
+            if waiter is None:
+                self._retry(message, attempt, e)
+            else:
+                self.failed += 1
+                # The sender may have been cancelled while we were sending
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return None
+        self.sent += 1
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+        return smtp
+
+    def _retry(self, message: EmailMessage, attempt: int, error: Exception):
+        if attempt >= self.max_retries:
+            self.failed += 1
+            logger.error(f"📧 Giving up on email to {message['To']} after {attempt + 1} attempts: {error}")
+            return
+        delay = 2 ** attempt
+        logger.warning(f"📧 Email to {message['To']} failed ({error}), retrying in {delay}s")
+        loop = asyncio.get_running_loop()
+        loop.call_later(delay, self._requeue, message, attempt + 1)
+
+    def _requeue(self, message: EmailMessage, attempt: int):
+        try:
+            self.queue.put_nowait((message, attempt, None))
+        except asyncio.QueueFull:
+            self.failed += 1
+            logger.error(f"📧 Email queue full, dropping retry to {message['To']}")
+
+    async def enqueue(self, message: EmailMessage):
+        await self.queue.put((message, 0, None))
+
+    async def send(self, message: EmailMessage):
+        """Sends on a pooled connection and returns once the server accepted it."""
+        if not self._workers:
+            raise RuntimeError("Email delivery is not running")
+        waiter = asyncio.get_running_loop().create_future()
+        await self.queue.put((message, 0, waiter))
+        await waiter
+
+    async def start(self):
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.pool_size)]
+        logger.info(f"📧 Email delivery started with {self.pool_size} SMTP connections")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Sends what's already queued (bounded by `drain_timeout`), then closes connections."""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"📧 {self.queue.qsize()} emails still queued at shutdown")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+# Single global instance; workers are started and stopped by the lifespan
+email_delivery = EmailDelivery(
+    pool_size=settings.MAIL_POOL_SIZE,
+    max_queue=settings.MAIL_QUEUE_MAX_SIZE,
+    max_retries=settings.MAIL_MAX_RETRIES
 )
 
+
 async def send_professional_email(
-    email_to: str, 
-    subject: str, 
-    template_name: str, 
+    email_to: str,
+    subject: str,
+    template_name: str,
+    context: dict
+):
+    """
+    Renders one of the precompiled templates in email_templates and queues
+    it for the SMTP workers. Returns as soon as the message is queued.
+    """
+    await email_delivery.enqueue(render_email(email_to, subject, template_name, context))
+
+
+async def deliver_professional_email(
+    email_to: str,
+    subject: str,
+    template_name: str,
     context: dict
 ):
     """
-    Sends a professional HTML email using the Jinja2 templates 
-    located in the email_templates folder.
+    Like send_professional_email, but waits until the SMTP server accepted
+    the message and raises if it didn't. For background jobs, whose queue
+    retries the whole job.
     """
-    message = MessageSchema(
-        subject=subject,
-        recipients=[email_to],
-        template_body=context,
-        subtype=MessageType.html
-    )
-    
-    fm = FastMail(conf)
-    
-    # This will look for the .html file inside TEMPLATE_DIR
-    await fm.send_message(message, template_name=template_name)
\ No newline at end of file
+    await email_delivery.send(render_email(email_to, subject, template_name, context))
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from jose import jwt, JWTError
+
+from common.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+# Tokens are accepted up to this many seconds before `iat` (clock skew)
+_CLOCK_SKEW = 60
+# Don't hammer the key server when tokens carry an unknown `kid`
+_MIN_REFRESH_INTERVAL = 30
+
+
+class InvalidFirebaseToken(Exception):
+    pass
+
+
+def _load_project_id() -> Optional[str]:
+    if settings.FIREBASE_PROJECT_ID:
+        return settings.FIREBASE_PROJECT_ID
+    try:
+        with open(settings.FIREBASE_SERVICE_ACCOUNT_PATH) as fh:
+            return json.load(fh).get("project_id")
+    except (OSError, ValueError):
+        return None
+
+
+class FirebaseTokenVerifier:
+    """
+    Verifies Firebase ID tokens on the event loop without network I/O.
+
+    Google's signing certificates are kept in memory as public keys and
+    refreshed by a background task shortly before the Cache-Control
+    max-age runs out. Verification is then a local RS256 check plus the
+    claim checks Firebase documents (aud, iss, exp, iat, sub). A token
+    signed with a key we haven't seen triggers one rate-limited refresh,
+    which covers key rotation between scheduled refreshes.
+    """
+
+    def __init__(self, certs_url: str):
+        self.certs_url = certs_url
+        self.project_id: Optional[str] = None
+        self._keys: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._last_fetch = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Key management ---
+
+    async def refresh(self) -> float:
+        """Fetches the current certificates; returns their max-age in seconds."""
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.certs_url)
+            response.raise_for_status()
+
+        keys = {}
+        for kid, cert_pem in response.json().items():
+            cert = x509.load_pem_x509_certificate(cert_pem.encode())
+            keys[kid] = cert.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo
+            ).decode()
+
+        match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        max_age = float(match.group(1)) if match else 3600.0
+        self._keys = keys
+        self._last_fetch = time.time()
+        self._expires_at = self._last_fetch + max_age
+        return max_age
+
+    async def _refresh_once(self) -> float:
+        """Refreshes the keys; returns the delay until the next attempt."""
+        try:
+            max_age = await self.refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to refresh Firebase signing keys: {e}")
+            return _MIN_REFRESH_INTERVAL
+        # Renew at ~90% of the advertised lifetime
+        return max(_MIN_REFRESH_INTERVAL, max_age * 0.9)
+
+    async def _refresh_loop(self, delay: float):
+        while True:
+            await asyncio.sleep(delay)
+            delay = await self._refresh_once()
+
+    async def start(self):
+        self.project_id = _load_project_id()
+        delay = await self._refresh_once()
+        # Scheduled even when the first fetch failed, so the keys recover on their own
+        self._task = asyncio.create_task(self._refresh_loop(delay))
+        if self._keys:
+            logger.info(f"🔑 Firebase token verifier ready ({len(self._keys)} signing keys)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _get_key(self, kid: str) -> Optional[str]:
+        key = self._keys.get(kid)
+        if key is not None and time.time() < self._expires_at:
+            return key
+        # Unknown kid or stale keys: refresh once, shared by concurrent callers
+        async with self._lock:
+            if kid not in self._keys or time.time() >= self._expires_at:
+                if time.time() - self._last_fetch >= _MIN_REFRESH_INTERVAL:
+                    try:
+                        await self.refresh()
+                    except Exception as e:
+                        logger.error(f"Failed to refresh Firebase signing keys: {e}")
+        return self._keys.get(kid)
+
+    # --- Verification ---
+
+    async def verify(self, id_token: str) -> dict:
+        """Returns the token claims (incl. `uid`) or raises InvalidFirebaseToken."""
+        if self.project_id is None:
+            self.project_id = _load_project_id()
+            if self.project_id is None:
+                raise InvalidFirebaseToken("Firebase project id is not configured")
+
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except JWTError as e:
+            raise InvalidFirebaseToken(str(e))
+        if header.get("alg") != "RS256" or not header.get("kid"):
+            raise InvalidFirebaseToken("Unexpected token header")
+
+        key = await self._get_key(header["kid"])
+        if key is None:
+            raise InvalidFirebaseToken("Unknown signing key")
+
+        try:
+            claims = jwt.decode(
+                id_token, key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=f"https://securetoken.google.com/{self.project_id}",
+                options={"verify_at_hash": False}
+            )
+        except JWTError as e:
+            raise InvalidFirebaseToken(str(e))
+
+        sub = claims.get("sub")
+        if not sub or len(sub) > 128 or claims.get("iat", 0) > time.time() + _CLOCK_SKEW:
+            raise InvalidFirebaseToken("Invalid subject or issued-at time")
+        claims["uid"] = claims["sub"]
+        return claims
+
+
+# Single global instance; keys are loaded and refreshed from the lifespan
+firebase_verifier = FirebaseTokenVerifier(settings.FIREBASE_CERTS_URL)
@@ -0,0 +1,46 @@
+import ipaddress
+import logging
+import os
+from functools import lru_cache
+
+from common.config import settings
+
+logger = logging.getLogger("uvicorn")
+
+UNKNOWN_LOCATION = "Unknown Location"
+
+_reader = None
+
+
+def _get_reader():
+    """Opens the local GeoLite2 database once; None when it isn't installed."""
+    global _reader
+    if _reader is None and os.path.exists(settings.GEOIP_DB_PATH):
+        try:
+            import geoip2.database
+            _reader = geoip2.database.Reader(settings.GEOIP_DB_PATH)
+        except Exception as e:
+            logger.error(f"Failed to open GeoIP database: {e}")
+    return _reader
+
+
+@lru_cache(maxsize=10_000)
+def lookup_location(ip: str) -> str:
+    """City, Country for an IP from the local database (no network calls)."""
+    try:
+        if not ipaddress.ip_address(ip).is_global:
+            return UNKNOWN_LOCATION
+    except ValueError:
+        return UNKNOWN_LOCATION
+
+    reader = _get_reader()
+    if reader is None:
+        return UNKNOWN_LOCATION
+    try:
+        response = reader.city(ip)
+    except Exception:
+        return UNKNOWN_LOCATION
+    city, country = response.city.name, response.country.name
+    if city and country:
+        return f"{city}, {country}"
+    return country or UNKNOWN_LOCATION
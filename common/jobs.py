@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from common.config import settings
+from common.redis_client import get_redis
+
+logger = logging.getLogger("uvicorn")
+
+QUEUE_KEY = "jobs:queue"
+PROCESSING_PREFIX = "jobs:processing:"
+WORKERS_KEY = "jobs:workers"
+DELAYED_KEY = "jobs:delayed"
+DEAD_KEY = "jobs:dead"
+
+# Due retries promoted per maintenance tick
+PROMOTE_BATCH = 100
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Durable background jobs on a Redis list.
+
+    enqueue() is a single RPUSH, so request handlers return immediately.
+    Each worker atomically moves a job into its own processing list (BLMOVE)
+    before running it and removes it only when it finishes. Workers
+    heartbeat into a ZSET; when one stops beating for JOB_LEASE_SECONDS
+    (process died), any instance moves its processing list back onto the
+    queue (at-least-once delivery) - jobs held by live workers are never
+    touched. Failed jobs wait in a ZSET keyed by due time with exponential
+    backoff, up to JOB_MAX_ATTEMPTS, then are parked in a dead-letter list.
+    """
+
+    def __init__(self, workers: int, max_attempts: int, lease_seconds: int,
+                 retry_base_seconds: float, retry_max_seconds: float):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._maintenance: Optional[asyncio.Task] = None
+        self._worker_keys: List[str] = []
+
+    def task(self, name: str):
+        """Decorator registering a coroutine as the handler for `name`."""
+        def decorator(fn: Handler) -> Handler:
+            self._handlers[name] = fn
+            return fn
+        return decorator
+
+    async def enqueue(self, name: str, payload: Dict[str, Any]):
+        job = {"id": uuid.uuid4().hex, "name": name, "payload": payload, "attempts": 0}
+        await get_redis().rpush(QUEUE_KEY, json.dumps(job, default=str))
+
+    async def depth(self) -> int:
+        return await get_redis().llen(QUEUE_KEY)
+
+    async def delayed(self) -> int:
+        return await get_redis().zcard(DELAYED_KEY)
+
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff before retry number `attempts` (1-based)."""
+        return min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+
+    # --- Worker lifecycle ---
+
+    async def start(self):
+        instance = uuid.uuid4().hex[:12]
+        self._worker_keys = [f"{PROCESSING_PREFIX}{instance}:{i}" for i in range(self.workers)]
+        await self._heartbeat()
+        await self.reclaim_expired()
+        self._tasks = [asyncio.create_task(self._worker(i, key)) for i, key in enumerate(self._worker_keys)]
+        self._maintenance = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self):
+        tasks = self._tasks + ([self._maintenance] if self._maintenance else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks, self._maintenance = [], None
+
+        # Jobs cancelled mid-run go straight back instead of waiting out the lease
+        redis = get_redis()
+        requeued = 0
+        for key in self._worker_keys:
+            requeued += await self._requeue(key)
+            await redis.zrem(WORKERS_KEY, key)
+        if requeued:
+            logger.info(f"♻️ Re-queued {requeued} interrupted background jobs")
+        self._worker_keys = []
+
+    async def _heartbeat(self):
+        now = time.time()
+        await get_redis().zadd(WORKERS_KEY, {key: now for key in self._worker_keys})
+
+    async def _requeue(self, processing_key: str) -> int:
+        redis = get_redis()
+        moved = 0
+        while await redis.lmove(processing_key, QUEUE_KEY, "LEFT", "RIGHT"):
+            moved += 1
+        return moved
+
+    async def reclaim_expired(self) -> int:
+        """Re-queue the in-flight jobs of workers whose heartbeat has lapsed."""
+        redis = get_redis()
+        cutoff = time.time() - self.lease_seconds
+        recovered = 0
+        for key in await redis.zrangebyscore(WORKERS_KEY, "-inf", cutoff):
+            recovered += await self._requeue(key)
+            await redis.zrem(WORKERS_KEY, key)
+        if recovered:
+            logger.info(f"♻️ Re-queued {recovered} background jobs from expired workers")
+        return recovered
+
+    async def promote_due(self) -> int:
+        """Move retries whose backoff has elapsed back onto the queue."""
+        redis = get_redis()
+        promoted = 0
+        for raw in await redis.zrangebyscore(DELAYED_KEY, "-inf", time.time(), start=0, num=PROMOTE_BATCH):
+            # ZREM decides which instance promotes a job when several race
+            if await redis.zrem(DELAYED_KEY, raw):
+                await redis.rpush(QUEUE_KEY, raw)
+                promoted += 1
+        return promoted
+
+    async def _maintenance_loop(self):
+        interval = max(1.0, min(self.lease_seconds / 3, self.retry_base_seconds))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._heartbeat()
+                await self.promote_due()
+                await self.reclaim_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job maintenance error: {e}")
+
+    async def _worker(self, index: int, processing_key: str):
+        redis = get_redis()
+        while True:
+            try:
+                raw = await redis.blmove(QUEUE_KEY, processing_key, 5, "LEFT", "RIGHT")
+                if raw is None:
+                    continue
+                await self._run(raw)
+                await redis.lrem(processing_key, 1, raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} error: {e}")
+                await asyncio.sleep(1)
+
+    async def _run(self, raw: str):
+        job = json.loads(raw)
+        handler = self._handlers.get(job["name"])
+        if handler is None:
+            logger.error(f"No handler registered for job '{job['name']}'")
+            await get_redis().rpush(DEAD_KEY, raw)
+            return
+        try:
+            await handler(job["payload"])
+        except Exception as e:
+            job["attempts"] += 1
+            logger.warning(f"Job '{job['name']}' failed (attempt {job['attempts']}): {e}")
+            if job["attempts"] >= self.max_attempts:
+                await get_redis().rpush(DEAD_KEY, json.dumps(job, default=str))
+                return
+            due = time.time() + self.retry_delay(job["attempts"])
+            await get_redis().zadd(DELAYED_KEY, {json.dumps(job, default=str): due})
+
+
+# Single global instance; handlers register with @job_queue.task(...)
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    retry_base_seconds=settings.JOB_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.JOB_RETRY_MAX_SECONDS,
+)
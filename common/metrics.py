@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from prometheus_client import REGISTRY, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .database import engine, read_engine
+from .email import email_delivery
+from .jobs import DEAD_KEY, job_queue
+from .redis_client import get_redis
+from .websocket import manager
+
+logger = logging.getLogger("uvicorn")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+WEBSOCKETS = Gauge("websocket_connections", "Open WebSocket connections (chat and notifications)")
+QUEUE_DEPTH = Gauge("queue_depth", "Items waiting in outbound queues", ["queue"])
+LOOP_LAG = Gauge("event_loop_lag_seconds", "How late the latest event loop probe woke up")
+LOOP_LAG_HISTOGRAM = Histogram(
+    "event_loop_lag_probe_seconds",
+    "Event loop probe lateness",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+WEBSOCKETS.set_function(lambda: len(manager.active_connections))
+QUEUE_DEPTH.labels("email").set_function(lambda: email_delivery.queue.qsize())
+
+
+class _PoolCollector:
+    """DB pool and email delivery figures, read when /metrics is scraped."""
+
+    def collect(self):
+        pools = [("primary", engine)] + ([("replica", read_engine)] if read_engine is not None else [])
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "Connections currently in use", labels=["engine"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "Connections open beyond pool_size", labels=["engine"])
+        size = GaugeMetricFamily("db_pool_size", "Configured pool size", labels=["engine"])
+        for name, pool_engine in pools:
+            pool = pool_engine.pool
+            # SQLite's static/null pools (local runs) have no queue to report
+            if hasattr(pool, "checkedout"):
+                checked_out.add_metric([name], pool.checkedout())
+                overflow.add_metric([name], max(0, pool.overflow()))
+                size.add_metric([name], pool.size())
+        yield checked_out
+        yield overflow
+        yield size
+
+        sent = CounterMetricFamily("emails_sent", "Emails accepted by the SMTP server")
+        sent.add_metric([], email_delivery.sent)
+        yield sent
+        failed = CounterMetricFamily("emails_failed", "Emails dropped after all retries")
+        failed.add_metric([], email_delivery.failed)
+        yield failed
+
+
+REGISTRY.register(_PoolCollector())
+
+
+class MetricsMiddleware:
+    """
+    Observes request latency per route template ("/api/v1/social/post/{post_id}/like",
+    not the concrete path), so the label set stays bounded. Unrouted
+    requests share the "unmatched" label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if not self._routes:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self._routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(scope["method"], self._route(scope), f"{status // 100}xx").observe(
+                time.perf_counter() - started
+            )
+
+
+class MetricsSampler:
+    """
+    Background probe: sleeps for `interval` and records how late it woke
+    up (time the loop spent blocked on other work), then samples the
+    Redis-backed job queue depths, which can't be read from a sync scrape.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _sample_queues(self):
+        redis = get_redis()
+        QUEUE_DEPTH.labels("jobs").set(await job_queue.depth())
+        QUEUE_DEPTH.labels("jobs_delayed").set(await job_queue.delayed())
+        QUEUE_DEPTH.labels("jobs_dead").set(await redis.llen(DEAD_KEY))
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            LOOP_LAG.set(lag)
+            LOOP_LAG_HISTOGRAM.observe(lag)
+            try:
+                await self._sample_queues()
+            except Exception as e:
+                logger.warning(f"Queue depth sampling failed: {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Single global instance; the probe loop is started by the lifespan
+metrics_sampler = MetricsSampler(interval=settings.METRICS_SAMPLE_INTERVAL_SECONDS)
@@ -0,0 +1,55 @@
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Hard cap so a client can't ask for an unbounded page
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Packs the (created_at, id) position of the last row into an opaque token."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, row_id = raw.rsplit("|", 1)
+        created_at, row_id = datetime.fromisoformat(ts), int(row_id)
+        # Out-of-range ids would only fail later, in the driver
+        if not 0 <= row_id < 2 ** 63:
+            raise ValueError(row_id)
+        return created_at, row_id
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, created_col, id_col, cursor: Optional[str], limit: int):
+    """
+    Applies (created_at, id) keyset pagination to a newest-first query.
+    The id tie-breaker keeps ordering stable when timestamps collide, and
+    seeking past the cursor instead of using OFFSET means new rows inserted
+    at the head never shift the page (no duplicates, no skipped items).
+    One extra row is fetched so the caller can tell whether a next page exists.
+    """
+    if cursor:
+        c_time, c_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                created_col < c_time,
+                and_(created_col == c_time, id_col < c_id)
+            )
+        )
+    return query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def split_page(rows: List[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Trims the look-ahead row and returns the page with the next cursor."""
+    if len(rows) <= limit:
+        return list(rows), None
+    last = rows[limit - 1]
+    return list(rows[:limit]), encode_cursor(last.created_at, last.id)
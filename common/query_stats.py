@@ -0,0 +1,135 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger("uvicorn")
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+# "IN (?, ?, ?)" and friends collapse to one shape whatever the list length
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Statement text with whitespace and bound-parameter lists normalized."""
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _caller_stack(limit: int = 6) -> List[str]:
+    """
+    App frames that led to the current statement, innermost first. Event
+    hooks run in SQLAlchemy's worker greenlet, whose stack ends at the
+    driver call, so the route -> helper chain is read from the suspended
+    parent greenlet (the awaiting coroutines) instead.
+    """
+    parent = greenlet.getcurrent().parent
+    frame = parent.gr_frame if parent is not None else sys._getframe(1)
+
+    frames = []
+    while frame is not None and len(frames) < limit:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and "site-packages" not in filename and filename != __file__:
+            frames.append(f"{os.path.relpath(filename, APP_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return frames
+
+
+class QueryStats:
+    """Statements executed on behalf of one request."""
+
+    def __init__(self, repeat_threshold: int):
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.samples: Dict[str, List[str]] = {}
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        # One stack sample per shape, taken when it starts looking like N+1
+        if self.shapes[shape] == self.repeat_threshold:
+            self.samples[shape] = _caller_stack()
+
+    def repeated(self) -> Dict[str, int]:
+        """Shapes executed at least `repeat_threshold` times (likely N+1 loops)."""
+        return {shape: n for shape, n in self.shapes.items() if n >= self.repeat_threshold}
+
+
+# Stats of the request being served; None outside requests (jobs, startup)
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def instrument(engine: AsyncEngine):
+    """Counts and times every statement run on `engine` into the current request's stats."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        stats = current_query_stats.get()
+        if stats is not None and started is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+
+class QueryStatsMiddleware:
+    """
+    Collects per-request query counts and DB time. Requests over
+    SQL_QUERY_BUDGET statements or SQL_TIME_BUDGET_MS of DB time are logged,
+    as is every statement shape repeated SQL_REPEAT_THRESHOLD times, with
+    a stack sample of where it ran. With SQL_DEBUG_HEADERS the numbers are
+    also returned as X-DB-Queries / X-DB-Time-Ms / X-DB-Repeated headers.
+    """
+
+    def __init__(self, app: ASGIApp, debug_headers: bool = False):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(settings.SQL_REPEAT_THRESHOLD)
+        token = current_query_stats.set(stats)
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+                    (b"x-db-repeated", str(len(stats.repeated())).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.debug_headers else send)
+        finally:
+            current_query_stats.reset(token)
+            self._report(scope, stats)
+
+    def _report(self, scope: Scope, stats: QueryStats):
+        route = f"{scope['method']} {scope['path']}"
+        db_ms = stats.seconds * 1000
+        if stats.count > settings.SQL_QUERY_BUDGET or db_ms > settings.SQL_TIME_BUDGET_MS:
+            logger.warning(f"🐢 {route} ran {stats.count} queries in {db_ms:.1f} ms (over budget)")
+        for shape, n in stats.repeated().items():
+            where = " <- ".join(stats.samples.get(shape, [])) or "unknown"
+            logger.warning(f"🔁 {route} repeated a query {n}x (possible N+1) at {where}: {shape[:200]}")
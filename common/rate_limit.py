@@ -0,0 +1,193 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from common.config import settings
+from common.redis_client import MemoryRedis, get_redis
+
+logger = logging.getLogger("uvicorn")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+# Refill, take one token and report what's left, atomically on the Redis server
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True)
+class Limit:
+    """`capacity` requests per `period` seconds, per `scope` ("ip" or "user")."""
+    scope: str
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        # e.g. "ip:10/minute"
+        scope, _, amount = spec.strip().partition(":")
+        count, _, period = amount.partition("/")
+        if scope not in ("ip", "user") or period not in _PERIODS:
+            raise ValueError(f"Invalid rate limit spec: {spec!r}")
+        return cls(scope=scope, capacity=int(count), period=_PERIODS[period])
+
+
+def parse_limits(spec: str) -> List[Limit]:
+    return [Limit.parse(part) for part in spec.split(",") if part.strip()]
+
+
+class _LocalBuckets:
+    """Per-worker token buckets, bounded in size (least recently used evicted)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def take(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(limit.capacity), now]
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, bucket[0]
+        return False, bucket[0]
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by (rule, client IP or user id).
+
+    Every check first takes a token from the local bucket. This worker's
+    traffic is a subset of the global traffic, so an empty local bucket
+    means the global one is empty too and the request is rejected without
+    a network round trip. Otherwise the shared bucket in Redis (one Lua
+    call) has the final say, which keeps limits consistent across workers.
+    With the memory:// stand-in, or if Redis is unreachable, the local
+    bucket alone decides.
+    """
+
+    def __init__(self, max_local_entries: int = 100_000):
+        self._local = _LocalBuckets(max_local_entries)
+        self._script = None
+
+    def _redis_script(self):
+        if self._script is None:
+            redis = get_redis()
+            if isinstance(redis, MemoryRedis):
+                return None
+            self._script = redis.register_script(_TOKEN_BUCKET_LUA)
+        return self._script
+
+    async def hit(self, rule: str, identity: str, limit: Limit) -> Tuple[bool, float]:
+        """Consumes one token; returns (allowed, retry_after_seconds)."""
+        key = f"rl:{rule}:{limit.scope}:{identity}"
+        allowed, tokens = self._local.take(key, limit)
+        if allowed:
+            script = self._redis_script()
+            if script is not None:
+                try:
+                    allowed_flag, remaining = await script(keys=[key], args=[limit.capacity, limit.rate])
+                    allowed, tokens = bool(int(allowed_flag)), float(remaining)
+                except Exception as e:
+                    logger.warning(f"Rate limiter falling back to local buckets: {e}")
+        if allowed:
+            return True, 0.0
+        return False, (1 - tokens) / limit.rate
+
+
+def client_ip(scope: Scope) -> str:
+    hops = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if hops > 0:
+        # Repeated headers are one list in order; each trusted proxy appends the peer it saw
+        forwarded = [
+            part.strip()
+            for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+            for part in value.decode("latin-1").split(",") if part.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def bearer_user_id(scope: Scope) -> Optional[int]:
+    # Imported lazily: auth_cache pulls in the models and the DB session factory
+    from common.auth_cache import principal_cache
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return principal_cache.decode(token)
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Rejects over-limit requests with 429 before routing, so no dependency
+    (DB session, auth lookup) runs for them. Rules come from
+    settings.RATE_LIMITS: {"METHOD /path": "ip:10/minute,user:5/minute"}.
+    The "user" scope uses the bearer token's subject (decoded from the
+    cached JWT, no DB access) and falls back to the client IP.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter, rules: Dict[str, str]):
+        self.app = app
+        self.limiter = limiter
+        self.rules = {route: parse_limits(spec) for route, spec in rules.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.rules:
+            return await self.app(scope, receive, send)
+
+        rule = f"{scope['method']} {scope['path']}"
+        limits = self.rules.get(rule)
+        if limits:
+            for limit in limits:
+                user_id = bearer_user_id(scope) if limit.scope == "user" else None
+                identity = f"u{user_id}" if user_id is not None else client_ip(scope)
+                allowed, retry_after = await self.limiter.hit(rule, identity, limit)
+                if not allowed:
+                    response = JSONResponse(
+                        {"detail": "Too many requests. Please slow down."},
+                        status_code=429,
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+                    )
+                    return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
+
+
+# Single global instance shared by the HTTP middleware and the chat socket
+rate_limiter = RateLimiter()
@@ -0,0 +1,246 @@
+import asyncio
+import fnmatch
+import time
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from common.config import settings
+
+
+class MemoryRedis:
+    """
+    In-process stand-in for the subset of Redis commands this app uses.
+    Selected with REDIS_URL=memory:// for local development and tests;
+    state is per process and lost on restart.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expiry: Dict[str, float] = {}
+        self._list_event = asyncio.Event()
+
+    # --- Internals ---
+
+    def _alive(self, key: str) -> bool:
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return key in self._data
+
+    def _list(self, key: str, create: bool = False) -> Optional[List[str]]:
+        if not self._alive(key):
+            if not create:
+                return None
+            self._data[key] = []
+        return self._data[key]
+
+    def _notify(self):
+        self._list_event.set()
+        self._list_event = asyncio.Event()
+
+    # --- Keys ---
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._data.get(key) if self._alive(key) else None
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._alive(key):
+            return None
+        self._data[key] = str(value)
+        self._expiry.pop(key, None)
+        if ex:
+            self._expiry[key] = time.monotonic() + ex
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self._data.pop(key, None)
+            self._expiry.pop(key, None)
+        return removed
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(await self.get(key) or 0) + amount
+        self._data[key] = str(value)
+        return value
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._expiry[key] = time.monotonic() + seconds
+        return True
+
+    async def ttl(self, key: str) -> int:
+        if not self._alive(key):
+            return -2
+        expires_at = self._expiry.get(key)
+        return -1 if expires_at is None else max(0, int(expires_at - time.monotonic()))
+
+    async def keys(self, pattern: str = "*") -> List[str]:
+        return [k for k in list(self._data) if self._alive(k) and fnmatch.fnmatchcase(k, pattern)]
+
+    # --- Hashes ---
+
+    async def hset(self, key: str, mapping: Dict[str, Any]) -> int:
+        if not self._alive(key):
+            self._data[key] = {}
+        self._data[key].update({k: str(v) for k, v in mapping.items()})
+        return len(mapping)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self._data[key]) if self._alive(key) else {}
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        if not self._alive(key):
+            self._data[key] = {}
+        value = int(self._data[key].get(field, 0)) + amount
+        self._data[key][field] = str(value)
+        return value
+
+    # --- Lists ---
+
+    async def rpush(self, key: str, *values: Any) -> int:
+        items = self._list(key, create=True)
+        items.extend(str(v) for v in values)
+        self._notify()
+        return len(items)
+
+    async def lpush(self, key: str, *values: Any) -> int:
+        items = self._list(key, create=True)
+        for v in values:
+            items.insert(0, str(v))
+        self._notify()
+        return len(items)
+
+    async def llen(self, key: str) -> int:
+        items = self._list(key)
+        return len(items) if items else 0
+
+    async def lrange(self, key: str, start: int, end: int) -> List[str]:
+        items = self._list(key) or []
+        return items[start:None if end == -1 else end + 1]
+
+    async def lrem(self, key: str, count: int, value: str) -> int:
+        items = self._list(key)
+        if not items:
+            return 0
+        removed = 0
+        while value in items and (count == 0 or removed < count):
+            items.remove(value)
+            removed += 1
+        return removed
+
+    async def lmove(self, src: str, dest: str, src_side: str = "LEFT", dest_side: str = "RIGHT") -> Optional[str]:
+        items = self._list(src)
+        if not items:
+            return None
+        value = items.pop(0 if src_side == "LEFT" else -1)
+        target = self._list(dest, create=True)
+        if dest_side == "LEFT":
+            target.insert(0, value)
+        else:
+            target.append(value)
+        return value
+
+    async def blmove(self, src: str, dest: str, timeout: float,
+                     src_side: str = "LEFT", dest_side: str = "RIGHT") -> Optional[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            value = await self.lmove(src, dest, src_side, dest_side)
+            if value is not None:
+                return value
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._list_event.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    # --- Sorted sets ---
+
+    async def zadd(self, key: str, mapping: Dict[str, float]) -> int:
+        if not self._alive(key):
+            self._data[key] = {}
+        added = sum(1 for member in mapping if member not in self._data[key])
+        self._data[key].update({str(m): float(s) for m, s in mapping.items()})
+        return added
+
+    async def zrem(self, key: str, *members: str) -> int:
+        scores = self._data.get(key) if self._alive(key) else None
+        if not scores:
+            return 0
+        return sum(1 for m in members if scores.pop(m, None) is not None)
+
+    async def zcard(self, key: str) -> int:
+        return len(self._data[key]) if self._alive(key) else 0
+
+    async def zrangebyscore(self, key: str, min: float, max: float,
+                            start: Optional[int] = None, num: Optional[int] = None) -> List[str]:
+        scores = self._data.get(key) if self._alive(key) else {}
+        members = [m for m, s in sorted(scores.items(), key=lambda kv: (kv[1], kv[0])) if float(min) <= s <= float(max)]
+        if start is not None and num is not None:
+            members = members[start:start + num]
+        return members
+
+    # --- Transactions ---
+
+    def pipeline(self, transaction: bool = True) -> "_MemoryPipeline":
+        return _MemoryPipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+class _MemoryPipeline:
+    """Buffers commands and runs them back to back on execute(), like MULTI/EXEC."""
+
+    def __init__(self, redis: MemoryRedis):
+        self._redis = redis
+        self._commands: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands = []
+
+
+_client = None
+
+
+def get_redis():
+    """Shared Redis client (or the in-memory stand-in for memory:// URLs)."""
+    global _client
+    if _client is None:
+        if settings.REDIS_URL.startswith("memory://"):
+            _client = MemoryRedis()
+        else:
+            _client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,5 +1,9 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any, Dict
+from fastapi import HTTPException, status
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from .config import settings
@@ -20,6 +24,70 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_password_byte_enc = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_byte_enc, hashed_password_byte_enc)
 
+# --- Async hashing (keeps bcrypt off the event loop) ---
+
+class PasswordHasherBusy(HTTPException):
+    """Raised instead of queueing when too many hashes are already pending."""
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+# bcrypt releases the GIL while hashing, so plain threads give real parallelism.
+# Created on first use, so a shutdown (tests, scripts, lifespan restarts) isn't final.
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_pending_hashes = 0
+_pending_lock = threading.Lock()
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt"
+        )
+    return _hash_executor
+
+def _hash_finished(_future):
+    # Runs in the worker thread (or on cancel), hence the lock
+    global _pending_hashes
+    with _pending_lock:
+        _pending_hashes -= 1
+
+async def _run_in_hasher(fn, *args):
+    global _pending_hashes
+    with _pending_lock:
+        if _pending_hashes >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHasherBusy()
+        _pending_hashes += 1
+    try:
+        future = _get_hash_executor().submit(fn, *args)
+    except BaseException:
+        _hash_finished(None)
+        raise
+    # Counted until the thread is done with it, not until the caller stops
+    # waiting: a cancelled request's bcrypt call still occupies a worker
+    future.add_done_callback(_hash_finished)
+    return await asyncio.wrap_future(future)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hasher(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hasher(verify_password, plain_password, hashed_password)
+
+def pending_password_hashes() -> int:
+    """Hashes queued or running in the pool (for metrics/diagnostics)."""
+    return _pending_hashes
+
+def shutdown_password_hasher():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 def create_access_token(subject: Any, expires_delta: Optional[timedelta] = None) -> str:
     """Creates a JWT access token for a user."""
     if expires_delta:
@@ -1,17 +1,55 @@
 import aioboto3
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
 from botocore.config import Config
+from botocore.credentials import Credentials
 from common.config import settings
 from fastapi import UploadFile
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+import asyncio
+import base64
+import hashlib
+import logging
+import time
 import uuid
 import os
 
+logger = logging.getLogger("uvicorn")
+
+
+class UploadTooLarge(ValueError):
+    """A streamed upload went past its size limit (the multipart upload is aborted)."""
+
+
+def public_url(key: str) -> str:
+    """URL under the public bucket domain (MEDIA_PUBLIC_BASE_URL) for an object key."""
+    return f"{settings.MEDIA_PUBLIC_BASE_URL.rstrip('/')}/{key}"
+
+
+def key_from_url(url: Optional[str]) -> Optional[str]:
+    """Object key for a URL produced by public_url(), or None for foreign URLs."""
+    prefix = settings.MEDIA_PUBLIC_BASE_URL.rstrip("/") + "/"
+    if url and url.startswith(prefix):
+        return url[len(prefix):].split("?", 1)[0] or None
+    return None
+
+
 class S3Storage:
     def __init__(self):
         self.bucket_name = settings.R2_BUCKET_NAME
-        self.endpoint_url = f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com"
+        self.endpoint_url = settings.R2_ENDPOINT_URL or f"https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com"
         self.access_key = settings.R2_ACCESS_KEY
         self.secret_key = settings.R2_SECRET_KEY
         self.session = aioboto3.Session()
+        self._stack: Optional[AsyncExitStack] = None
+        self._client = None
+        self._credentials = Credentials(self.access_key, self.secret_key)
+        # key -> (reuse_until, signed GET url)
+        self._signed_reads: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
 
     def _get_client_kwargs(self):
         return {
@@ -19,28 +57,92 @@ class S3Storage:
             "endpoint_url": self.endpoint_url,
             "aws_access_key_id": self.access_key,
             "aws_secret_access_key": self.secret_key,
-            "config": Config(signature_version="s3v4"),
+            "config": Config(
+                signature_version="s3v4",
+                max_pool_connections=settings.R2_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=settings.R2_TCP_KEEPALIVE,
+                retries={"max_attempts": 3, "mode": "standard"}
+            ),
             "region_name": "auto",
         }
 
-    async def generate_upload_url(self, file_name: str, content_type: str, folder: str = "general"):
+    # --- Client lifecycle (driven by the app lifespan) ---
+
+    async def start(self):
+        """Opens the shared client; its connection pool is reused by every call."""
+        self._stack = AsyncExitStack()
+        self._client = await self._stack.enter_async_context(self.session.client(**self._get_client_kwargs()))
+        logger.info(f"🪣 Storage client ready ({settings.R2_MAX_POOL_CONNECTIONS} pooled connections)")
+
+    async def stop(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack = None
+        self._client = None
+
+    @asynccontextmanager
+    async def client(self):
+        """The shared client, or a one-off client outside the app (scripts, shells)."""
+        if self._client is not None:
+            yield self._client
+        else:
+            async with self.session.client(**self._get_client_kwargs()) as s3:
+                yield s3
+
+    # --- Presigned URLs (pure CPU, no client or network round trip) ---
+
+    def _object_url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket_name}/{quote(key, safe='/-_.~')}"
+
+    def presign(self, method: str, key: str, expires_in: int, headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, str]] = None) -> str:
+        """
+        SigV4 query-string signature computed locally, equivalent to
+        client.generate_presigned_url. Any `headers` (e.g. Content-Type) are
+        signed, so the uploader must send exactly those values; `params` are
+        extra query parameters (e.g. uploadId/partNumber).
+        """
+        url = self._object_url(key)
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        request = AWSRequest(method=method, url=url, headers=headers or {})
+        S3SigV4QueryAuth(self._credentials, "s3", "auto", expires=expires_in).add_auth(request)
+        return request.url
+
+    def generate_upload_url(self, file_name: str, content_type: str, folder: str = "general",
+                            expires_in: Optional[int] = None) -> Dict[str, str]:
         """
         Generates a signed URL for the frontend to upload directly to R2.
         This saves server bandwidth.
         """
         unique_key = f"{folder}/{uuid.uuid4()}-{file_name}"
-        
-        async with self.session.client(**self._get_client_kwargs()) as s3:
-            url = await s3.generate_presigned_url(
-                "put_object",
-                Params={
-                    "Bucket": self.bucket_name,
-                    "Key": unique_key,
-                    "ContentType": content_type,
-                },
-                ExpiresIn=3600,
-            )
-            return {"url": url, "key": unique_key}
+        url = self.presign(
+            "PUT", unique_key,
+            expires_in or settings.MEDIA_UPLOAD_URL_EXPIRES,
+            headers={"Content-Type": content_type}
+        )
+        return {"url": url, "key": unique_key, "public_url": public_url(unique_key)}
+
+    def signed_read_url(self, key: str) -> str:
+        """
+        Signed GET URL for private media. URLs are reused until shortly before
+        they expire, so repeated renders of the same object skip the HMAC
+        work and browsers can cache the response under a stable URL.
+        """
+        now = time.time()
+        entry = self._signed_reads.get(key)
+        if entry is not None and entry[0] > now:
+            self._signed_reads.move_to_end(key)
+            return entry[1]
+
+        expires_in = settings.MEDIA_READ_URL_EXPIRES
+        url = self.presign("GET", key, expires_in)
+        # Stop handing out a URL once less than 10% of its lifetime is left
+        self._signed_reads[key] = (now + expires_in * 0.9, url)
+        self._signed_reads.move_to_end(key)
+        while len(self._signed_reads) > settings.MEDIA_READ_URL_CACHE_SIZE:
+            self._signed_reads.popitem(last=False)
+        return url
 
     async def upload_file_direct(self, file: UploadFile, folder: str = "profiles") -> str:
         """
@@ -50,20 +152,174 @@ class S3Storage:
         file_ext = os.path.splitext(file.filename)[1]
         unique_key = f"{folder}/{uuid.uuid4()}{file_ext}"
         
-        async with self.session.client(**self._get_client_kwargs()) as s3:
+        async with self.client() as s3:
             await s3.upload_fileobj(
                 file.file,
                 self.bucket_name,
                 unique_key,
                 ExtraArgs={"ContentType": file.content_type}
             )
-            # This is the public URL format for Cloudflare R2
-            # Replace 'pub-your-id.r2.dev' with your actual R2 Public Bucket URL or Custom Domain
-            return f"https://media.meixup.com/{unique_key}"
+            return public_url(unique_key)
+
+    # --- Object access for server-side processing ---
+
+    async def get_object_bytes(self, key: str, max_bytes: int) -> bytes:
+        """Downloads a whole object, refusing anything larger than `max_bytes`."""
+        async with self.client() as s3:
+            response = await s3.get_object(Bucket=self.bucket_name, Key=key)
+            if response["ContentLength"] > max_bytes:
+                response["Body"].close()
+                raise ValueError(f"Object {key} is larger than {max_bytes} bytes")
+            async with response["Body"] as stream:
+                return await stream.read()
+
+    async def put_object(self, key: str, body: bytes, content_type: str, cache_control: Optional[str] = None):
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        async with self.client() as s3:
+            await s3.put_object(Bucket=self.bucket_name, Key=key, Body=body, ContentType=content_type, **extra)
+
+    async def exists(self, key: str) -> bool:
+        async with self.client() as s3:
+            try:
+                await s3.head_object(Bucket=self.bucket_name, Key=key)
+                return True
+            except s3.exceptions.ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return False
+                raise
+
+    async def delete_objects(self, keys: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Deletes keys with DeleteObjects, 1000 (the API maximum) per request.
+        Returns (deleted keys, {key: error code} for failures).
+        """
+        deleted, errors = [], {}
+        async with self.client() as s3:
+            for start in range(0, len(keys), 1000):
+                batch = keys[start:start + 1000]
+                response = await s3.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+                # Quiet mode only reports failures
+                failed = {error["Key"]: error.get("Code", "Unknown") for error in response.get("Errors", [])}
+                errors.update(failed)
+                deleted.extend(key for key in batch if key not in failed)
+        return deleted, errors
+
+    async def list_objects(self, prefix: str) -> AsyncIterator[Tuple[str, datetime]]:
+        """Yields (key, last_modified) for every object under `prefix`."""
+        async with self.client() as s3:
+            paginator = s3.get_paginator("list_objects_v2")
+            async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get("Contents", []):
+                    yield obj["Key"], obj["LastModified"]
+
+    # --- Multipart uploads (large videos / reels) ---
+
+    async def create_multipart_upload(self, key: str, content_type: str) -> str:
+        async with self.client() as s3:
+            response = await s3.create_multipart_upload(Bucket=self.bucket_name, Key=key, ContentType=content_type)
+        return response["UploadId"]
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes,
+                          content_md5: Optional[str] = None) -> str:
+        """Uploads one part; R2 rejects it if the body doesn't match `content_md5`."""
+        content_md5 = content_md5 or base64.b64encode(hashlib.md5(body).digest()).decode()
+        async with self.client() as s3:
+            response = await s3.upload_part(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                PartNumber=part_number, Body=body, ContentMD5=content_md5
+            )
+        return response["ETag"]
+
+    def presign_upload_part(self, key: str, upload_id: str, part_number: int,
+                            content_md5: Optional[str] = None) -> str:
+        """Presigned PUT for one part, so clients can upload (and retry) parts directly."""
+        return self.presign(
+            "PUT", key, settings.MEDIA_UPLOAD_URL_EXPIRES,
+            headers={"Content-MD5": content_md5} if content_md5 else None,
+            params={"partNumber": str(part_number), "uploadId": upload_id}
+        )
+
+    async def list_parts(self, key: str, upload_id: str) -> List[Dict]:
+        """Parts already stored for an upload (what a resuming client can skip)."""
+        parts = []
+        async with self.client() as s3:
+            paginator = s3.get_paginator("list_parts")
+            async for page in paginator.paginate(Bucket=self.bucket_name, Key=key, UploadId=upload_id):
+                for part in page.get("Parts", []):
+                    parts.append({"part_number": part["PartNumber"], "etag": part["ETag"], "size": part["Size"]})
+        return parts
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Tuple[int, str]]):
+        async with self.client() as s3:
+            await s3.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in sorted(parts)]}
+            )
+
+    async def abort_multipart_upload(self, key: str, upload_id: str):
+        async with self.client() as s3:
+            await s3.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+
+    async def upload_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str,
+                            part_size: Optional[int] = None, concurrency: Optional[int] = None,
+                            max_bytes: Optional[int] = None) -> int:
+        """
+        Multipart upload fed from an async byte stream (e.g. request.stream()).
+
+        Chunks are cut into `part_size` parts that upload concurrently, at
+        most `concurrency` at a time. Reading stops while all slots are
+        busy, so memory stays bounded by about (concurrency + 1) parts
+        whatever the file size. Returns the number of bytes uploaded; the
+        upload is aborted if anything fails, including the stream going
+        past `max_bytes` (UploadTooLarge).
+        """
+        part_size = part_size or settings.MEDIA_MULTIPART_PART_SIZE
+        slots = asyncio.Semaphore(concurrency or settings.MEDIA_MULTIPART_CONCURRENCY)
+        upload_id = await self.create_multipart_upload(key, content_type)
+        tasks: List[asyncio.Task] = []
+
+        async def send(part_number: int, body: bytes) -> Tuple[int, str]:
+            try:
+                return part_number, await self.upload_part(key, upload_id, part_number, body)
+            finally:
+                slots.release()
+
+        async def submit(body: bytes):
+            await slots.acquire()
+            tasks.append(asyncio.create_task(send(len(tasks) + 1, body)))
+
+        total = 0
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                total += len(chunk)
+                if max_bytes is not None and total > max_bytes:
+                    raise UploadTooLarge(f"Upload to {key} is larger than {max_bytes} bytes")
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    await submit(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+            if buffer or not tasks:
+                await submit(bytes(buffer))
+            parts = await asyncio.gather(*tasks)
+            await self.complete_multipart_upload(key, upload_id, parts)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self.abort_multipart_upload(key, upload_id)
+            except Exception as e:
+                logger.error(f"Failed to abort multipart upload {upload_id}: {e}")
+            raise
+        return total
 
     async def delete_file(self, file_key: str):
         """Removes a file from storage when a user deletes a post or profile picture."""
-        async with self.session.client(**self._get_client_kwargs()) as s3:
+        async with self.client() as s3:
             await s3.delete_object(Bucket=self.bucket_name, Key=file_key)
 
 # Initialize a global storage instance
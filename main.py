@@ -1,16 +1,37 @@
 import firebase_admin
 from firebase_admin import credentials
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import text
 
 from common.config import settings
+from common.database import AsyncSessionLocal, replica_monitor, dispose_engines
+from common.security import shutdown_password_hasher
+from common.redis_client import close_redis, get_redis
+from common.jobs import job_queue
+from common.email import email_delivery
+from common.storage import storage
+from common.firebase_tokens import firebase_verifier
+from common.rate_limit import RateLimitMiddleware, rate_limiter
+from common.query_stats import QueryStatsMiddleware
+from common.metrics import MetricsMiddleware, metrics_sampler
+from services.social.graph import follow_graph
+from services.social.ranking import trending_index
+from services.search.typeahead import typeahead_index
+from services.search.post_index import post_index
+from services.media.pipeline import media_pipeline
+from services.media.gc import media_gc
 
 # --- Import All Service Routers ---
 from services.auth.router import router as auth_router
 from services.profiles.router import router as profile_router
-from services.profiles.search_router import router as search_router # Added
+from services.profiles.media_router import router as media_router
+from services.search.router import router as search_router # Users & Posts search
 from services.social.router import router as social_router
 from services.discovery.router import router as discovery_router
 from services.notifications.router import router as notification_router
@@ -35,10 +56,83 @@ async def lifespan(app: FastAPI):
             logger.info("Firebase Admin successfully initialized.")
         except Exception as e:
             logger.error(f"Failed to initialize Firebase: {e}")
+
+    # Startup: Fetch Google's ID-token signing keys (refreshed in the background)
+    await firebase_verifier.start()
+
+    # Startup: Load the follow graph into memory (retried in the background on failure)
+    await follow_graph.start()
+
+    # Startup: Replay recent engagement into the trending index
+    try:
+        async with AsyncSessionLocal() as session:
+            await trending_index.warm(session, settings.TRENDING_WARMUP_HOURS)
+    except Exception as e:
+        logger.error(f"Failed to warm trending index: {e}")
+
+    # Startup: Build the username typeahead index
+    try:
+        async with AsyncSessionLocal() as session:
+            await typeahead_index.load(session)
+    except Exception as e:
+        logger.error(f"Failed to load typeahead index: {e}")
+
+    # Startup: Restore the post caption index and catch up on new posts
+    try:
+        async with AsyncSessionLocal() as session:
+            await post_index.load(session, settings.POST_INDEX_SNAPSHOT_PATH)
+    except Exception as e:
+        logger.error(f"Failed to load post search index: {e}")
+
+    # Startup: Persistent R2 client (one connection pool for all storage calls)
+    try:
+        await storage.start()
+    except Exception as e:
+        logger.error(f"Failed to open storage client: {e}")
+
+    # Startup: SMTP connection pool for outgoing email
+    try:
+        await email_delivery.start()
+    except Exception as e:
+        logger.error(f"Failed to start email delivery: {e}")
+
+    # Startup: Background job workers (login alerts, ...)
+    try:
+        await job_queue.start()
+    except Exception as e:
+        logger.error(f"Failed to start background job workers: {e}")
+
+    # Startup: Video posters need the ffmpeg binary (installed in the Dockerfile)
+    media_pipeline.check_tools()
+
+    # Startup: Periodic cleanup of orphaned bucket objects
+    media_gc.start()
+
+    # Startup: Replication-lag checks that decide where read-only routes go
+    replica_monitor.start()
+
+    # Startup: Event-loop lag probe and queue depth sampling for /metrics
+    metrics_sampler.start()
     
     yield
     # Shutdown logic (cleanup database pools or storage connections)
     logger.info("Shutting down meiXuP Master API...")
+    try:
+        post_index.snapshot(settings.POST_INDEX_SNAPSHOT_PATH)
+    except Exception as e:
+        logger.error(f"Failed to snapshot post search index: {e}")
+    shutdown_password_hasher()
+    await metrics_sampler.stop()
+    await job_queue.stop()
+    await email_delivery.stop()
+    await storage.stop()
+    await media_gc.stop()
+    await follow_graph.stop()
+    media_pipeline.shutdown()
+    await firebase_verifier.stop()
+    await replica_monitor.stop()
+    await dispose_engines()
+    await close_redis()
 
 app = FastAPI(
     title="meiXuP Master API",
@@ -47,6 +141,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# --- SQL Instrumentation ---
+# Innermost of the middlewares, so only requests that reach a route are measured
+app.add_middleware(QueryStatsMiddleware, debug_headers=settings.SQL_DEBUG_HEADERS)
+
+# --- Rate Limiting ---
+# Over-limit requests get a 429 here, before any route dependency opens a DB session
+# (added before CORS so rejections still carry CORS headers)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, rules=settings.RATE_LIMITS)
+
 # --- CORS Configuration ---
 # Replace "*" with specific domains (e.g., ["http://localhost:3000"]) in production
 app.add_middleware(
@@ -57,10 +160,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Metrics ---
+# Outermost, so latency includes every other middleware (and 429s)
+app.add_middleware(MetricsMiddleware)
+
 # --- Router Inclusions ---
 # Prefixing all routes with /api/v1 for version control
 app.include_router(auth_router, prefix="/api/v1")
 app.include_router(profile_router, prefix="/api/v1")
+app.include_router(media_router, prefix="/api/v1") # Presigned uploads
 app.include_router(search_router, prefix="/api/v1") # Search logic
 app.include_router(social_router, prefix="/api/v1") # Posts, Likes, Follows
 app.include_router(discovery_router, prefix="/api/v1") # Dating Swipe logic
@@ -77,9 +185,43 @@ async def health_check():
             "Auth", "Profiles", "Social", "Discovery", 
             "Chat (WS)", "Notifications (WS)", "Search"
         ],
-        "firebase_status": "initialized"
+        "firebase_status": "initialized" if firebase_admin._apps else "not initialized"
     }
 
+@app.get("/ready", tags=["Health"])
+async def readiness():
+    """
+    200 only when the database and Redis both answer and the follow graph
+    is in memory (for load balancer / k8s readiness probes).
+    """
+    async def check_db():
+        async with AsyncSessionLocal() as session:
+            await session.execute(text("SELECT 1"))
+
+    async def check_redis():
+        await get_redis().ping()
+
+    async def check_follow_graph():
+        if not follow_graph.loaded:
+            raise RuntimeError("follow graph not loaded")
+
+    checks = {"database": check_db, "redis": check_redis, "follow_graph": check_follow_graph}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check(), timeout=settings.READINESS_TIMEOUT_SECONDS) for check in checks.values()),
+        return_exceptions=True
+    )
+    status = {
+        name: "ok" if not isinstance(result, Exception) else f"error: {type(result).__name__}"
+        for name, result in zip(checks, results)
+    }
+    ready = all(value == "ok" for value in status.values())
+    return JSONResponse({"ready": ready, "checks": status}, status_code=200 if ready else 503)
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus exposition format. Keep this path off the public ingress."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 from datetime import datetime
 import platform
 import sys
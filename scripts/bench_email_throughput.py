@@ -0,0 +1,131 @@
+"""
+Email throughput benchmark: one SMTP connection per message (the old
+send_professional_email) against the pooled EmailDelivery workers in
+common/email.py, both talking to a local SMTP sink.
+
+Needs the app settings (.env); the MAIL_* server settings are overridden
+to point at the sink, so nothing leaves the machine. --latency-ms delays
+every sink reply to approximate a remote provider's round trip:
+
+    python scripts/bench_email_throughput.py --messages 500 --latency-ms 20
+
+Reported: emails/s and how many SMTP connections the sink accepted.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosmtplib
+
+from common.config import settings
+from common.email import EmailDelivery, render_email
+
+
+class SMTPSink:
+    """Accepts and discards mail; just enough SMTP for aiosmtplib."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.connections = 0
+        self.messages = 0
+        self._server = None
+
+    async def _reply(self, writer, line: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    async def _session(self, reader, writer):
+        self.connections += 1
+        await self._reply(writer, "220 sink ready")
+        try:
+            while line := await reader.readline():
+                verb = line[:4].upper()
+                if verb in (b"EHLO", b"HELO"):
+                    await self._reply(writer, "250 sink")
+                elif verb == b"DATA":
+                    await self._reply(writer, "354 end with .")
+                    while await reader.readline() not in (b".\r\n", b""):
+                        pass
+                    self.messages += 1
+                    await self._reply(writer, "250 queued")
+                elif verb == b"QUIT":
+                    await self._reply(writer, "221 bye")
+                    break
+                else:
+                    await self._reply(writer, "250 ok")
+        finally:
+            writer.close()
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+def messages(count: int):
+    return [
+        render_email(f"user{i}@example.com", "Security Alert: New Login for meiXuP", "security_alert.html",
+                     {"time": "now", "device": "bench", "location": "Unknown"})
+        for i in range(count)
+    ]
+
+
+async def per_message(batch, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def send(message):
+        async with gate:
+            await aiosmtplib.send(message, hostname=settings.MAIL_SERVER, port=settings.MAIL_PORT,
+                                  start_tls=False, timeout=30)
+    await asyncio.gather(*(send(m) for m in batch))
+
+
+async def pooled(batch, pool_size: int, wait: bool):
+    delivery = EmailDelivery(pool_size=pool_size, max_queue=len(batch), max_retries=0)
+    await delivery.start()
+    if wait:
+        # Job path: every caller awaits its own SMTP transaction
+        await asyncio.gather(*(delivery.send(m) for m in batch))
+    else:
+        for message in batch:
+            await delivery.enqueue(message)
+    await delivery.stop(drain_timeout=600)
+
+
+async def main(args):
+    sink = SMTPSink(args.latency_ms / 1000)
+    settings.MAIL_SERVER, settings.MAIL_PORT = "127.0.0.1", await sink.start()
+    settings.MAIL_STARTTLS = settings.MAIL_USE_CREDENTIALS = False
+
+    modes = [(f"connect-per-message x{args.pool_size}", lambda b: per_message(b, args.pool_size))]
+    for size in sorted({1, args.pool_size}):
+        modes.append((f"pool x{size} (enqueue)", lambda b, size=size: pooled(b, size, wait=False)))
+    modes.append((f"pool x{args.pool_size} (send)", lambda b: pooled(b, args.pool_size, wait=True)))
+
+    print(f"{args.messages} messages, sink latency {args.latency_ms} ms per reply")
+    print(f"{'mode':<28}{'emails/s':>10}{'connections':>13}")
+    for name, run in modes:
+        batch = messages(args.messages)
+        sink.connections = sink.messages = 0
+        started = time.perf_counter()
+        await run(batch)
+        rate = sink.messages / (time.perf_counter() - started)
+        print(f"{name:<28}{rate:>10.1f}{sink.connections:>13}")
+    await sink.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=settings.MAIL_POOL_SIZE)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
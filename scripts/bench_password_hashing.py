@@ -0,0 +1,83 @@
+"""
+Password verification benchmark: bcrypt called inline in a coroutine (the
+old /auth/login path) against the bounded hasher pool in common/security.py.
+
+Needs the app settings (.env); no database or network. For each mode it
+runs --logins concurrent verifications, --concurrency at a time, while a
+probe task measures how late the event loop wakes it up:
+
+    python scripts/bench_password_hashing.py --logins 200 --concurrency 32
+
+Reported: logins/s, event-loop lag (p50 / p99 / max) and how many
+requests the pool shed with 503 (PASSWORD_HASH_MAX_PENDING).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.config import settings
+from common.security import (
+    PasswordHasherBusy, hash_password, shutdown_password_hasher, verify_password, verify_password_async
+)
+
+PROBE_INTERVAL = 0.005
+
+
+async def inline_verify(password: str, hashed: str) -> bool:
+    return verify_password(password, hashed)
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(0.0, loop.time() - started - PROBE_INTERVAL) * 1000)
+
+
+async def run(verify, hashed: str, logins: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    shed = 0
+
+    async def login():
+        nonlocal shed
+        async with gate:
+            try:
+                assert await verify("correct horse", hashed)
+            except PasswordHasherBusy:
+                shed += 1
+
+    lags, stop = [], asyncio.Event()
+    prober = asyncio.create_task(probe(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await prober
+
+    lags.sort()
+    p99 = lags[max(0, int(len(lags) * 0.99) - 1)] if lags else 0.0
+    return (logins - shed) / elapsed, statistics.median(lags or [0.0]), p99, (lags or [0.0])[-1], shed
+
+
+async def main(args):
+    hashed = hash_password("correct horse")
+    print(f"bcrypt cost {hashed.split('$')[2]}, pool of {settings.PASSWORD_HASH_WORKERS} threads, "
+          f"max pending {settings.PASSWORD_HASH_MAX_PENDING}")
+    print(f"{'mode':<8}{'logins/s':>10}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}{'shed':>6}")
+    for name, verify in (("inline", inline_verify), ("pool", verify_password_async)):
+        rate, p50, p99, worst, shed = await run(verify, hashed, args.logins, args.concurrency)
+        print(f"{name:<8}{rate:>10.1f}{p50:>12.1f}{p99:>12.1f}{worst:>12.1f}{shed:>6}")
+    shutdown_password_hasher()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
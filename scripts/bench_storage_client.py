@@ -0,0 +1,108 @@
+"""
+Storage client benchmark: a fresh aioboto3 client per call (the old
+S3Storage behaviour) against the shared client opened by storage.start(),
+plus botocore's generate_presigned_url against the local S3Storage.presign.
+
+Needs the app settings (.env). Without --endpoint the calls go to a
+built-in S3 stand-in on localhost (aiohttp, plain HTTP), which isolates
+client setup cost; pass --endpoint to measure a real bucket instead
+(credentials and bucket from R2_* settings):
+
+    python scripts/bench_storage_client.py --calls 200
+    python scripts/bench_storage_client.py --calls 50 --endpoint https://<account>.r2.cloudflarestorage.com
+
+Reported: mean and p95 milliseconds per put_object / presign.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+
+from common.config import settings
+from common.storage import S3Storage
+
+BODY = b"x" * 1024
+
+
+async def start_stand_in() -> web.AppRunner:
+    """Answers every request with an empty 200 and an ETag, enough for put_object."""
+    async def handle(request: web.Request) -> web.Response:
+        await request.read()
+        return web.Response(headers={"ETag": '"bench"'})
+
+    app = web.Application(client_max_size=1 << 24)
+    app.router.add_route("*", "/{tail:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    settings.R2_ENDPOINT_URL = "http://%s:%d" % runner.addresses[0][:2]
+    return runner
+
+
+async def timed(fn, calls: int):
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        await fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+async def main(args):
+    runner = None
+    if args.endpoint:
+        settings.R2_ENDPOINT_URL = args.endpoint
+    else:
+        runner = await start_stand_in()
+
+    # S3Storage reads the endpoint at construction
+    storage = S3Storage()
+
+    async def put_fresh_client(i):
+        async with storage.session.client(**storage._get_client_kwargs()) as s3:
+            await s3.put_object(Bucket=storage.bucket_name, Key=f"bench/{i}", Body=BODY)
+
+    async def put_shared_client(i):
+        async with storage.client() as s3:
+            await s3.put_object(Bucket=storage.bucket_name, Key=f"bench/{i}", Body=BODY)
+
+    async def presign_botocore(i):
+        async with storage.client() as s3:
+            await s3.generate_presigned_url(
+                "get_object", Params={"Bucket": storage.bucket_name, "Key": f"bench/{i}"}, ExpiresIn=3600
+            )
+
+    async def presign_local(i):
+        storage.presign("GET", f"bench/{i}", 3600)
+
+    print(f"endpoint {storage.endpoint_url}, {args.calls} sequential calls")
+    print(f"{'operation':<28}{'mean ms':>10}{'p95 ms':>10}")
+    mean, p95 = await timed(put_fresh_client, args.calls)
+    print(f"{'put, client per call':<28}{mean:>10.2f}{p95:>10.2f}")
+
+    await storage.start()
+    await put_shared_client(-1)  # open the pooled connection before timing
+    for name, fn in (("put, shared client", put_shared_client),
+                     ("presign, botocore", presign_botocore),
+                     ("presign, local SigV4", presign_local)):
+        mean, p95 = await timed(fn, args.calls)
+        print(f"{name:<28}{mean:>10.3f}{p95:>10.3f}")
+    await storage.stop()
+
+    if runner is not None:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--endpoint", help="S3-compatible endpoint; defaults to a local stand-in")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""
+User search benchmark: the old leading-wildcard ILIKE query against the
+consolidated search_profiles() paths (username prefix and FULLTEXT).
+
+Needs MySQL (FULLTEXT / MATCH ... AGAINST) and the app settings (.env).
+Point --url at a scratch database; --seed fills it with synthetic users
+and profiles first (schema via `alembic upgrade head`):
+
+    python scripts/bench_user_search.py --url mysql+aiomysql://u:p@localhost/bench --seed 200000
+
+Prints p50 / p95 / max latency per query and path, plus the rows MySQL
+estimates the ILIKE query examines (EXPLAIN) to show it is a full scan.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, or_, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from common.database import _engine_kwargs
+from services.auth.models import User
+from services.profiles.models import Profile
+from services.search.logic import search_profiles
+
+FIRST = ["alex", "sam", "maria", "li", "noah", "emma", "arjun", "zoe", "omar", "ines", "kofi", "yuki"]
+LAST = ["smith", "garcia", "chen", "patel", "kim", "muller", "rossi", "silva", "nguyen", "dubois"]
+QUERIES = ["al", "zo", "maria", "chen", "arjun patel", "emma rossi", "nguyen", "xyzzy"]
+
+
+def ilike_query(q: str, limit: int):
+    """The pre-consolidation query (search router / profiles route)."""
+    return select(Profile).where(
+        or_(Profile.username.ilike(f"%{q}%"), Profile.full_name.ilike(f"%{q}%"))
+    ).limit(limit)
+
+
+async def seed(Session, rows: int, batch: int = 5_000):
+    async with Session() as db:
+        existing = await db.scalar(select(func.count()).select_from(Profile))
+    for start in range(existing, rows, batch):
+        ids = range(start + 1, min(rows, start + batch) + 1)
+        users, profiles = [], []
+        for i in ids:
+            first, last = random.choice(FIRST), random.choice(LAST)
+            users.append({"id": i, "email": f"bench{i}@example.com", "is_active": True, "is_verified": True})
+            profiles.append({"user_id": i, "username": f"{first}{last}{i}", "full_name": f"{first.title()} {last.title()}"})
+        async with Session() as db:
+            await db.execute(insert(User).prefix_with("IGNORE"), users)
+            await db.execute(insert(Profile).prefix_with("IGNORE"), profiles)
+            await db.commit()
+    print(f"Seeded profiles up to {rows}")
+
+
+async def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], samples[-1]
+
+
+async def explain_rows(db, query) -> int:
+    compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    rows = (await db.execute(text(f"EXPLAIN {compiled}"))).mappings().all()
+    return sum(int(row["rows"] or 0) for row in rows)
+
+
+async def main(args):
+    engine = create_async_engine(args.url, **_engine_kwargs(args.url))
+    Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+    if args.seed:
+        await seed(Session, args.seed)
+
+    print(f"{'query':<14}{'path':<10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'examined':>11}")
+    async with Session() as db:
+        for q in QUERIES:
+            p50, p95, worst = await timed(lambda: db.execute(ilike_query(q, args.limit)), args.repeat)
+            examined = await explain_rows(db, ilike_query(q, args.limit))
+            print(f"{q:<14}{'ilike':<10}{p50:>9.2f}{p95:>9.2f}{worst:>9.2f}{examined:>11}")
+
+            p50, p95, worst = await timed(lambda: search_profiles(db, q, limit=args.limit), args.repeat)
+            print(f"{q:<14}{'search':<10}{p50:>9.2f}{p95:>9.2f}{worst:>9.2f}{'':>11}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of a scratch MySQL database")
+    parser.add_argument("--seed", type=int, default=0, help="fill up to this many synthetic profiles first")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
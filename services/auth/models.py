@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from common.database import Base
 from sqlalchemy.sql import func
 import enum
@@ -17,11 +17,3 @@ class User(Base):
     is_verified = Column(Boolean, default=False) # OTP Check
     firebase_uid = Column(String(255), unique=True, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-
-class UserOTP(Base):
-    __tablename__ = "user_otps"
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    otp_code = Column(String(6))
-    purpose = Column(String(20)) # 'verification' or 'reset'
-    expires_at = Column(DateTime)
\ No newline at end of file
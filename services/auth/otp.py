@@ -0,0 +1,92 @@
+import hashlib
+import hmac
+import secrets
+
+from common.config import settings
+from common.redis_client import MemoryRedis, get_redis
+
+# Counts an attempt only while the code exists (a bare HINCRBY would recreate
+# an expired or consumed key with no TTL); returns {digest, attempts} or nil
+_CLAIM_ATTEMPT_LUA = """
+local digest = redis.call('HGET', KEYS[1], 'digest')
+if not digest then
+    return false
+end
+return {digest, redis.call('HINCRBY', KEYS[1], 'attempts', 1)}
+"""
+
+
+class OTPStore:
+    """
+    One-time codes kept in Redis instead of the `user_otps` table.
+
+    Each (purpose, user) pair has at most one live code: issuing a new one
+    replaces the old code and resets its attempt counter, and Redis expires
+    it after `ttl` seconds. Only an HMAC of the code is stored. A code is
+    burnt after `max_attempts` wrong guesses or on first successful use.
+    """
+
+    def __init__(self, ttl_seconds: int, max_attempts: int):
+        self.ttl = ttl_seconds
+        self.max_attempts = max_attempts
+        self._script = None
+
+    @staticmethod
+    def _key(purpose: str, user_id: int) -> str:
+        return f"otp:{purpose}:{user_id}"
+
+    @staticmethod
+    def _digest(code: str) -> str:
+        return hmac.new(settings.SECRET_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+    async def issue(self, user_id: int, purpose: str) -> str:
+        """Creates a fresh 6-digit code, replacing any outstanding one."""
+        code = f"{secrets.randbelow(900000) + 100000}"
+        key = self._key(purpose, user_id)
+        # One MULTI/EXEC round trip; the code never exists without its TTL
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={"digest": self._digest(code), "attempts": 0})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        return code
+
+    async def _claim_attempt(self, key: str):
+        """Atomically counts one attempt; returns (digest, attempts) or None if no code is live."""
+        redis = get_redis()
+        if isinstance(redis, MemoryRedis):
+            # The stand-in never yields between these calls, so they can't interleave
+            entry = await redis.hgetall(key)
+            if not entry.get("digest"):
+                return None
+            return entry["digest"], await redis.hincrby(key, "attempts", 1)
+        if self._script is None:
+            self._script = redis.register_script(_CLAIM_ATTEMPT_LUA)
+        result = await self._script(keys=[key])
+        return (result[0], int(result[1])) if result else None
+
+    async def verify(self, user_id: int, purpose: str, code: str) -> bool:
+        """True exactly once for the right code; the code is consumed on success."""
+        key = self._key(purpose, user_id)
+        # Count the attempt before comparing so parallel guesses can't exceed the limit
+        claimed = await self._claim_attempt(key)
+        if claimed is None:
+            return False
+        digest, attempts = claimed
+
+        redis = get_redis()
+        if attempts > self.max_attempts:
+            await redis.delete(key)
+            return False
+
+        if not hmac.compare_digest(digest, self._digest(code)):
+            if attempts >= self.max_attempts:
+                await redis.delete(key)
+            return False
+
+        # Whoever deletes the key first wins, so a code can't be used twice
+        return await redis.delete(key) == 1
+
+
+# Single global instance used by the registration and password-reset flows
+otp_store = OTPStore(ttl_seconds=settings.OTP_TTL_SECONDS, max_attempts=settings.OTP_MAX_ATTEMPTS)
@@ -1,40 +1,24 @@
-import random
-import httpx
-from datetime import datetime, timedelta
+import logging
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from firebase_admin import auth as firebase_auth
 
 from common.database import get_db
-from common.security import hash_password, verify_password, create_access_token
+from common.security import hash_password_async, verify_password_async, create_access_token
 from common.email import send_professional_email
-from .models import User, UserOTP
+from common.auth_cache import principal_cache
+from common.firebase_tokens import firebase_verifier, InvalidFirebaseToken
+from common.rate_limit import client_ip
+from .models import User
+from .otp import otp_store
+from .tasks import enqueue_login_alert
 from .schemas import UserSignup, GoogleLogin, OTPVerify, PasswordReset
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
-
-# --- HELPERS ---
-
-def generate_otp():
-    """Generates a secure 6-digit string OTP."""
-    return f"{random.randint(100000, 999999)}"
-
-async def get_geo_location(ip: str):
-    """Fetches City, Country from IP using a public API."""
-    try:
-        async with httpx.AsyncClient() as client:
-            # Use ip-api for free geo-lookup
-            response = await client.get(f"http://ip-api.com/json/{ip}")
-            data = response.json()
-            if data['status'] == 'success':
-                return f"{data['city']}, {data['country']}"
-    except:
-        pass
-    return "Unknown Location"
+logger = logging.getLogger("uvicorn")
 
 # --- ENDPOINTS ---
 
@@ -46,19 +30,17 @@ async def register(user_in: UserSignup, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Create User
-    new_user = User(email=user_in.email, hashed_password=hash_password(user_in.password))
+    new_user = User(email=user_in.email, hashed_password=await hash_password_async(user_in.password))
     db.add(new_user)
-    await db.flush() # Get the ID before committing
-
-    # Generate Registration OTP
-    otp = generate_otp()
-    otp_record = UserOTP(
-        user_id=new_user.id, 
-        otp_code=otp, 
-        purpose="verification", 
-        expires_at=datetime.utcnow() + timedelta(minutes=10)
-    )
-    db.add(otp_record)
+    await db.flush()
+
+    # Generate Registration OTP before committing, so a Redis outage can't
+    # leave behind an unverified account that has no code
+    try:
+        otp = await otp_store.issue(new_user.id, "verification")
+    except Exception:
+        await db.rollback()
+        raise HTTPException(status_code=503, detail="Registration is temporarily unavailable. Please try again.")
     await db.commit()
 
     # Send HTML Welcome/Registration OTP Email
@@ -78,21 +60,12 @@ async def verify_registration(data: OTPVerify, db: AsyncSession = Depends(get_db
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    otp_query = select(UserOTP).where(
-        (UserOTP.user_id == user.id) & 
-        (UserOTP.otp_code == data.otp) & 
-        (UserOTP.purpose == "verification") &
-        (UserOTP.expires_at > datetime.utcnow())
-    )
-    result = await db.execute(otp_query)
-    otp_entry = result.scalar_one_or_none()
-
-    if not otp_entry:
+    if not await otp_store.verify(user.id, "verification", data.otp):
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
     user.is_verified = True
-    await db.delete(otp_entry)
     await db.commit()
+    principal_cache.invalidate_user(user.id)
     
     return {"msg": "Account verified successfully. You can now login."}
 
@@ -101,29 +74,27 @@ async def login(request: Request, db: AsyncSession = Depends(get_db), form_data:
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Google-only accounts have no password hash
+    if not user or not user.hashed_password or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Account not verified. Please verify your email.")
 
-    # Gather Login Details for Security Alert
-    client_host = request.client.host
-    user_agent = request.headers.get("user-agent", "Unknown Device")
-    location = await get_geo_location(client_host)
-    current_time = datetime.now().strftime("%B %d, %Y %I:%M %p")
+    # Tokens of deactivated accounts are rejected by get_current_user anyway
+    if not user.is_active:
+        raise HTTPException(status_code=403, detail="This account has been deactivated.")
 
-    # Send Security Alert Email
-    await send_professional_email(
-        email_to=user.email,
-        subject="Security Alert: New Login for meiXuP",
-        template_name="security_alert.html",
-        context={
-            "time": current_time,
-            "device": user_agent,
-            "location": location
-        }
-    )
+    # Security alert (geo lookup + email) runs on the background job queue;
+    # a queue outage must not lock users out
+    try:
+        await enqueue_login_alert(
+            email=user.email,
+            ip=client_ip(request.scope),
+            user_agent=request.headers.get("user-agent", "Unknown Device")
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Could not queue login alert for user {user.id}: {e}")
 
     token = create_access_token(user.id)
     return {"access_token": token, "token_type": "bearer"}
@@ -134,16 +105,12 @@ async def forgot_password(email: str, db: AsyncSession = Depends(get_db)):
     user = result.scalar_one_or_none()
     
     if user:
-        otp = generate_otp()
-        otp_record = UserOTP(
-            user_id=user.id, 
-            otp_code=otp, 
-            purpose="reset", 
-            expires_at=datetime.utcnow() + timedelta(minutes=10)
-        )
-        db.add(otp_record)
-        await db.commit()
-        
+        try:
+            otp = await otp_store.issue(user.id, "reset")
+        except Exception as e:
+            logger.error(f"Could not issue reset code for user {user.id}: {e}")
+            raise HTTPException(status_code=503, detail="Password reset is temporarily unavailable. Please try again.")
+
         await send_professional_email(
             email_to=email,
             subject="Reset Your meiXuP Password",
@@ -165,31 +132,22 @@ async def reset_password(data: PasswordReset, db: AsyncSession = Depends(get_db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    otp_query = select(UserOTP).where(
-        (UserOTP.user_id == user.id) & 
-        (UserOTP.otp_code == data.otp) & 
-        (UserOTP.purpose == "reset") &
-        (UserOTP.expires_at > datetime.utcnow())
-    )
-    result = await db.execute(otp_query)
-    otp_entry = result.scalar_one_or_none()
-
-    if not otp_entry:
+    if not await otp_store.verify(user.id, "reset", data.otp):
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
 
-    user.hashed_password = hash_password(data.new_password)
-    await db.delete(otp_entry)
+    user.hashed_password = await hash_password_async(data.new_password)
     await db.commit()
+    principal_cache.invalidate_user(user.id)
     
     return {"msg": "Password has been reset successfully."}
 
 @router.post("/google-login")
 async def google_login(data: GoogleLogin, db: AsyncSession = Depends(get_db)):
     try:
-        decoded_token = firebase_auth.verify_id_token(data.id_token)
+        decoded_token = await firebase_verifier.verify(data.id_token)
         email = decoded_token['email']
         fb_uid = decoded_token['uid']
-    except Exception:
+    except (InvalidFirebaseToken, KeyError):
         raise HTTPException(status_code=401, detail="Invalid Google credentials")
 
     result = await db.execute(select(User).where(User.email == email))
@@ -200,6 +158,8 @@ async def google_login(data: GoogleLogin, db: AsyncSession = Depends(get_db)):
         db.add(user)
         await db.commit()
         await db.refresh(user)
+    elif not user.is_active:
+        raise HTTPException(status_code=403, detail="This account has been deactivated.")
 
     token = create_access_token(user.id)
     return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from common.email import deliver_professional_email
+from common.geoip import lookup_location
+from common.jobs import job_queue
+
+LOGIN_ALERT_JOB = "auth.login_alert"
+
+
+async def enqueue_login_alert(email: str, ip: str, user_agent: str):
+    """Queues the new-login security email; the request doesn't wait for it."""
+    await job_queue.enqueue(LOGIN_ALERT_JOB, {
+        "email": email,
+        "ip": ip,
+        "user_agent": user_agent,
+        "time": datetime.now().strftime("%B %d, %Y %I:%M %p"),
+    })
+
+
+@job_queue.task(LOGIN_ALERT_JOB)
+async def send_login_alert(payload: dict):
+    # Awaits the SMTP send, so a failure fails the job and it is retried from Redis
+    await deliver_professional_email(
+        email_to=payload["email"],
+        subject="Security Alert: New Login for meiXuP",
+        template_name="security_alert.html",
+        context={
+            "time": payload["time"],
+            "device": payload["user_agent"],
+            "location": lookup_location(payload["ip"])
+        }
+    )
@@ -1,27 +1,33 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_, desc
+from sqlalchemy import select, or_
 import json
 import logging
 from typing import List
 
-from common.database import get_db
+from common.database import get_db, get_read_db
+from common.deps import get_current_user
+from common.dataloader import RequestLoaders, get_viewer_loaders
 from common.websocket import manager  # Master Switchboard
-from common.security import decode_access_token
+from common.auth_cache import principal_cache
+from common.config import settings
+from common.rate_limit import rate_limiter, parse_limits
 from services.auth.models import User
-from services.profiles.models import Profile
 from services.discovery.models import Match
-from .models import Message, ChatRoom
+from .models import Message
 
 logger = logging.getLogger("uvicorn")
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
+MESSAGE_LIMITS = parse_limits(settings.CHAT_MESSAGE_RATE_LIMIT)
+
 # --- HTTP ENDPOINTS (Inbox & History) ---
 
 @router.get("/rooms")
 async def get_my_conversations(
-    current_user: User = Depends(decode_access_token), # Or your standard JWT dep
-    db: AsyncSession = Depends(get_db)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+    loaders: RequestLoaders = Depends(get_viewer_loaders)
 ):
     """
     Fetches the list of active chat rooms for the inbox view.
@@ -34,31 +40,32 @@ async def get_my_conversations(
     matches_res = await db.execute(match_query)
     matches = matches_res.scalars().all()
 
+    other_ids = {
+        match.id: match.user_two if match.user_one == current_user.id else match.user_one
+        for match in matches
+    }
+
+    # 2. Batch-load profiles, rooms and last messages (one query each)
+    profiles = await loaders.profiles.load_many(other_ids.values())
+    rooms = await loaders.rooms_by_match.load_many(other_ids.keys())
+    last_messages = await loaders.last_messages.load_many(
+        room.id for room in rooms.values() if room
+    )
+
     conversations = []
 
     for match in matches:
-        other_user_id = match.user_two if match.user_one == current_user.id else match.user_one
-        
-        # 2. Get Other User Profile
-        profile_res = await db.execute(select(Profile).where(Profile.user_id == other_user_id))
-        other_profile = profile_res.scalar_one_or_none()
-        
-        # 3. Get Chat Room and Last Message
-        room_res = await db.execute(select(ChatRoom).where(ChatRoom.match_id == match.id))
-        room = room_res.scalar_one_or_none()
-        
-        last_msg = None
-        if room:
-            msg_query = select(Message).where(Message.room_id == room.id).order_by(desc(Message.created_at)).limit(1)
-            msg_res = await db.execute(msg_query)
-            last_msg = msg_res.scalar_one_or_none()
+        other_user_id = other_ids[match.id]
+        other_profile = profiles[other_user_id]
+        room = rooms[match.id]
+        last_msg = last_messages[room.id] if room else None
 
         conversations.append({
             "room_id": room.id if room else None,
             "other_user": {
                 "id": other_user_id,
                 "name": other_profile.full_name if other_profile else "User",
-                "avatar": other_profile.profile_picture_url if other_profile else None
+                "avatar": other_profile.avatar_url if other_profile else None
             },
             "last_message": {
                 "text": last_msg.message_text if last_msg else "No messages yet",
@@ -80,18 +87,30 @@ async def chat_websocket_endpoint(
     db: AsyncSession = Depends(get_db)
 ):
     # 1. Authenticate the WebSocket
-    payload = decode_access_token(token)
-    if not payload:
+    principal = await principal_cache.resolve(token)
+    if not principal:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
     
-    user_id = int(payload.get("sub"))
+    user_id = principal.id
     await manager.connect(user_id, websocket)
 
     try:
         while True:
             # 2. Receive message from sender
             data = await websocket.receive_text()
+
+            # Over-limit messages are refused before touching the database
+            rejected = None
+            for limit in MESSAGE_LIMITS:
+                allowed, retry_after = await rate_limiter.hit("chat:message", f"u{user_id}", limit)
+                if not allowed:
+                    rejected = retry_after
+                    break
+            if rejected is not None:
+                await websocket.send_json({"type": "RATE_LIMITED", "retry_after": round(rejected, 1)})
+                continue
+
             msg_data = json.loads(data)
             
             # 3. Save to Database
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.config import settings
+from common.database import AsyncSessionLocal
+from common.redis_client import get_redis
+from common.storage import storage, key_from_url, public_url
+from services.chat.models import Message
+from services.profiles.models import Profile
+from services.social.models import Post
+from .models import OrphanedMedia
+
+logger = logging.getLogger("uvicorn")
+
+VARIANT_PREFIX = "media/variants/"
+# Bucket prefixes whose every live object is referenced from a column, and
+# therefore safe to reconcile. posts/ and chat/ are not: batch uploads
+# (carousels) have no column of their own.
+MANAGED_PREFIXES = ("avatars/", VARIANT_PREFIX)
+# Columns that may point at bucket objects (full public URLs or bare keys)
+MEDIA_COLUMNS = (Post.media_url, Post.thumbnail_url, Profile.avatar_url, Message.media_url)
+
+DELETE_BATCH = 1000  # DeleteObjects maximum
+
+
+def to_key(value: Optional[str]) -> Optional[str]:
+    """Bucket key for a stored media reference, or None for external URLs."""
+    if not value:
+        return None
+    key = key_from_url(value)
+    if key is None and "://" not in value:
+        key = value
+    return key
+
+
+def variant_set(key: str) -> Optional[str]:
+    """Content hash of a media/variants/<sha256>/<pixels>.webp key, else None."""
+    if not key.startswith(VARIANT_PREFIX):
+        return None
+    digest, _, name = key[len(VARIANT_PREFIX):].partition("/")
+    return digest if digest and name else None
+
+
+def variant_siblings(digest: str) -> Set[str]:
+    """Every key a variant set with this hash can contain."""
+    # Imported lazily: the pipeline imports this module
+    from .pipeline import AVATAR_VARIANTS, POST_VARIANTS, MediaPipeline
+    sizes = set(POST_VARIANTS.values()) | set(AVATAR_VARIANTS.values())
+    return {MediaPipeline.variant_key(digest, size) for size in sizes}
+
+
+def is_variant_marker(key: str) -> bool:
+    """True for the smallest size of a set, whose presence tells the pipeline the set is complete."""
+    from .pipeline import AVATAR_VARIANTS, POST_VARIANTS
+    markers = {min(POST_VARIANTS.values()), min(AVATAR_VARIANTS.values())}
+    return variant_set(key) is not None and key.rsplit("/", 1)[1] in {f"{size}.webp" for size in markers}
+
+
+def expand_variant_sets(keys: Iterable[str]) -> Set[str]:
+    """`keys` plus every sibling of the variant keys among them."""
+    expanded = set(keys)
+    for digest in set(filter(None, map(variant_set, expanded))):
+        expanded |= variant_siblings(digest)
+    return expanded
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def mark_orphaned(db: AsyncSession, references: Iterable[Optional[str]], reason: str):
+    """
+    Queues objects for deletion after the grace period. Part of the caller's
+    transaction; keys already queued are ignored. A variant key queues its
+    whole set, so no size outlives the others.
+    """
+    keys = expand_variant_sets(key for key in map(to_key, references) if key)
+    if not keys:
+        return
+    delete_after = _utcnow() + timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS)
+    await db.execute(
+        insert(OrphanedMedia).prefix_with("IGNORE", dialect="mysql"),
+        [{"object_key": key, "reason": reason, "attempts": 0, "delete_after": delete_after} for key in sorted(keys)]
+    )
+
+
+class MediaGC:
+    """
+    Deletes orphaned bucket objects in the background.
+
+    Keys reach `media_gc_queue` when the app replaces media (avatars) or
+    when the reconciliation scan finds objects no row references. Every
+    MEDIA_GC_INTERVAL_SECONDS one worker (a Redis lock keeps the workers
+    from overlapping) takes due keys, re-checks that nothing references
+    them (content-addressed variants can be shared), and deletes them with
+    DeleteObjects, 1000 keys per request with a pause between batches and
+    a cap per run.
+
+    Variant sets are live or dead as a whole: rows store one or two sizes
+    (thumbnail_url, avatar_url), and the remaining sizes of that content
+    hash are kept with them. A dead set is deleted marker first, and the
+    other sizes only once the marker is gone, so the pipeline never sees a
+    marker for a set that is missing sizes.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Queue processing ---
+
+    async def _referenced(self, db: AsyncSession, keys: List[str]) -> Set[str]:
+        expanded = expand_variant_sets(keys)
+        candidates = expanded | {public_url(key) for key in expanded}
+        found: Set[str] = set()
+        for column in MEDIA_COLUMNS:
+            result = await db.execute(select(column).where(column.in_(candidates)).distinct())
+            found.update(filter(None, map(to_key, result.scalars().all())))
+        live_sets = set(filter(None, map(variant_set, found)))
+        return {key for key in keys if key in found or variant_set(key) in live_sets}
+
+    async def collect(self) -> int:
+        """One rate-limited pass over the due part of the queue; returns objects deleted."""
+        deleted_total = 0
+        while deleted_total < settings.MEDIA_GC_MAX_DELETES_PER_RUN:
+            limit = min(DELETE_BATCH, settings.MEDIA_GC_MAX_DELETES_PER_RUN - deleted_total)
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(OrphanedMedia.object_key)
+                    .where(OrphanedMedia.delete_after <= _utcnow())
+                    .order_by(OrphanedMedia.delete_after)
+                    .limit(limit)
+                )
+                keys = result.scalars().all()
+                if not keys:
+                    break
+
+                # 1. Anything referenced again (or shared) just leaves the queue
+                referenced = await self._referenced(db, keys)
+                to_delete = expand_variant_sets(key for key in keys if key not in referenced)
+
+                # 2. One DeleteObjects call per 1000 keys: set markers first, then
+                #    the rest of each set whose marker is gone
+                markers = sorted(key for key in to_delete if is_variant_marker(key))
+                deleted, errors = await storage.delete_objects(markers) if markers else ([], {})
+                kept_sets = {variant_set(key) for key in errors} - {None}
+                rest, errors = [], dict(errors)
+                for key in sorted(to_delete - set(markers)):
+                    if variant_set(key) in kept_sets:
+                        errors[key] = "MarkerNotDeleted"
+                    else:
+                        rest.append(key)
+                if rest:
+                    rest_deleted, rest_errors = await storage.delete_objects(rest)
+                    deleted, errors = deleted + rest_deleted, {**errors, **rest_errors}
+
+                # 3. Drop finished rows; push failures back by another grace period
+                done = set(deleted) | referenced
+                if done:
+                    await db.execute(delete(OrphanedMedia).where(OrphanedMedia.object_key.in_(done)))
+                if errors:
+                    logger.warning(f"🧹 Media GC could not delete {len(errors)} objects: {list(errors.items())[:3]}")
+                    await db.execute(
+                        update(OrphanedMedia)
+                        .where(OrphanedMedia.object_key.in_(list(errors)))
+                        .values(
+                            attempts=OrphanedMedia.attempts + 1,
+                            delete_after=_utcnow() + timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS)
+                        )
+                    )
+                await db.commit()
+
+            deleted_total += len(deleted)
+            if len(keys) < limit:
+                break
+            await asyncio.sleep(settings.MEDIA_GC_BATCH_PAUSE_SECONDS)
+
+        if deleted_total:
+            logger.info(f"🧹 Media GC deleted {deleted_total} orphaned objects")
+        return deleted_total
+
+    # --- Reconciliation ---
+
+    async def _referenced_keys(self) -> Set[str]:
+        keys: Set[str] = set()
+        async with AsyncSessionLocal() as db:
+            for column in MEDIA_COLUMNS:
+                result = await db.stream(
+                    select(column).where(column.isnot(None)).execution_options(yield_per=10_000)
+                )
+                async for rows in result.partitions(10_000):
+                    keys.update(filter(None, (to_key(row[0]) for row in rows)))
+        return keys
+
+    async def reconcile(self) -> int:
+        """
+        Lists the managed prefixes and queues every object that no row
+        references (a variant counts as referenced when any size of its set
+        is). Objects younger than MEDIA_GC_RECONCILE_MIN_AGE_HOURS are
+        skipped: they may belong to uploads whose post isn't created yet.
+        """
+        referenced = await self._referenced_keys()
+        live_sets = set(filter(None, map(variant_set, referenced)))
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.MEDIA_GC_RECONCILE_MIN_AGE_HOURS)
+        found = 0
+        batch: List[str] = []
+
+        async def flush():
+            async with AsyncSessionLocal() as db:
+                await mark_orphaned(db, batch, "reconcile")
+                await db.commit()
+            batch.clear()
+
+        for prefix in MANAGED_PREFIXES:
+            async for key, last_modified in storage.list_objects(prefix):
+                if last_modified >= cutoff or key in referenced or variant_set(key) in live_sets:
+                    continue
+                batch.append(key)
+                found += 1
+                if len(batch) >= DELETE_BATCH:
+                    await flush()
+        if batch:
+            await flush()
+        logger.info(f"🧹 Media reconciliation queued {found} unreferenced objects")
+        return found
+
+    # --- Scheduling ---
+
+    async def run_once(self):
+        redis = get_redis()
+        # Only one worker per interval, and one reconciliation per reconcile interval
+        if not await redis.set("media_gc:lock", "1", ex=settings.MEDIA_GC_INTERVAL_SECONDS, nx=True):
+            return
+        if await redis.set("media_gc:reconciled", "1",
+                           ex=settings.MEDIA_GC_RECONCILE_INTERVAL_HOURS * 3600, nx=True):
+            await self.reconcile()
+        await self.collect()
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(settings.MEDIA_GC_INTERVAL_SECONDS)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Media GC run failed: {e}")
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Single global instance; the periodic loop is started by the lifespan
+media_gc = MediaGC()
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from common.database import Base
+
+class OrphanedMedia(Base):
+    """Bucket objects no longer referenced by any row, waiting to be deleted."""
+    __tablename__ = "media_gc_queue"
+
+    id = Column(Integer, primary_key=True)
+    object_key = Column(String(512), unique=True, nullable=False)
+    reason = Column(String(50)) # 'avatar_replaced', 'avatar_processed', 'reconcile', ...
+    attempts = Column(Integer, nullable=False, default=0)
+    # Grace period: nothing is deleted before this time
+    delete_after = Column(DateTime, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index('idx_media_gc_delete_after', 'delete_after'),)
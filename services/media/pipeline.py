@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update
+
+from common.config import settings
+from common.database import AsyncSessionLocal
+from common.storage import storage, key_from_url, public_url
+from services.profiles.models import Profile
+from services.social.models import Post
+from .gc import mark_orphaned
+
+logger = logging.getLogger("uvicorn")
+
+# Longest side in pixels for each variant (never upscaled)
+POST_VARIANTS = {"thumb": 320, "medium": 720, "large": 1280}
+AVATAR_VARIANTS = {"thumb": 96, "medium": 320}
+VARIANT_CONTENT_TYPE = "image/webp"
+# Variants are content-addressed, so their URLs never change meaning
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# ffmpeg demuxer per uploaded video extension (see media_router.ALLOWED_TYPES)
+VIDEO_DEMUXERS = {".mp4": "mov", ".mov": "mov", ".qt": "mov", ".webm": "matroska"}
+
+
+# --- CPU work (runs in the process pool; must stay picklable, no app state) ---
+
+def render_variants(source: bytes, sizes: Dict[str, int]) -> Dict[str, bytes]:
+    """Decodes an image once and encodes a WebP per size."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(source)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        outputs = {}
+        # Largest first, so each smaller variant is resized from the previous one
+        for name, max_side in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP", quality=80, method=4)
+            outputs[name] = buffer.getvalue()
+        return outputs
+
+
+def extract_poster_frame(video_url: str, demuxer: str, at_seconds: float = 1.0) -> bytes:
+    """
+    One PNG frame from a (presigned) video URL. ffmpeg seeks with HTTP
+    range requests, so only a small part of the video is downloaded.
+
+    The upload is untrusted: the demuxer is forced (no playlist/concat
+    formats that reference other URLs or local files) and only the
+    protocols needed to fetch our own URL are allowed.
+    """
+    protocols = "https,tls,tcp" if video_url.startswith("https://") else "http,tcp"
+    for offset in (at_seconds, 0.0):
+        result = subprocess.run(
+            ["ffmpeg", "-v", "error", "-protocol_whitelist", protocols, "-f", demuxer,
+             "-ss", str(offset), "-i", video_url,
+             "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "-"],
+            capture_output=True, timeout=120
+        )
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    raise RuntimeError(f"ffmpeg could not extract a frame: {result.stderr.decode(errors='ignore')[:200]}")
+
+
+def poster_variants(video_url: str, demuxer: str, sizes: Dict[str, int]) -> Tuple[bytes, Dict[str, bytes]]:
+    frame = extract_poster_frame(video_url, demuxer)
+    return frame, render_variants(frame, sizes)
+
+
+# --- Orchestration (event loop side) ---
+
+class MediaPipeline:
+    """
+    Produces resized WebP variants for uploaded images and a poster frame
+    (plus variants) for videos, off the request path.
+
+    Decoding, resizing and ffmpeg run in a process pool so they neither
+    block the event loop nor contend for the GIL. Pool workers are spawned,
+    not forked: forking the threaded server process can copy locks held
+    by other threads. Variants are stored at
+    media/variants/<sha256>/<pixels>.webp, hashed over the source image
+    (or the poster frame for videos): an upload whose bytes were already
+    processed is detected with one HEAD request and
+    nothing is rendered or stored again.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    @staticmethod
+    def check_tools() -> bool:
+        """Logs loudly at startup if video posters can't be made (ffmpeg missing)."""
+        if shutil.which("ffmpeg") is None:
+            logger.error("ffmpeg not found on PATH: video and reel poster jobs will fail")
+            return False
+        return True
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+
+    @staticmethod
+    def variant_key(digest: str, max_side: int) -> str:
+        # Keyed by pixel size, so avatar and post variant sets share identical renders
+        return f"media/variants/{digest}/{max_side}.webp"
+
+    async def _store_variants(self, digest: str, variants: Dict[str, bytes], sizes: Dict[str, int], marker: str):
+        """Uploads every variant; `marker` goes last so its presence means the set is complete."""
+        async def put(name: str):
+            await storage.put_object(
+                self.variant_key(digest, sizes[name]), variants[name], VARIANT_CONTENT_TYPE, VARIANT_CACHE_CONTROL
+            )
+        await asyncio.gather(*(put(name) for name in variants if name != marker))
+        await put(marker)
+
+    def _urls(self, digest: str, sizes: Dict[str, int]) -> Dict[str, str]:
+        return {name: public_url(self.variant_key(digest, max_side)) for name, max_side in sizes.items()}
+
+    async def image_variants(self, source_key: str, sizes: Dict[str, int]) -> Dict[str, str]:
+        """Variant name -> public URL for an uploaded image."""
+        source = await storage.get_object_bytes(source_key, settings.MEDIA_MAX_IMAGE_BYTES)
+        digest = hashlib.sha256(source).hexdigest()
+
+        # Identical bytes were processed before: reuse the stored variants
+        marker = min(sizes, key=sizes.get)
+        if not await storage.exists(self.variant_key(digest, sizes[marker])):
+            await self._store_variants(digest, await self._run(render_variants, source, sizes), sizes, marker)
+        return self._urls(digest, sizes)
+
+    async def video_poster_variants(self, source_key: str, sizes: Dict[str, int]) -> Dict[str, str]:
+        """Variant name -> public URL for a poster frame of an uploaded video."""
+        demuxer = VIDEO_DEMUXERS.get(os.path.splitext(source_key)[1].lower())
+        if demuxer is None:
+            raise ValueError(f"Unsupported video container: {source_key}")
+        video_url = storage.presign("GET", source_key, 900)
+        frame, variants = await self._run(poster_variants, video_url, demuxer, sizes)
+        digest = hashlib.sha256(frame).hexdigest()
+        marker = min(sizes, key=sizes.get)
+        if not await storage.exists(self.variant_key(digest, sizes[marker])):
+            await self._store_variants(digest, variants, sizes, marker)
+        return self._urls(digest, sizes)
+
+    # --- Row updates ---
+
+    async def process_post(self, post_id: int, media_url: str, is_video: bool):
+        source_key = key_from_url(media_url)
+        if source_key is None:
+            logger.info(f"Post {post_id} media is not in our bucket, skipping processing")
+            return
+
+        if is_video:
+            urls = await self.video_poster_variants(source_key, POST_VARIANTS)
+        else:
+            urls = await self.image_variants(source_key, POST_VARIANTS)
+
+        # Only fill in the thumbnail if the post still points at the processed media
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Post)
+                .where((Post.id == post_id) & (Post.media_url == media_url))
+                .values(thumbnail_url=urls["thumb"], media_variants=urls)
+            )
+            await session.commit()
+
+    async def process_avatar(self, user_id: int, avatar_url: str):
+        source_key = key_from_url(avatar_url)
+        if source_key is None:
+            return
+
+        urls = await self.image_variants(source_key, AVATAR_VARIANTS)
+
+        # Skip if the user uploaded another picture in the meantime
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(Profile)
+                .where((Profile.user_id == user_id) & (Profile.avatar_url == avatar_url))
+                .values(avatar_url=urls["medium"], avatar_variants=urls)
+            )
+            # The full-size original is no longer served
+            if result.rowcount and urls["medium"] != avatar_url:
+                await mark_orphaned(session, [avatar_url], "avatar_processed")
+            await session.commit()
+
+
+# Single global instance; the process pool starts on first use
+media_pipeline = MediaPipeline(workers=settings.MEDIA_PROCESS_WORKERS)
@@ -0,0 +1,29 @@
+from common.jobs import job_queue
+from services.social.models import ContentType
+from .pipeline import media_pipeline
+
+PROCESS_POST_JOB = "media.process_post"
+PROCESS_AVATAR_JOB = "media.process_avatar"
+
+
+async def enqueue_post_processing(post_id: int, media_url: str, content_type: ContentType):
+    if content_type in (ContentType.image, ContentType.video, ContentType.reel) and media_url:
+        await job_queue.enqueue(PROCESS_POST_JOB, {
+            "post_id": post_id,
+            "media_url": media_url,
+            "is_video": content_type != ContentType.image,
+        })
+
+
+async def enqueue_avatar_processing(user_id: int, avatar_url: str):
+    await job_queue.enqueue(PROCESS_AVATAR_JOB, {"user_id": user_id, "avatar_url": avatar_url})
+
+
+@job_queue.task(PROCESS_POST_JOB)
+async def process_post(payload: dict):
+    await media_pipeline.process_post(payload["post_id"], payload["media_url"], payload["is_video"])
+
+
+@job_queue.task(PROCESS_AVATAR_JOB)
+async def process_avatar(payload: dict):
+    await media_pipeline.process_avatar(payload["user_id"], payload["avatar_url"])
@@ -0,0 +1,25 @@
+import asyncio
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.websocket import manager
+from .models import Notification
+
+
+async def insert_notifications(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """Stages many notifications with a single multi-row INSERT (caller commits)."""
+    if rows:
+        await db.execute(insert(Notification), rows)
+
+
+async def push_notifications(rows: List[Dict[str, Any]]):
+    """Pushes notifications to every recipient that is online, concurrently."""
+    tasks = [
+        manager.send_personal_message({"type": "NOTIFICATION", "data": row}, row["recipient_id"])
+        for row in rows
+        if manager.is_user_online(row["recipient_id"])
+    ]
+    if tasks:
+        await asyncio.gather(*tasks)
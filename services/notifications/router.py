@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, update
 from typing import List
 
-from common.database import get_db
+from common.database import get_db, get_read_db
 from common.deps import get_current_user
 from services.auth.models import User
 from .models import Notification
@@ -13,7 +13,7 @@ router = APIRouter(prefix="/notifications", tags=["Notifications"])
 @router.get("/")
 async def get_my_notifications(
     current_user: User = Depends(get_current_user), 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Fetch the latest 50 notifications for the logged-in user."""
     query = select(Notification).where(
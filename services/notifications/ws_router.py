@@ -1,6 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
 from common.websocket import manager
-from common.security import decode_access_token # Verify this helper exists in your security.py
+from common.auth_cache import principal_cache
 import logging
 
 logger = logging.getLogger("uvicorn")
@@ -15,18 +15,16 @@ async def websocket_endpoint(
     The main entry point for real-time communication.
     Authenticates the user via token and maintains a persistent connection.
     """
-    # 1. Decode and Validate Token
+    # 1. Decode and Validate Token (cached, shared with the HTTP dependency)
     try:
-        payload = decode_access_token(token)
-        # Extract user_id from the 'sub' claim (usually stored as a string in JWT)
-        user_id_str = payload.get("sub")
+        principal = await principal_cache.resolve(token)
         
-        if not user_id_str:
-            logger.warning("WebSocket connection rejected: Missing subject in token.")
+        if not principal:
+            logger.warning("WebSocket connection rejected: Invalid token or unknown user.")
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
             
-        user_id = int(user_id_str)
+        user_id = principal.id
         
     except Exception as e:
         logger.error(f"WebSocket Auth Failed: {e}")
@@ -1,24 +1,230 @@
-from fastapi import APIRouter, Depends
-from common.storage import generate_upload_url
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Header, Path, Query, Request
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from common.config import settings
+from common.database import get_db
+from common.deps import get_current_user
+from common.storage import storage, public_url, UploadTooLarge
+from services.auth.models import User
+from services.chat.models import Message
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+import base64
+import binascii
+import hashlib
+import mimetypes
 import uuid
 
 router = APIRouter(prefix="/media", tags=["Media"])
 
+ALLOWED_TYPES = {
+    "image/jpeg", "image/png", "image/webp", "image/gif", "image/heic",
+    "video/mp4", "video/quicktime", "video/webm",
+}
+# Objects under these folders are never served from the public domain
+PRIVATE_FOLDERS = ("chat/",)
+
 class UploadRequest(BaseModel):
     file_type: str # e.g., "image/jpeg"
+    folder: Literal["avatars", "posts", "chat"] = "avatars"
 
-@router.post("/request-upload")
-async def get_upload_link(request: UploadRequest):
-    # Generate a unique filename
-    file_id = f"avatars/{uuid.uuid4()}.jpg"
-    
-    upload_url = generate_upload_url(file_id, request.file_type)
-    
-    # This is the URL the user will see later
-    public_url = f"https://cdn.meixup.com/{file_id}" 
-    
+class BatchUploadRequest(BaseModel):
+    files: List[UploadRequest] = Field(..., min_length=1)
+
+class ReadUrlRequest(BaseModel):
+    keys: List[str] = Field(..., min_length=1, max_length=100)
+
+class MultipartInit(BaseModel):
+    file_type: str
+    folder: Literal["posts", "chat"] = "posts"
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=10_000)
+    etag: str
+
+class MultipartComplete(BaseModel):
+    key: str
+    parts: List[CompletedPart] = Field(..., min_length=1)
+
+# --- HELPERS ---
+
+def new_media_key(file_type: str, folder: str, user_id: int) -> str:
+    if file_type not in ALLOWED_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_type}")
+    # Generate a unique filename (user id in the path keeps each user's media together)
+    extension = mimetypes.guess_extension(file_type) or ""
+    return f"{folder}/{user_id}/{uuid.uuid4()}{extension}"
+
+def ensure_owner(key: str, user_id: int):
+    parts = key.split("/")
+    if len(parts) != 3 or parts[1] != str(user_id) or ".." in key:
+        raise HTTPException(status_code=403, detail="Not your upload")
+
+def build_upload(request: UploadRequest, user_id: int) -> dict:
+    file_id = new_media_key(request.file_type, request.folder, user_id)
+
+    # Signed locally: no storage client or network call involved
+    upload_url = storage.presign(
+        "PUT", file_id, settings.MEDIA_UPLOAD_URL_EXPIRES,
+        headers={"Content-Type": request.file_type}
+    )
     return {
         "upload_url": upload_url,
-        "public_url": public_url
-    }
\ No newline at end of file
+        "key": file_id,
+        "content_type": request.file_type,
+        "public_url": None if file_id.startswith(PRIVATE_FOLDERS) else public_url(file_id)
+    }
+
+# --- ENDPOINTS ---
+
+@router.post("/request-upload")
+async def get_upload_link(request: UploadRequest, current_user: User = Depends(get_current_user)):
+    """Presigned PUT URL for one file (the client uploads straight to R2)."""
+    return build_upload(request, current_user.id)
+
+@router.post("/request-uploads")
+async def get_upload_links(request: BatchUploadRequest, current_user: User = Depends(get_current_user)):
+    """Presigned PUT URLs for several files at once (e.g. a carousel post)."""
+    if len(request.files) > settings.MEDIA_MAX_BATCH_UPLOADS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MEDIA_MAX_BATCH_UPLOADS} files per request")
+    return {"uploads": [build_upload(item, current_user.id) for item in request.files]}
+
+async def shared_with(db: AsyncSession, keys: List[str], user_id: int) -> set:
+    """Keys attached to a chat message the user sent or received (stored as key or URL)."""
+    by_reference = {ref: key for key in keys for ref in (key, public_url(key))}
+    rows = await db.execute(
+        select(Message.media_url).where(
+            Message.media_url.in_(list(by_reference)),
+            or_(Message.sender_id == user_id, Message.recipient_id == user_id)
+        ).distinct()
+    )
+    return {by_reference[ref] for ref in rows.scalars().all()}
+
+@router.post("/read-urls")
+async def get_read_links(
+    request: ReadUrlRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Signed GET URLs for private media (cached until shortly before they
+    expire). Only for the uploader, or a participant of a conversation
+    where the object was sent.
+    """
+    for key in request.keys:
+        if not key.startswith(PRIVATE_FOLDERS) or ".." in key or len(key.split("/")) != 3:
+            raise HTTPException(status_code=400, detail=f"Not a private media key: {key}")
+
+    # Own uploads are recognised from the key; the rest need a message that shares them
+    others = [key for key in set(request.keys) if key.split("/")[1] != str(current_user.id)]
+    if others:
+        denied = set(others) - await shared_with(db, others, current_user.id)
+        if denied:
+            raise HTTPException(status_code=403, detail=f"Not allowed to read: {sorted(denied)[0]}")
+    return {key: storage.signed_read_url(key) for key in request.keys}
+
+# --- Multipart uploads (videos / reels) ---
+# Parts can be sent through the API (PUT .../parts/{n}) or straight to R2 with a
+# presigned part URL; either way a failed part is simply retried, and
+# GET .../parts tells a resuming client what is already stored.
+
+@router.post("/multipart")
+async def initiate_multipart(request: MultipartInit, current_user: User = Depends(get_current_user)):
+    key = new_media_key(request.file_type, request.folder, current_user.id)
+    upload_id = await storage.create_multipart_upload(key, request.file_type)
+    return {"key": key, "upload_id": upload_id, "part_size": settings.MEDIA_MULTIPART_PART_SIZE}
+
+@router.put("/multipart/{upload_id}/parts/{part_number}")
+async def upload_multipart_part(
+    request: Request,
+    upload_id: str,
+    part_number: int = Path(..., ge=1, le=10_000),
+    key: str = Query(...),
+    content_md5: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Uploads one part from the raw request body; Content-MD5 (base64) is verified if sent."""
+    ensure_owner(key, current_user.id)
+
+    digest = hashlib.md5()
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > settings.MEDIA_MULTIPART_PART_SIZE:
+            raise HTTPException(status_code=413, detail="Part larger than the negotiated part size")
+        digest.update(chunk)
+        body += chunk
+
+    computed_md5 = base64.b64encode(digest.digest()).decode()
+    if content_md5 is not None:
+        try:
+            matches = base64.b64decode(content_md5, validate=True) == digest.digest()
+        except binascii.Error:
+            matches = False
+        if not matches:
+            raise HTTPException(status_code=400, detail="Content-MD5 mismatch")
+
+    etag = await storage.upload_part(key, upload_id, part_number, bytes(body), content_md5=computed_md5)
+    return {"part_number": part_number, "etag": etag}
+
+@router.get("/multipart/{upload_id}/parts/{part_number}/url")
+async def presign_multipart_part(
+    upload_id: str,
+    part_number: int = Path(..., ge=1, le=10_000),
+    key: str = Query(...),
+    content_md5: Optional[str] = Query(None, description="If given, R2 verifies the part against it"),
+    current_user: User = Depends(get_current_user)
+):
+    ensure_owner(key, current_user.id)
+    return {"url": storage.presign_upload_part(key, upload_id, part_number, content_md5)}
+
+@router.get("/multipart/{upload_id}/parts")
+async def list_multipart_parts(upload_id: str, key: str = Query(...), current_user: User = Depends(get_current_user)):
+    ensure_owner(key, current_user.id)
+    return {"parts": await storage.list_parts(key, upload_id)}
+
+@router.post("/multipart/{upload_id}/complete")
+async def complete_multipart(upload_id: str, request: MultipartComplete, current_user: User = Depends(get_current_user)):
+    ensure_owner(request.key, current_user.id)
+    await storage.complete_multipart_upload(
+        request.key, upload_id, [(part.part_number, part.etag) for part in request.parts]
+    )
+    return {
+        "key": request.key,
+        "public_url": None if request.key.startswith(PRIVATE_FOLDERS) else public_url(request.key)
+    }
+
+@router.delete("/multipart/{upload_id}")
+async def abort_multipart(upload_id: str, key: str = Query(...), current_user: User = Depends(get_current_user)):
+    ensure_owner(key, current_user.id)
+    await storage.abort_multipart_upload(key, upload_id)
+    return {"msg": "Upload aborted"}
+
+@router.post("/stream")
+async def stream_upload(
+    request: Request,
+    file_type: str = Query(...),
+    folder: Literal["posts", "chat"] = Query("posts"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Single-request upload of a large file: the body is streamed into a
+    parallel multipart upload without ever being held in memory whole.
+    Bodies over MEDIA_MAX_STREAM_BYTES get a 413 and the upload is aborted.
+    """
+    limit = settings.MEDIA_MAX_STREAM_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Uploads are limited to {limit} bytes")
+    # Refuse a declared oversize body before opening a multipart upload
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise too_large
+
+    key = new_media_key(file_type, folder, current_user.id)
+    try:
+        size = await storage.upload_stream(key, request.stream(), file_type, max_bytes=limit)
+    except UploadTooLarge:
+        raise too_large
+    return {
+        "key": key,
+        "size": size,
+        "public_url": None if key.startswith(PRIVATE_FOLDERS) else public_url(key)
+    }
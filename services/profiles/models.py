@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Enum, Date, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Text, Enum, Date, ForeignKey, Numeric, Index, JSON
 from common.database import Base
 import enum
 
@@ -18,6 +18,13 @@ class Profile(Base):
     gender = Column(Enum(Gender))
     dob = Column(Date)
     avatar_url = Column(String(255))
+    # Resized WebP renditions of the avatar, variant name -> URL
+    avatar_variants = Column(JSON)
     # Change Decimal(10, 8) to Numeric(10, 8)
     location_lat = Column(Numeric(10, 8))
     location_long = Column(Numeric(11, 8))
+
+    # FULLTEXT index used by user search (services/search/logic.py)
+    __table_args__ = (
+        Index('idx_search_profile', 'username', 'full_name', mysql_prefix='FULLTEXT'),
+    )
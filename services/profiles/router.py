@@ -4,10 +4,15 @@ from sqlalchemy import select
 from typing import Optional
 from datetime import date
 
-from common.database import get_db
+from common.database import get_db, get_read_db
 from common.deps import get_current_user
 from common.storage import storage  # Our new storage utility
 from services.auth.models import User
+from services.search.logic import search_profiles
+from services.search.typeahead import typeahead_index
+from services.search.cache import search_cache
+from services.media.tasks import enqueue_avatar_processing
+from services.media.gc import mark_orphaned
 from .models import Profile
 
 router = APIRouter(prefix="/profiles", tags=["Profiles"])
@@ -28,9 +33,13 @@ async def update_my_profile(
     profile = result.scalar_one_or_none()
 
     # 2. Handle Profile Picture Upload to Cloudflare R2
-    avatar_url = profile.profile_picture_url if profile else None
+    avatar_url = profile.avatar_url if profile else None
     if profile_picture:
         avatar_url = await storage.upload_file_direct(profile_picture, folder="avatars")
+        # The previous picture is deleted by the media GC after its grace period
+        if profile and (profile.avatar_url or profile.avatar_variants):
+            old_variants = list((profile.avatar_variants or {}).values())
+            await mark_orphaned(db, [profile.avatar_url, *old_variants], "avatar_replaced")
 
     # 3. Create or Update logic
     if not profile:
@@ -41,7 +50,7 @@ async def update_my_profile(
             bio=bio,
             gender=gender,
             dob=dob,
-            profile_picture_url=avatar_url
+            avatar_url=avatar_url
         )
         db.add(profile)
     else:
@@ -50,9 +59,17 @@ async def update_my_profile(
         profile.bio = bio
         profile.gender = gender
         profile.dob = dob
-        profile.profile_picture_url = avatar_url
+        profile.avatar_url = avatar_url
+        if profile_picture:
+            # Renditions of the old picture; the pipeline fills in the new ones
+            profile.avatar_variants = None
     
     await db.commit()
+    typeahead_index.upsert(current_user.id, profile.username, profile.full_name)
+    search_cache.invalidate("users")
+    if profile_picture:
+        # Resized variants replace the original once they are ready
+        await enqueue_avatar_processing(current_user.id, avatar_url)
     return {
         "message": "Profile updated successfully", 
         "profile_picture": avatar_url,
@@ -74,12 +91,7 @@ async def get_my_profile(
 async def search_users(
     query: str, 
     limit: int = 10, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Searches for users by their full name or email (case-insensitive)."""
-    search_query = select(Profile).where(
-        Profile.full_name.ilike(f"%{query}%")
-    ).limit(limit)
-    
-    result = await db.execute(search_query)
-    return result.scalars().all()
\ No newline at end of file
+    """Searches for users by username or full name (see /search/users)."""
+    return await search_profiles(db, query, limit=limit)
\ No newline at end of file
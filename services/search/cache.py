@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from common.config import settings
+from .logic import normalize_text
+from .post_index import tokenize
+
+CacheKey = Tuple[str, int, str, Tuple]
+
+_MISS = object()
+
+
+class SearchCache:
+    """
+    LRU + TTL cache for search responses.
+
+    Keys are built from the normalized query ("  ZOË " and "zoe" share an
+    entry) plus the paging parameters. Invalidation comes in two forms:
+    - invalidate(namespace) bumps the namespace generation, so every older
+      entry misses (used when any profile changes, since FULLTEXT prefix
+      matches can't be mapped back to specific queries);
+    - invalidate(namespace, terms) drops only entries whose query shares a
+      term with the changed document (used for new posts).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._by_term: Dict[Tuple[str, str], Set[CacheKey]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _key(self, namespace: str, query: str, params: Dict[str, Hashable]) -> CacheKey:
+        return (
+            namespace,
+            self._generations.get(namespace, 0),
+            normalize_text(query),
+            tuple(sorted(params.items())),
+        )
+
+    def _drop(self, key: CacheKey):
+        self._entries.pop(key, None)
+        namespace, _, query, _ = key
+        for term in tokenize(query):
+            keys = self._by_term.get((namespace, term))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_term[(namespace, term)]
+
+    def get(self, namespace: str, query: str, **params) -> Any:
+        """Returns the cached value, or the module-level miss sentinel."""
+        key = self._key(namespace, query, params)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISS
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return _MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, namespace: str, query: str, value: Any, **params):
+        key = self._key(namespace, query, params)
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        for term in tokenize(key[2]):
+            self._by_term.setdefault((namespace, term), set()).add(key)
+
+        # Evict from the least recently used end
+        now = time.monotonic()
+        while len(self._entries) > self.max_entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            self._drop(oldest_key)
+            if expires_at <= now:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    def invalidate(self, namespace: str, terms: Optional[Iterable[str]] = None):
+        self.invalidations += 1
+        if terms is None:
+            # Older generations can never be looked up again; LRU/TTL reclaims them
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            return
+        for term in set(terms):
+            for key in list(self._by_term.get((namespace, term), ())):
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def is_miss(value: Any) -> bool:
+    return value is _MISS
+
+
+# Single global instance in front of the user and post search routes
+search_cache = SearchCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,87 @@
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.auth.models import User
+from services.profiles.models import Profile
+
+# InnoDB ignores FULLTEXT tokens shorter than innodb_ft_min_token_size (default 3)
+MIN_FULLTEXT_LEN = 3
+
+# Characters with special meaning in BOOLEAN MODE
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def normalize_text(value: str) -> str:
+    """Case-folds, strips accents and collapses whitespace ("  Zoë " -> "zoe")."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+def escape_like(value: str) -> str:
+    """Escapes LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def to_boolean_query(q: str) -> str:
+    """Turns free text into '+term1* +term2*' so every word must prefix-match."""
+    terms = _BOOLEAN_OPERATORS.sub(" ", q).split()
+    return " ".join(f"+{term}*" for term in terms if len(term) >= MIN_FULLTEXT_LEN)
+
+
+async def search_profiles(
+    db: AsyncSession, q: str, limit: int = 20, offset: int = 0, match_email: bool = False
+) -> List[Profile]:
+    """
+    Single entry point for user search.
+    - With `match_email` (authenticated callers only), an email address is
+      an exact match on the unique index on users.email. Without it, public
+      search can't be used to find out whether an address has an account.
+    - "@handle" queries and short queries take the prefix fast path on the
+      profiles.username index.
+    - Everything else is a relevance-ranked MATCH ... AGAINST on the
+      idx_search_profile FULLTEXT index over (username, full_name).
+    """
+    q = q.strip()
+    if match_email and _EMAIL.match(q):
+        query = (
+            select(Profile)
+            .join(User, Profile.user_id == User.id)
+            .where(User.email == q)
+        )
+    else:
+        handle = q.startswith("@")
+        q = q.lstrip("@").strip()
+        if not q:
+            return []
+
+        boolean_q = "" if handle else to_boolean_query(q)
+        if not boolean_q:
+            # 1. Prefix fast path (LIKE 'q%' can use the username index)
+            query = (
+                select(Profile)
+                .where(Profile.username.like(escape_like(q) + "%", escape="\\"))
+                .order_by(Profile.username)
+            )
+        else:
+            # 2. FULLTEXT relevance ranking
+            relevance = match(Profile.username, Profile.full_name, against=boolean_q).in_boolean_mode()
+            query = (
+                select(Profile)
+                .where(relevance > 0)
+                .order_by(relevance.desc(), Profile.user_id)
+            )
+
+    result = await db.execute(query.offset(offset).limit(limit))
+    return result.scalars().all()
+
+
+def profile_to_dict(profile: Profile) -> Dict[str, Any]:
+    """Plain-dict copy of a profile row, safe to keep after the session closes."""
+    return {column.name: getattr(profile, column.name) for column in Profile.__table__.columns}
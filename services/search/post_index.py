@@ -0,0 +1,268 @@
+import bisect
+import logging
+import math
+import os
+import pickle
+import re
+import tempfile
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.social.models import Post
+from .logic import normalize_text
+
+logger = logging.getLogger("uvicorn")
+
+_TOKEN_RE = re.compile(r"\w+")
+_HASHTAG_RE = re.compile(r"#(\w+)")
+_SNAPSHOT_VERSION = 1
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+class PostSearchIndex:
+    """
+    Inverted index over post captions with BM25 ranking.
+
+    Each indexed post gets a dense document number. A term's postings are
+    two parallel arrays (document numbers, term frequencies); document
+    numbers are handed out in order, so appends keep every postings list
+    sorted. Scoring a query touches only the postings of its terms.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._reset()
+
+    def _reset(self):
+        self._post_ids = array("q")      # doc number -> post id
+        self._doc_lens = array("I")      # doc number -> token count
+        self._doc_of: Dict[int, int] = {}  # post id -> doc number
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._deleted: set = set()
+        self._total_len = 0
+        self.max_post_id = 0
+        # Hashtag -> number of posts using it, plus a sorted list for prefix lookups
+        self._hashtags: Dict[str, int] = {}
+        self._hashtag_keys: List[str] = []
+
+    def __len__(self):
+        return len(self._post_ids) - len(self._deleted)
+
+    # --- Incremental updates ---
+
+    def add(self, post_id: int, caption: Optional[str]):
+        doc = self._doc_of.get(post_id)
+        # A tombstoned post (e.g. made public again) gets a fresh document
+        if doc is not None and doc not in self._deleted:
+            return
+        tokens = tokenize(caption)
+        doc = len(self._post_ids)
+        self._post_ids.append(post_id)
+        self._doc_lens.append(len(tokens))
+        self._doc_of[post_id] = doc
+        self._total_len += len(tokens)
+        self.max_post_id = max(self.max_post_id, post_id)
+
+        freqs: Dict[str, int] = {}
+        for token in tokens:
+            freqs[token] = freqs.get(token, 0) + 1
+        for term, tf in freqs.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(doc)
+            postings[1].append(min(tf, 0xFFFF))
+
+        for tag in set(_HASHTAG_RE.findall(normalize_text(caption or ""))):
+            if tag not in self._hashtags:
+                bisect.insort(self._hashtag_keys, tag)
+                self._hashtags[tag] = 0
+            self._hashtags[tag] += 1
+
+    def remove(self, post_id: int):
+        """Tombstones a post; its postings are skipped at query time."""
+        doc = self._doc_of.get(post_id)
+        if doc is not None:
+            self._deleted.add(doc)
+
+    # --- Queries ---
+
+    def search(self, query: str, offset: int = 0, limit: int = 10) -> Tuple[int, List[Tuple[int, float]]]:
+        """Returns (total_hits, [(post_id, score), ...]) for one page, best first."""
+        terms = set(tokenize(query))
+        num_docs = len(self._post_ids)
+        if not terms or not num_docs:
+            return 0, []
+
+        avg_len = self._total_len / num_docs or 1.0
+        doc_lens = np.frombuffer(self._doc_lens, dtype=np.uint32)
+
+        # Score only the postings of the query terms, then sum per document
+        matched, partial = [], []
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            docs = np.frombuffer(postings[0], dtype=np.uint32)
+            tfs = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float64)
+            df = len(docs)
+            idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * doc_lens[docs] / avg_len)
+            matched.append(docs.astype(np.int64))
+            partial.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+        if not matched:
+            return 0, []
+        hits, inverse = np.unique(np.concatenate(matched), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(partial))
+
+        if self._deleted:
+            alive = ~np.isin(hits, np.fromiter(self._deleted, dtype=np.int64))
+            hits, scores = hits[alive], scores[alive]
+
+        total = len(hits)
+        if offset >= total:
+            return total, []
+
+        # Best first; newer posts (higher doc numbers) win ties
+        order = np.lexsort((-hits, -scores))[offset:offset + limit]
+        return total, [(self._post_ids[int(hits[i])], float(scores[i])) for i in order]
+
+    def search_hashtags(self, prefix: str, limit: int = 10, max_scan: int = 1000) -> List[Dict[str, int]]:
+        """Most used hashtags starting with `prefix` (a leading '#' is ignored)."""
+        prefix = normalize_text(prefix).lstrip("#")
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._hashtag_keys, prefix)
+        matches = []
+        for tag in self._hashtag_keys[start:start + max_scan]:
+            if not tag.startswith(prefix):
+                break
+            matches.append(tag)
+        matches.sort(key=lambda tag: -self._hashtags[tag])
+        return [{"tag": tag, "post_count": self._hashtags[tag]} for tag in matches[:limit]]
+
+    # --- Persistence ---
+
+    def snapshot(self, path: str):
+        """Writes the index to disk atomically (temp file + rename)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        state = {
+            "version": _SNAPSHOT_VERSION,
+            "post_ids": self._post_ids.tobytes(),
+            "doc_lens": self._doc_lens.tobytes(),
+            "deleted": sorted(self._deleted),
+            "hashtags": self._hashtags,
+            "postings": {t: (d.tobytes(), f.tobytes()) for t, (d, f) in self._postings.items()},
+        }
+        # Unique temp name: several workers may snapshot to the same path at shutdown
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def restore(self, path: str) -> bool:
+        """Loads a snapshot; on any problem the index is left empty and False returned."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as fh:
+                state = pickle.load(fh)
+            if state.get("version") != _SNAPSHOT_VERSION:
+                logger.warning("Post index snapshot version mismatch, ignoring it")
+                return False
+            self._load_state(state)
+        except Exception as e:
+            logger.error(f"Post index snapshot {path} is unreadable, rebuilding from the database: {e}")
+            self._reset()
+            return False
+        return True
+
+    def _load_state(self, state: dict):
+        self._post_ids = array("q", state["post_ids"])
+        self._doc_lens = array("I", state["doc_lens"])
+        self._doc_of = {pid: doc for doc, pid in enumerate(self._post_ids)}
+        self._deleted = set(state["deleted"])
+        self._total_len = sum(self._doc_lens)
+        self.max_post_id = max(self._post_ids, default=0)
+        self._hashtags = dict(state.get("hashtags", {}))
+        self._hashtag_keys = sorted(self._hashtags)
+        self._postings = {}
+        for term, (docs, tfs) in state["postings"].items():
+            self._postings[term] = (array("I", docs), array("H", tfs))
+        if len(self._doc_lens) != len(self._post_ids):
+            raise ValueError("document arrays have different lengths")
+
+    async def _index_where(self, db: AsyncSession, condition, batch_size: int) -> int:
+        result = await db.stream(
+            select(Post.id, Post.caption)
+            .where(condition & (Post.is_public == True))
+            .order_by(Post.id)
+            .execution_options(yield_per=batch_size)
+        )
+        added = 0
+        async for rows in result.partitions(batch_size):
+            for post_id, caption in rows:
+                self.add(post_id, caption)
+                added += 1
+        return added
+
+    async def _reconcile(self, db: AsyncSession, up_to: int, batch_size: int) -> Tuple[int, int]:
+        """
+        Brings a restored snapshot in line with posts changed while the
+        process was down: tombstones posts deleted or made private, indexes
+        older posts made public. Reads ids only, no captions.
+        """
+        live = set()
+        result = await db.stream(
+            select(Post.id)
+            .where((Post.id <= up_to) & (Post.is_public == True))
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            live.update(row[0] for row in rows)
+
+        indexed = {pid for pid, doc in self._doc_of.items() if doc not in self._deleted}
+        for post_id in indexed - live:
+            self.remove(post_id)
+        missing = sorted(live - indexed)
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start:start + batch_size]
+            await self._index_where(db, Post.id.in_(chunk), batch_size)
+        return len(indexed - live), len(missing)
+
+    async def load(self, db: AsyncSession, snapshot_path: str, batch_size: int = 10_000):
+        """
+        Restores the last snapshot, reconciles it against the posts table
+        and indexes posts created since. Without a usable snapshot every
+        public post is indexed from scratch.
+        """
+        restored = self.restore(snapshot_path)
+        start_after = self.max_post_id
+        removed = revived = 0
+        if restored:
+            removed, revived = await self._reconcile(db, start_after, batch_size)
+        added = await self._index_where(db, Post.id > start_after, batch_size)
+        logger.info(
+            f"📝 Post index ready: {len(self)} posts "
+            f"({'snapshot + ' if restored else ''}{added} indexed at startup"
+            f"{f', {removed} removed, {revived} re-added since the snapshot' if restored else ''})"
+        )
+
+
+# Single global instance shared by the search and social endpoints
+post_index = PostSearchIndex()
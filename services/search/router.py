@@ -1,32 +1,138 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import logging
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, func
-from common.database import get_db
-from services.profiles.models import Profile
+from sqlalchemy import select
+from common.config import settings
+from common.database import get_read_db, read_session
+from common.deps import get_current_user
+from common.dataloader import RequestLoaders, get_loaders, hydrate_posts
+from services.auth.models import User
 from services.social.models import Post
-from typing import List
+from .logic import search_profiles, profile_to_dict
+from .typeahead import typeahead_index
+from .post_index import post_index
+from .cache import search_cache, is_miss
 
+logger = logging.getLogger("uvicorn")
 router = APIRouter(prefix="/search", tags=["Search"])
 
+# --- Search backends (shared by the per-entity routes and /search) ---
+
+async def find_users(db: AsyncSession, q: str, limit: int, offset: int = 0):
+    cached = search_cache.get("users", q, limit=limit, offset=offset)
+    if not is_miss(cached):
+        return cached
+
+    # Only reached from authenticated routes, so exact email lookups are allowed
+    profiles = await search_profiles(db, q, limit=limit, offset=offset, match_email=True)
+    results = [profile_to_dict(p) for p in profiles]
+    search_cache.set("users", q, results, limit=limit, offset=offset)
+    return results
+
+async def find_posts(db: AsyncSession, loaders: RequestLoaders, q: str, limit: int, offset: int = 0):
+    cached = search_cache.get("posts", q, limit=limit, offset=offset)
+    if not is_miss(cached):
+        return cached
+
+    total, hits = post_index.search(q, offset=offset, limit=limit)
+    posts = []
+    if hits:
+        ids = [post_id for post_id, _ in hits]
+        result = await db.execute(select(Post).where(Post.id.in_(ids) & (Post.is_public == True)))
+        by_id = {post.id: post for post in result.scalars().all()}
+        posts = [by_id[post_id] for post_id in ids if post_id in by_id]
+
+    response = {"total": total, "items": await hydrate_posts(posts, loaders)}
+    search_cache.set("posts", q, response, limit=limit, offset=offset)
+    return response
+
+# --- Endpoints ---
+
+@router.get("")
+async def search_everything(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(5, ge=1, le=20),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Users, posts and hashtags in one call. Each backend runs concurrently on
+    its own DB session with a time budget; a backend that misses the budget
+    is reported in `timed_out` (or `failed`), `partial` is set and the
+    others are still returned.
+    """
+    async def users():
+        async with read_session() as session:
+            return await find_users(session, q, limit)
+
+    async def posts():
+        async with read_session() as session:
+            return await find_posts(session, RequestLoaders(session), q, limit)
+
+    async def hashtags():
+        return post_index.search_hashtags(q, limit)
+
+    backends = {"users": users, "posts": posts, "hashtags": hashtags}
+    budget = settings.SEARCH_BACKEND_TIMEOUT_MS / 1000
+    results = await asyncio.gather(
+        *(asyncio.wait_for(run(), timeout=budget) for run in backends.values()),
+        return_exceptions=True
+    )
+
+    response = {"timed_out": [], "failed": []}
+    for name, result in zip(backends, results):
+        if isinstance(result, asyncio.TimeoutError):
+            response["timed_out"].append(name)
+            result = None
+        elif isinstance(result, Exception):
+            logger.error(f"Search backend '{name}' failed: {result}")
+            response["failed"].append(name)
+            result = None
+        response[name] = result
+    response["partial"] = bool(response["timed_out"] or response["failed"])
+    return response
+
 @router.get("/users")
-async def search_users(q: str, limit: int = 10, db: AsyncSession = Depends(get_db)):
-    """Search for users by username or full name"""
-    query = select(Profile).where(
-        or_(
-            Profile.username.ilike(f"%{q}%"),
-            Profile.full_name.ilike(f"%{q}%")
-        )
-    ).limit(limit)
-    
-    result = await db.execute(query)
-    return result.scalars().all()
+async def search_users(
+    q: str = Query(..., min_length=1, description="Search by username, name or exact email"),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Search for users by username or full name (relevance ranked)"""
+    return await find_users(db, q, limit, offset)
+
+@router.get("/typeahead")
+async def typeahead(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=25),
+    current_user: User = Depends(get_current_user)
+):
+    """Username/name autocomplete served from the in-memory prefix index"""
+    return typeahead_index.search(q, limit)
 
 @router.get("/posts")
-async def search_posts(q: str, limit: int = 10, db: AsyncSession = Depends(get_db)):
-    """Search for posts by caption keywords"""
-    query = select(Post).where(
-        Post.caption.ilike(f"%{q}%")
-    ).order_by(Post.created_at.desc()).limit(limit)
-    
-    result = await db.execute(query)
-    return result.scalars().all()
\ No newline at end of file
+async def search_posts(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
+    """Search for posts by caption keywords (BM25 ranked, in-memory index)"""
+    return await find_posts(db, loaders, q, limit, offset)
+
+@router.get("/hashtags")
+async def search_hashtags(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Most used hashtags starting with the query"""
+    return post_index.search_hashtags(q, limit)
+
+@router.get("/cache/stats")
+async def search_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit/miss counters for the search result cache"""
+    return search_cache.stats()
@@ -0,0 +1,156 @@
+import bisect
+import logging
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.config import settings
+from services.profiles.models import Profile
+from .logic import normalize_text
+
+logger = logging.getLogger("uvicorn")
+
+# Rough per-entry overhead on top of the key string: list slot + id slot
+_ENTRY_OVERHEAD = 16
+# Upper bound on entries examined per lookup, keeps very short prefixes cheap
+_MAX_SCAN = 2000
+
+
+def _index_keys(username: str, full_name: Optional[str]) -> List[str]:
+    """Username, full name and each later word of the name ("smith" in "john smith")."""
+    keys = {normalize_text(username)}
+    if full_name:
+        name = normalize_text(full_name)
+        keys.add(name)
+        words = name.split()
+        for i in range(1, len(words)):
+            keys.add(" ".join(words[i:]))
+    keys.discard("")
+    return sorted(keys)
+
+
+class TypeaheadIndex:
+    """
+    Prefix index over usernames and full names for autocomplete.
+    Keys live in one sorted list with a parallel array of user ids, so a
+    lookup is a binary search plus a short forward scan. Display data is
+    kept alongside so results don't need a DB round trip.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget = memory_budget_bytes
+        self._keys: List[str] = []
+        self._ids = array("q")
+        self._by_user: Dict[int, Tuple[List[str], str, Optional[str]]] = {}
+        self._bytes = 0
+        self._over_budget_logged = False
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    @staticmethod
+    def _cost(keys: List[str], username: str, full_name: Optional[str]) -> int:
+        display = sys.getsizeof(username) + (sys.getsizeof(full_name) if full_name else 0)
+        return sum(sys.getsizeof(k) + _ENTRY_OVERHEAD for k in keys) + display
+
+    def _fits(self, cost: int) -> bool:
+        if self._bytes + cost <= self.memory_budget:
+            return True
+        if not self._over_budget_logged:
+            logger.warning("⚠️ Typeahead index reached its memory budget; new names are not indexed")
+            self._over_budget_logged = True
+        return False
+
+    # --- Loading ---
+
+    async def load(self, db: AsyncSession, batch_size: int = 20_000):
+        """Streams every profile and builds the sorted arrays in one pass."""
+        entries: List[Tuple[str, int]] = []
+        self._by_user.clear()
+        self._bytes = 0
+        result = await db.stream(
+            select(Profile.user_id, Profile.username, Profile.full_name)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            for user_id, username, full_name in rows:
+                keys = _index_keys(username, full_name)
+                cost = self._cost(keys, username, full_name)
+                if not self._fits(cost):
+                    continue
+                self._bytes += cost
+                self._by_user[user_id] = (keys, username, full_name)
+                entries.extend((key, user_id) for key in keys)
+
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = array("q", (user_id for _, user_id in entries))
+        logger.info(f"🔎 Typeahead index loaded: {len(self._keys)} keys, {self._bytes // 1024} KiB")
+
+    # --- Incremental updates ---
+
+    def remove(self, user_id: int):
+        existing = self._by_user.pop(user_id, None)
+        if not existing:
+            return
+        keys, username, full_name = existing
+        for key in keys:
+            lo = bisect.bisect_left(self._keys, key)
+            hi = bisect.bisect_right(self._keys, key, lo)
+            for i in range(lo, hi):
+                if self._ids[i] == user_id:
+                    del self._keys[i]
+                    del self._ids[i]
+                    break
+        self._bytes -= self._cost(keys, username, full_name)
+
+    def upsert(self, user_id: int, username: str, full_name: Optional[str]):
+        """Re-indexes one profile after it changes."""
+        self.remove(user_id)
+        keys = _index_keys(username, full_name)
+        cost = self._cost(keys, username, full_name)
+        if not self._fits(cost):
+            return
+        for key in keys:
+            lo = bisect.bisect_left(self._keys, key)
+            hi = bisect.bisect_right(self._keys, key, lo)
+            pos = lo + bisect.bisect_left(self._ids[lo:hi], user_id)
+            self._keys.insert(pos, key)
+            self._ids.insert(pos, user_id)
+        self._by_user[user_id] = (keys, username, full_name)
+        self._bytes += cost
+
+    # --- Queries ---
+
+    def search(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Top `limit` distinct users whose username or name starts with `prefix`."""
+        prefix = normalize_text(prefix)
+        if not prefix:
+            return []
+
+        results, seen = [], set()
+        start = bisect.bisect_left(self._keys, prefix)
+        end = min(len(self._keys), start + _MAX_SCAN)
+        for i in range(start, end):
+            if not self._keys[i].startswith(prefix):
+                break
+            user_id = self._ids[i]
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            _, username, full_name = self._by_user[user_id]
+            results.append({"id": user_id, "username": username, "name": full_name})
+            if len(results) >= limit:
+                break
+        return results
+
+
+# Single global instance shared by the search and profile endpoints
+typeahead_index = TypeaheadIndex(memory_budget_bytes=settings.TYPEAHEAD_MEMORY_BUDGET_MB * 1024 * 1024)
@@ -0,0 +1,343 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.config import settings
+from common.database import AsyncSessionLocal
+from .models import Follow
+
+logger = logging.getLogger("uvicorn")
+
+ID_DTYPE = np.int64
+_EMPTY = np.empty(0, dtype=ID_DTYPE)
+
+Deltas = Dict[int, Set[int]]
+
+
+def _csr(src: np.ndarray, dst: np.ndarray, num_nodes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(indptr, indices) for the edges src -> dst, rows sorted by neighbour id."""
+    order = np.lexsort((dst, src))
+    indices = dst[order].astype(ID_DTYPE, copy=False)
+    counts = np.bincount(src, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=ID_DTYPE)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+def _merge_edges(indptr: np.ndarray, indices: np.ndarray,
+                 added: Deltas, removed: Deltas) -> Tuple[np.ndarray, np.ndarray]:
+    """Every edge of a CSR base plus its deltas, as (src, dst) arrays."""
+    src = np.repeat(np.arange(len(indptr) - 1, dtype=ID_DTYPE), np.diff(indptr))
+    dst = indices
+    if removed:
+        # Encode (src, dst) pairs as single integers so removal is one vectorized isin
+        width = len(indptr)
+        drop = np.array(
+            [u * width + v for u, vs in removed.items() for v in vs], dtype=ID_DTYPE
+        )
+        keep = ~np.isin(src * width + dst, drop)
+        src, dst = src[keep], dst[keep]
+    extra = [(u, v) for u, vs in added.items() for v in vs]
+    if extra:
+        extra_arr = np.array(extra, dtype=ID_DTYPE)
+        src = np.concatenate([src, extra_arr[:, 0]])
+        dst = np.concatenate([dst, extra_arr[:, 1]])
+    return src, dst
+
+
+def _rebuild(indptr: np.ndarray, indices: np.ndarray, added: Deltas, removed: Deltas):
+    """Both CSR directions for a snapshot; pure, so it can run off the event loop."""
+    src, dst = _merge_edges(indptr, indices, added, removed)
+    num_nodes = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+    return _csr(src, dst, num_nodes), _csr(dst, src, num_nodes), len(src)
+
+
+class _Adjacency:
+    """
+    One direction of the follow graph in compressed sparse row form.
+    Row `u` holds the sorted neighbour ids in indices[indptr[u]:indptr[u + 1]].
+    Edges added/removed since the last compaction live in small delta sets
+    so follows and unfollows never rebuild the arrays on the request path.
+    """
+
+    def __init__(self):
+        self.indptr = np.zeros(1, dtype=ID_DTYPE)
+        self.indices = _EMPTY
+        self.added: Dict[int, Set[int]] = {}
+        self.removed: Dict[int, Set[int]] = {}
+
+    def build(self, src: np.ndarray, dst: np.ndarray, num_nodes: int):
+        self.replace(*_csr(src, dst, num_nodes))
+
+    def replace(self, indptr: np.ndarray, indices: np.ndarray):
+        """Installs new base arrays and drops the deltas they already include."""
+        self.indptr = indptr
+        self.indices = indices
+        self.added = {}
+        self.removed = {}
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, Deltas, Deltas]:
+        # The base arrays are never modified in place, so only the deltas need copying
+        return (
+            self.indptr, self.indices,
+            {u: set(vs) for u, vs in self.added.items()},
+            {u: set(vs) for u, vs in self.removed.items()},
+        )
+
+    def _base_row(self, u: int) -> np.ndarray:
+        if u < 0 or u + 1 >= len(self.indptr):
+            return _EMPTY
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def _in_base(self, u: int, v: int) -> bool:
+        row = self._base_row(u)
+        pos = np.searchsorted(row, v)
+        return pos < len(row) and row[pos] == v
+
+    def row(self, u: int) -> np.ndarray:
+        """Sorted, de-duplicated neighbours of `u` including pending deltas."""
+        row = self._base_row(u)
+        removed = self.removed.get(u)
+        if removed:
+            row = row[~np.isin(row, np.fromiter(removed, dtype=ID_DTYPE))]
+        added = self.added.get(u)
+        if added:
+            row = np.union1d(row, np.fromiter(added, dtype=ID_DTYPE))
+        return row
+
+    def contains(self, u: int, v: int) -> bool:
+        if v in self.added.get(u, ()):
+            return True
+        if v in self.removed.get(u, ()):
+            return False
+        return self._in_base(u, v)
+
+    def add(self, u: int, v: int) -> bool:
+        """Returns True if the edge is new."""
+        if v in self.removed.get(u, ()):
+            self.removed[u].discard(v)
+            return True
+        if self._in_base(u, v) or v in self.added.get(u, ()):
+            return False
+        self.added.setdefault(u, set()).add(v)
+        return True
+
+    def discard(self, u: int, v: int) -> bool:
+        """Returns True if the edge existed."""
+        if v in self.added.get(u, ()):
+            self.added[u].discard(v)
+            return True
+        if self._in_base(u, v) and v not in self.removed.get(u, ()):
+            self.removed.setdefault(u, set()).add(v)
+            return True
+        return False
+
+    def delta_size(self) -> int:
+        return sum(map(len, self.added.values())) + sum(map(len, self.removed.values()))
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Materializes every current edge as (src, dst) arrays."""
+        return _merge_edges(self.indptr, self.indices, self.added, self.removed)
+
+
+class FollowGraph:
+    """
+    In-memory follow graph used to answer social-graph queries without
+    self-joins on the `followers` table. Loaded once from MySQL at startup
+    and kept current by the follow/unfollow endpoints. If the startup load
+    fails it is retried in the background; until then `loaded` is False,
+    /ready reports not ready and the graph endpoints answer 503.
+
+    Once the pending deltas reach `compact_threshold`, the CSR arrays are
+    rebuilt from a snapshot in a worker thread. Queries keep using the old
+    arrays plus deltas meanwhile; follows and unfollows that arrive during
+    the rebuild are logged and replayed onto the new arrays when they are
+    swapped in.
+    """
+
+    def __init__(self, compact_threshold: int = 50_000, max_two_hop_fanout: int = 500):
+        self.out = _Adjacency()   # follower -> following
+        self.inc = _Adjacency()   # following -> follower
+        self.compact_threshold = compact_threshold
+        self.max_two_hop_fanout = max_two_hop_fanout
+        self.edge_count = 0
+        self.loaded = False
+        self._compaction: Optional[asyncio.Task] = None
+        self._loader: Optional[asyncio.Task] = None
+        # (is_add, follower, following) applied while a load or background compaction runs
+        self._replay: Optional[List[Tuple[bool, int, int]]] = None
+
+    # --- Loading ---
+
+    def build(self, src: np.ndarray, dst: np.ndarray):
+        num_nodes = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+        self.out.build(src, dst, num_nodes)
+        self.inc.build(dst, src, num_nodes)
+        self.edge_count = len(src)
+
+    async def load(self, db: AsyncSession, batch_size: int = 50_000):
+        """
+        Streams every follow edge from MySQL and rebuilds the CSR arrays.
+        Follows and unfollows made while the rows stream in are replayed
+        onto the new arrays.
+        """
+        self._replay = []
+        try:
+            src_chunks, dst_chunks = [], []
+            result = await db.stream(
+                select(Follow.follower_id, Follow.following_id)
+                .execution_options(yield_per=batch_size)
+            )
+            async for rows in result.partitions(batch_size):
+                chunk = np.array(rows, dtype=ID_DTYPE).reshape(-1, 2)
+                src_chunks.append(chunk[:, 0])
+                dst_chunks.append(chunk[:, 1])
+
+            src = np.concatenate(src_chunks) if src_chunks else _EMPTY
+            dst = np.concatenate(dst_chunks) if dst_chunks else _EMPTY
+            self.build(src, dst)
+            replay = self._replay
+        finally:
+            self._replay = None
+        for is_add, follower_id, following_id in replay:
+            self._apply(is_add, follower_id, following_id)
+        self.loaded = True
+        logger.info(f"🕸️ Follow graph loaded: {self.edge_count} edges")
+
+    async def _load_once(self):
+        async with AsyncSessionLocal() as session:
+            await self.load(session)
+
+    async def _retry_load(self):
+        while not self.loaded:
+            await asyncio.sleep(settings.FOLLOW_GRAPH_RETRY_SECONDS)
+            try:
+                await self._load_once()
+            except Exception as e:
+                logger.error(f"Follow graph load failed again: {e}")
+        self._loader = None
+
+    async def start(self):
+        """Loads the graph; on failure keeps retrying in the background."""
+        try:
+            await self._load_once()
+        except Exception as e:
+            logger.error(f"Failed to load follow graph, retrying every {settings.FOLLOW_GRAPH_RETRY_SECONDS}s: {e}")
+            self._loader = asyncio.create_task(self._retry_load())
+
+    async def stop(self):
+        if self._loader:
+            self._loader.cancel()
+            await asyncio.gather(self._loader, return_exceptions=True)
+            self._loader = None
+
+    def compact(self):
+        """Folds pending deltas back into the CSR arrays (blocking; see _compact_in_background)."""
+        src, dst = self.out.edges()
+        self.build(src, dst)
+
+    async def _compact_in_background(self):
+        self._replay = []
+        try:
+            (out_csr, inc_csr, edge_count) = await asyncio.get_running_loop().run_in_executor(
+                None, _rebuild, *self.out.snapshot()
+            )
+            self.out.replace(*out_csr)
+            self.inc.replace(*inc_csr)
+            self.edge_count = edge_count
+            replay, self._replay = self._replay, None
+            for is_add, follower_id, following_id in replay:
+                self._apply(is_add, follower_id, following_id)
+            logger.info(f"🕸️ Follow graph compacted: {self.edge_count} edges, {len(replay)} replayed")
+        except Exception as e:
+            logger.error(f"Follow graph compaction failed: {e}")
+        finally:
+            self._replay = None
+            self._compaction = None
+
+    # --- Incremental updates ---
+
+    def _apply(self, is_add: bool, follower_id: int, following_id: int) -> bool:
+        if is_add:
+            changed = self.out.add(follower_id, following_id)
+            if changed:
+                self.inc.add(following_id, follower_id)
+                self.edge_count += 1
+        else:
+            changed = self.out.discard(follower_id, following_id)
+            if changed:
+                self.inc.discard(following_id, follower_id)
+                self.edge_count -= 1
+        return changed
+
+    def add_edge(self, follower_id: int, following_id: int):
+        self._update(True, follower_id, following_id)
+
+    def remove_edge(self, follower_id: int, following_id: int):
+        self._update(False, follower_id, following_id)
+
+    def _update(self, is_add: bool, follower_id: int, following_id: int):
+        if self._replay is not None:
+            self._replay.append((is_add, follower_id, following_id))
+        if self._apply(is_add, follower_id, following_id):
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        # A load in progress replaces the arrays anyway
+        if not self.loaded or self._compaction is not None or self.out.delta_size() < self.compact_threshold:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, shell): nothing to block, compact inline
+            self.compact()
+            return
+        self._compaction = loop.create_task(self._compact_in_background())
+
+    # --- Queries ---
+
+    def following(self, user_id: int) -> np.ndarray:
+        return self.out.row(user_id)
+
+    def followers(self, user_id: int) -> np.ndarray:
+        return self.inc.row(user_id)
+
+    def is_following(self, follower_id: int, following_id: int) -> bool:
+        return self.out.contains(follower_id, following_id)
+
+    def mutual_follows(self, user_id: int) -> np.ndarray:
+        """Users that `user_id` follows and who follow back."""
+        return np.intersect1d(self.following(user_id), self.followers(user_id), assume_unique=True)
+
+    def followed_by_following(self, viewer_id: int, target_id: int) -> np.ndarray:
+        """People the viewer follows who also follow the target."""
+        return np.intersect1d(self.following(viewer_id), self.followers(target_id), assume_unique=True)
+
+    def suggestions(self, user_id: int, limit: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Two-hop follow candidates ranked by how many of the user's
+        followings already follow them. Returns (candidate_ids, counts).
+        """
+        first_hop = self.following(user_id)
+        if len(first_hop) > self.max_two_hop_fanout:
+            first_hop = np.random.choice(first_hop, self.max_two_hop_fanout, replace=False)
+        if not len(first_hop):
+            return _EMPTY, _EMPTY
+
+        second_hop = np.concatenate([self.following(int(f)) for f in first_hop])
+        candidates, counts = np.unique(second_hop, return_counts=True)
+
+        exclude = np.union1d(self.following(user_id), [user_id])
+        keep = ~np.isin(candidates, exclude)
+        candidates, counts = candidates[keep], counts[keep]
+
+        top = np.argsort(-counts, kind="stable")[:limit]
+        return candidates[top], counts[top]
+
+
+# Single global instance shared by the social endpoints
+follow_graph = FollowGraph()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Enum, ForeignKey, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Enum, ForeignKey, DateTime, Boolean, UniqueConstraint, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from common.database import Base
@@ -19,6 +19,8 @@ class Post(Base):
     caption = Column(Text, nullable=True)
     media_url = Column(String(500), nullable=True)
     thumbnail_url = Column(String(500), nullable=True)
+    # Resized WebP renditions, variant name -> URL (filled in by the media pipeline)
+    media_variants = Column(JSON, nullable=True)
     is_public = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -26,6 +28,12 @@ class Post(Base):
     likes = relationship("Like", back_populates="post", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
 
+    # Keyset pagination indexes: (created_at, id) seeks for the global and per-author feeds
+    __table_args__ = (
+        Index('idx_posts_public_created', 'is_public', 'created_at', 'id'),
+        Index('idx_posts_user_created', 'user_id', 'created_at', 'id'),
+    )
+
 class Follow(Base):
     __tablename__ = "followers"
 
@@ -0,0 +1,164 @@
+import base64
+import bisect
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.config import settings
+from .models import Post, Like, Comment
+
+logger = logging.getLogger("uvicorn")
+
+# How much each kind of engagement is worth before time decay
+EVENT_WEIGHTS = {
+    "post": 1.0,
+    "like": 1.0,
+    "unlike": -1.0,
+    "comment": 3.0,
+}
+
+# Rebase stored scores before 2 ** exponent can overflow a float
+_MAX_EXPONENT = 512
+
+
+def _to_epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class TrendingIndex:
+    """
+    Bounded top-K of posts ranked by time-decayed engagement.
+
+    Every event adds `weight * 2 ** ((t - epoch) / half_life)` to the post's
+    stored score. Because all scores decay at the same rate, the ordering
+    never changes with time alone, so an event only has to re-position one
+    post instead of re-scoring the whole set. The live (decayed) score is
+    only computed when it is shown.
+
+    Pages are addressed by a cursor holding the last post's (score, id), so
+    the next page continues below that score no matter how many posts were
+    inserted above it meanwhile. A post whose own score changes between two
+    requests can still cross the page boundary (shown twice or not at all);
+    the ranking itself is not frozen per client.
+    """
+
+    def __init__(self, half_life_hours: float, capacity: int):
+        self.half_life = half_life_hours * 3600
+        self.capacity = capacity
+        self.epoch = time.time()
+        self._scores: Dict[int, float] = {}
+        # Ascending list of (-score, post_id): index 0 is rank 1
+        self._ranked: List[Tuple[float, int]] = []
+
+    def __len__(self):
+        return len(self._scores)
+
+    def _rebase(self, now: float):
+        factor = 2 ** (-(now - self.epoch) / self.half_life)
+        self._scores = {pid: score * factor for pid, score in self._scores.items()}
+        self._ranked = [(neg * factor, pid) for neg, pid in self._ranked]
+        self.epoch = now
+
+    def record(self, post_id: int, event: str, at: Optional[float] = None):
+        """Applies one engagement event to a post's score."""
+        at = time.time() if at is None else at
+        if (at - self.epoch) / self.half_life > _MAX_EXPONENT:
+            self._rebase(at)
+
+        delta = EVENT_WEIGHTS[event] * 2 ** ((at - self.epoch) / self.half_life)
+        old = self._scores.get(post_id)
+        if old is not None:
+            pos = bisect.bisect_left(self._ranked, (-old, post_id))
+            del self._ranked[pos]
+        elif delta <= 0:
+            # Negative event for a post we are not tracking: nothing to lower
+            return
+
+        new = (old or 0.0) + delta
+        if new <= 0:
+            self._scores.pop(post_id, None)
+            return
+
+        self._scores[post_id] = new
+        bisect.insort(self._ranked, (-new, post_id))
+
+        # Keep only the top `capacity` posts
+        while len(self._ranked) > self.capacity:
+            _, evicted = self._ranked.pop()
+            del self._scores[evicted]
+
+    def discard(self, post_id: int):
+        old = self._scores.pop(post_id, None)
+        if old is not None:
+            pos = bisect.bisect_left(self._ranked, (-old, post_id))
+            del self._ranked[pos]
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, int, float]]:
+        """Returns (rank, post_id, current_score) for one page of the ranking."""
+        decay = 2 ** (-(time.time() - self.epoch) / self.half_life)
+        return [
+            (offset + i + 1, pid, -neg * decay)
+            for i, (neg, pid) in enumerate(self._ranked[offset:offset + limit])
+        ]
+
+    def _encode_cursor(self, neg: float, post_id: int) -> str:
+        raw = f"{self.epoch!r}|{neg!r}|{post_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    def _seek(self, cursor: str) -> int:
+        """Position of the first entry ranked below the cursor; ValueError if it is malformed."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            epoch, neg, post_id = raw.split("|")
+            epoch, neg, post_id = float(epoch), float(neg), int(post_id)
+            if not (math.isfinite(epoch) and math.isfinite(neg)):
+                raise ValueError(cursor)
+            # Scores stored against an older epoch are rescaled the way _rebase does it
+            if epoch != self.epoch:
+                neg *= 2 ** (-(self.epoch - epoch) / self.half_life)
+        except (UnicodeError, OverflowError) as e:
+            raise ValueError(cursor) from e
+        return bisect.bisect_right(self._ranked, (neg, post_id))
+
+    def page_after(self, cursor: Optional[str], limit: int) -> Tuple[List[Tuple[int, int, float]], Optional[str]]:
+        """One page below `cursor` (from the top when None) and the cursor for the next page."""
+        start = self._seek(cursor) if cursor else 0
+        next_cursor = None
+        if start + limit < len(self._ranked):
+            next_cursor = self._encode_cursor(*self._ranked[start + limit - 1])
+        return self.page(start, limit), next_cursor
+
+    async def warm(self, db: AsyncSession, hours: int, batch_size: int = 10_000):
+        """Replays recent posts, likes and comments so a restart keeps the ranking."""
+        since = datetime.utcnow() - timedelta(hours=hours)
+        sources = [
+            ("post", select(Post.id, Post.created_at).where(
+                (Post.is_public == True) & (Post.created_at >= since))),
+            # Engagement on private posts must not give them a ranked slot
+            ("like", select(Like.post_id, Like.created_at).join(Post, Post.id == Like.post_id).where(
+                (Post.is_public == True) & (Like.created_at >= since))),
+            ("comment", select(Comment.post_id, Comment.created_at).join(Post, Post.id == Comment.post_id).where(
+                (Post.is_public == True) & (Comment.created_at >= since))),
+        ]
+        for event, query in sources:
+            result = await db.stream(query.execution_options(yield_per=batch_size))
+            async for rows in result.partitions(batch_size):
+                for post_id, created_at in rows:
+                    self.record(post_id, event, at=_to_epoch(created_at))
+        logger.info(f"🔥 Trending index warmed with {len(self)} posts")
+
+
+# Single global instance shared by the social endpoints
+trending_index = TrendingIndex(
+    half_life_hours=settings.TRENDING_HALF_LIFE_HOURS,
+    capacity=settings.TRENDING_CAPACITY
+)
@@ -1,17 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, delete
-from pydantic import BaseModel
+from sqlalchemy import select, delete, insert, and_
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
-from common.database import get_db
+from common.database import get_db, get_read_db
 from common.deps import get_current_user # Assumes your JWT dep
+from common.dataloader import RequestLoaders, get_loaders, get_viewer_loaders, hydrate_posts, author_to_dict
+from common.pagination import MAX_PAGE_SIZE, keyset_page, split_page
 from services.auth.models import User
 from services.notifications.models import Notification
+from services.notifications.delivery import insert_notifications, push_notifications
+from services.search.post_index import post_index, tokenize
+from services.search.cache import search_cache
+from services.media.tasks import enqueue_post_processing
 from .models import Post, ContentType, Follow, Like, Comment
+from .graph import follow_graph
+from .ranking import trending_index
 
 router = APIRouter(prefix="/social", tags=["Social Feed"])
 
+# Retries when concurrent follows make the multi-row insert skip rows
+BULK_FOLLOW_ATTEMPTS = 3
+
 # --- Schemas ---
 class PostCreate(BaseModel):
     caption: Optional[str] = None
@@ -21,6 +32,9 @@ class PostCreate(BaseModel):
 class CommentCreate(BaseModel):
     content: str
 
+class BulkFollow(BaseModel):
+    target_ids: List[int] = Field(..., min_length=1, max_length=500)
+
 # --- Endpoints ---
 
 @router.post("/post", status_code=status.HTTP_201_CREATED)
@@ -32,19 +46,40 @@ async def create_post(
     new_post = Post(user_id=current_user.id, **data.model_dump())
     db.add(new_post)
     await db.commit()
+    if new_post.is_public is not False:
+        trending_index.record(new_post.id, "post")
+        post_index.add(new_post.id, new_post.caption)
+        search_cache.invalidate("posts", terms=tokenize(new_post.caption))
+    # Thumbnail / poster frame is filled in by the media pipeline
+    await enqueue_post_processing(new_post.id, new_post.media_url, new_post.content_type)
     return {"message": "Post published", "post_id": new_post.id}
 
 @router.get("/feed")
-async def get_global_feed(limit: int = 20, db: AsyncSession = Depends(get_db)):
-    """The public feed of the most recent public posts."""
-    query = select(Post).where(Post.is_public == True).order_by(desc(Post.created_at)).limit(limit)
+async def get_global_feed(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
+    """
+    The public feed of the most recent public posts.
+    Pass the returned `next_cursor` back as `cursor` to load the next page.
+    """
+    query = keyset_page(
+        select(Post).where(Post.is_public == True),
+        Post.created_at, Post.id, cursor, limit
+    )
     result = await db.execute(query)
-    return result.scalars().all()
+    posts, next_cursor = split_page(result.scalars().all(), limit)
+    return {"items": await hydrate_posts(posts, loaders), "next_cursor": next_cursor}
 
 @router.get("/feed/personalized")
 async def get_personalized_feed(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user), 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    loaders: RequestLoaders = Depends(get_viewer_loaders)
 ):
     """Feed containing posts only from people the user follows."""
     # 1. Find who the user is following
@@ -53,15 +88,124 @@ async def get_personalized_feed(
     following_ids = res.scalars().all()
 
     if not following_ids:
-        return []
+        return {"items": [], "next_cursor": None}
 
-    # 2. Fetch those posts
-    feed_query = select(Post).where(
-        Post.user_id.in_(following_ids)
-    ).order_by(desc(Post.created_at)).limit(50)
+    # 2. Fetch the next page of those posts
+    feed_query = keyset_page(
+        select(Post).where(Post.user_id.in_(following_ids)),
+        Post.created_at, Post.id, cursor, limit
+    )
     
     result = await db.execute(feed_query)
-    return result.scalars().all()
+    posts, next_cursor = split_page(result.scalars().all(), limit)
+    return {"items": await hydrate_posts(posts, loaders), "next_cursor": next_cursor}
+
+@router.get("/feed/trending")
+async def get_trending_feed(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    debug: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
+    """
+    Public posts ranked by time-decayed engagement (likes, comments).
+    The ranking is read from the in-memory trending index; `debug=true`
+    adds each post's rank and current score. Pass the returned
+    `next_cursor` back as `cursor` to load the next page: it continues
+    below the last post's score, so posts rising to the top meanwhile
+    don't shift the pages (see TrendingIndex for what it doesn't cover).
+    """
+    try:
+        ranked, next_cursor = trending_index.page_after(cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Only public posts enter the index, so a page is only short if a post was deleted
+    if not ranked:
+        return {"items": [], "next_cursor": None}
+
+    ids = [post_id for _, post_id, _ in ranked]
+    result = await db.execute(select(Post).where(Post.id.in_(ids) & (Post.is_public == True)))
+    by_id = {post.id: post for post in result.scalars().all()}
+    for pid in set(ids) - by_id.keys():
+        trending_index.discard(pid)
+
+    ordered = [(rank, by_id[pid], score) for rank, pid, score in ranked if pid in by_id]
+    items = await hydrate_posts([post for _, post, _ in ordered], loaders)
+    if debug:
+        for item, (rank, _, score) in zip(items, ordered):
+            item["rank"] = rank
+            item["score"] = round(score, 4)
+    return {"items": items, "next_cursor": next_cursor}
+
+# Declared before /follow/{target_id} so "bulk" isn't parsed as an id
+@router.post("/follow/bulk")
+async def bulk_follow(
+    data: BulkFollow,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Follows many users at once (e.g. after a contact import).
+    Existing edges and unknown ids are filtered with one query, new edges are
+    written with one multi-row INSERT IGNORE and notifications are delivered
+    in a batch, only for the edges this request actually created.
+    """
+    target_ids = {tid for tid in data.target_ids if tid != current_user.id}
+    if not target_ids:
+        return {"followed": [], "already_following": [], "not_found": []}
+
+    for attempt in range(BULK_FOLLOW_ATTEMPTS):
+        # 1. One query: which targets exist, and which are already followed
+        existing = await db.execute(
+            select(User.id, Follow.id)
+            .outerjoin(Follow, and_(Follow.following_id == User.id, Follow.follower_id == current_user.id))
+            .where(User.id.in_(target_ids))
+        )
+        found, already = set(), set()
+        for user_id, follow_id in existing.all():
+            found.add(user_id)
+            if follow_id is not None:
+                already.add(user_id)
+        new_ids = sorted(found - already)
+        if not new_ids:
+            break
+
+        # 2. Multi-row insert; the _follower_following_uc constraint absorbs concurrent
+        #    duplicates (Core insert on the table, so the result carries a rowcount)
+        result = await db.execute(
+            insert(Follow.__table__).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            [{"follower_id": current_user.id, "following_id": tid} for tid in new_ids]
+        )
+        if result.rowcount == len(new_ids):
+            break
+        # 3. A concurrent follow won some rows; start over so they count as existing
+        await db.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Follows changed while saving. Please try again.")
+
+    if new_ids:
+        notifications = [
+            {
+                "recipient_id": tid,
+                "sender_id": current_user.id,
+                "notification_type": "follow",
+                "content": f"{current_user.email} started following you!"
+            }
+            for tid in new_ids
+        ]
+        await insert_notifications(db, notifications)
+        await db.commit()
+
+        for tid in new_ids:
+            follow_graph.add_edge(current_user.id, tid)
+        await push_notifications(notifications)
+
+    return {
+        "followed": new_ids,
+        "already_following": sorted(already),
+        "not_found": sorted(target_ids - found)
+    }
 
 @router.post("/follow/{target_id}")
 async def follow_user(
@@ -89,6 +233,7 @@ async def follow_user(
     ))
 
     await db.commit()
+    follow_graph.add_edge(current_user.id, target_id)
     return {"message": "Followed successfully"}
 
 @router.delete("/unfollow/{target_id}")
@@ -106,8 +251,66 @@ async def unfollow_user(
         raise HTTPException(status_code=404, detail="Not following this user")
         
     await db.commit()
+    follow_graph.remove_edge(current_user.id, target_id)
     return {"message": "Unfollowed successfully"}
 
+# --- Social Graph (served from the in-memory follow graph) ---
+
+def require_follow_graph():
+    """503 until the graph is in memory, rather than answering from an empty one."""
+    if not follow_graph.loaded:
+        raise HTTPException(status_code=503, detail="Social graph is loading. Please try again shortly.")
+
+async def _user_page(ids, offset: int, limit: int, loaders: RequestLoaders):
+    page = [int(uid) for uid in ids[offset:offset + limit]]
+    profiles = await loaders.profiles.load_many(page)
+    return {
+        "total": len(ids),
+        "items": [author_to_dict(uid, profiles[uid]) for uid in page]
+    }
+
+@router.get("/users/{user_id}/followers", dependencies=[Depends(require_follow_graph)])
+async def get_followers(
+    user_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
+    return await _user_page(follow_graph.followers(user_id), offset, limit, loaders)
+
+@router.get("/users/{user_id}/following", dependencies=[Depends(require_follow_graph)])
+async def get_following(
+    user_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
+    return await _user_page(follow_graph.following(user_id), offset, limit, loaders)
+
+@router.get("/users/{user_id}/mutuals", dependencies=[Depends(require_follow_graph)])
+async def get_mutual_followers(
+    user_id: int,
+    limit: int = Query(3, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_viewer_loaders)
+):
+    """People the current user follows who also follow `user_id` ("Followed by X and N others")."""
+    return await _user_page(follow_graph.followed_by_following(current_user.id, user_id), 0, limit, loaders)
+
+@router.get("/suggestions", dependencies=[Depends(require_follow_graph)])
+async def get_follow_suggestions(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_viewer_loaders)
+):
+    """Friends-of-friends ranked by how many of your followings follow them."""
+    candidates, counts = follow_graph.suggestions(current_user.id, limit)
+    profiles = await loaders.profiles.load_many(int(uid) for uid in candidates)
+    return [
+        {**author_to_dict(int(uid), profiles[int(uid)]), "mutual_count": int(count)}
+        for uid, count in zip(candidates, counts)
+    ]
+
 @router.post("/post/{post_id}/like")
 async def toggle_like(
     post_id: int, 
@@ -124,6 +327,7 @@ async def toggle_like(
     if like_obj:
         await db.delete(like_obj)
         await db.commit()
+        trending_index.record(post_id, "unlike")
         return {"message": "Post unliked"}
     
     # Add new like
@@ -141,6 +345,8 @@ async def toggle_like(
         ))
     
     await db.commit()
+    if post.is_public is not False:
+        trending_index.record(post_id, "like")
     return {"message": "Post liked"}
 
 @router.post("/post/{post_id}/comment")
@@ -151,6 +357,10 @@ async def add_comment(
     db: AsyncSession = Depends(get_db)
 ):
     """Adds a comment to a specific post."""
+    post = (await db.execute(select(Post.id, Post.is_public).where(Post.id == post_id))).first()
+    if post is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+
     new_comment = Comment(
         post_id=post_id,
         user_id=current_user.id,
@@ -158,4 +368,7 @@ async def add_comment(
     )
     db.add(new_comment)
     await db.commit()
+    # Private posts never enter the trending ranking
+    if post.is_public is not False:
+        trending_index.record(post_id, "comment")
     return {"message": "Comment added", "comment_id": new_comment.id}
@@ -0,0 +1,86 @@
+"""
+Shared fixtures. Each test gets a fresh SQLite primary database and the
+in-process Redis stand-in, so no MySQL, Redis or network access is needed.
+Settings are pinned here, before any app module is imported.
+"""
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.update({
+    "MYSQL_URL": "sqlite+aiosqlite://",
+    "REDIS_URL": "memory://",
+    "SECRET_KEY": "test-secret",
+    "R2_ACCOUNT_ID": "test",
+    "R2_ACCESS_KEY": "test",
+    "R2_SECRET_KEY": "test",
+    "R2_BUCKET_NAME": "test",
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "SQL_DEBUG_HEADERS": "true",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import common.database as database
+import common.redis_client as redis_client
+from common.auth_cache import principal_cache
+from common.query_stats import instrument
+from common.security import create_access_token
+import main
+
+
+def make_engine(path) -> AsyncEngine:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    instrument(engine)
+    return engine
+
+
+def create_schema(engine: AsyncEngine):
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.create_all)
+    asyncio.run(create())
+
+
+def add_rows(engine: AsyncEngine, *rows):
+    """Inserts ORM objects with a short-lived session on `engine`."""
+    async def insert():
+        async with async_sessionmaker(bind=engine, expire_on_commit=False)() as session:
+            session.add_all(rows)
+            await session.commit()
+    asyncio.run(insert())
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+@pytest.fixture(autouse=True)
+def primary(tmp_path):
+    """Points the app's primary engine (and every AsyncSessionLocal user) at a fresh database."""
+    engine = make_engine(tmp_path / "primary.db")
+    create_schema(engine)
+    original = database.engine
+    database.engine = engine
+    database.AsyncSessionLocal.configure(bind=engine)
+    redis_client._client = None
+    principal_cache._users._data.clear()
+    principal_cache._tokens._data.clear()
+    yield engine
+    database.engine = original
+    database.AsyncSessionLocal.configure(bind=original)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def client():
+    # No context manager: the lifespan (Firebase, R2, SMTP, indexes) isn't needed here
+    return TestClient(main.app)
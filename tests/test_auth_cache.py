@@ -0,0 +1,111 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+import common.auth_cache as auth_cache
+from common.auth_cache import PrincipalCache
+from common.database import AsyncSessionLocal
+from common.security import create_access_token
+from services.auth.models import User
+from services.profiles.models import Profile
+from conftest import add_rows, auth
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(auth_cache.time.time())
+    monkeypatch.setattr(auth_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def alice(primary):
+    add_rows(
+        primary,
+        User(id=1, email="alice@example.com", is_active=True, is_verified=True),
+        Profile(user_id=1, username="alice_w", full_name="Alice Walker"),
+    )
+
+
+def run_sql(statement):
+    async def execute():
+        async with AsyncSessionLocal() as db:
+            await db.execute(statement)
+            await db.commit()
+    asyncio.run(execute())
+
+
+def test_cache_hit_skips_the_database(alice):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    token = create_access_token(1)
+    first = asyncio.run(cache.resolve(token))
+    assert first.email == "alice@example.com"
+
+    # Served from memory even though the row is gone
+    run_sql(delete(User).where(User.id == 1))
+    assert asyncio.run(cache.resolve(token)) is first
+
+    cache.invalidate_user(1)
+    assert asyncio.run(cache.resolve(token)) is None
+
+
+def test_entries_expire_after_the_ttl(alice, clock):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    token = create_access_token(1)
+    assert asyncio.run(cache.resolve(token)).is_verified
+
+    run_sql(update(User).where(User.id == 1).values(is_verified=False))
+    clock.now += 59
+    assert asyncio.run(cache.resolve(token)).is_verified
+    clock.now += 2
+    assert not asyncio.run(cache.resolve(token)).is_verified
+
+
+def test_token_entries_never_outlive_the_token(clock):
+    cache = PrincipalCache(ttl_seconds=3600, max_entries=10)
+    token = create_access_token(1, timedelta(seconds=30))
+    assert cache.decode(token) == 1
+    expires_at, _ = cache._tokens._data[token]
+    assert expires_at <= clock.now + 30
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    tokens = [create_access_token(n) for n in (1, 2, 3)]
+    cache.decode(tokens[0])
+    cache.decode(tokens[1])
+    cache._tokens.get(tokens[0])
+    cache.decode(tokens[2])
+    assert list(cache._tokens._data) == [tokens[0], tokens[2]]
+
+
+def test_deactivated_users_are_rejected(alice):
+    cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+    token = create_access_token(1)
+    assert asyncio.run(cache.resolve(token)) is not None
+
+    run_sql(update(User).where(User.id == 1).values(is_active=False))
+    cache.invalidate_user(1)
+    assert asyncio.run(cache.resolve(token)) is None
+
+    # Not cached while inactive, so reactivation applies immediately
+    run_sql(update(User).where(User.id == 1).values(is_active=True))
+    assert asyncio.run(cache.resolve(token)) is not None
+
+
+def test_deactivated_token_gets_401(client, alice):
+    assert client.get("/api/v1/search/users", params={"q": "alice@example.com"}, headers=auth(1)).status_code == 200
+
+    run_sql(update(User).where(User.id == 1).values(is_active=False))
+    auth_cache.principal_cache.invalidate_user(1)
+    assert client.get("/api/v1/search/users", params={"q": "alice@example.com"}, headers=auth(1)).status_code == 401
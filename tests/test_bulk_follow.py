@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.sql import Insert
+
+import main
+import services.social.router as social_router
+from common.database import AsyncSessionLocal, get_db
+from services.auth.models import User
+from services.notifications.models import Notification
+from services.social.graph import FollowGraph
+from services.social.models import Follow
+from conftest import add_rows, auth
+
+ME = 1
+
+
+@pytest.fixture
+def users(primary):
+    add_rows(primary, *(User(id=n, email=f"u{n}@example.com", is_active=True, is_verified=True) for n in range(1, 6)))
+    add_rows(primary, Follow(follower_id=ME, following_id=2))
+
+
+@pytest.fixture
+def pushed(monkeypatch):
+    sent = []
+
+    async def push(rows):
+        sent.extend(rows)
+    monkeypatch.setattr(social_router, "push_notifications", push)
+    monkeypatch.setattr(social_router, "follow_graph", FollowGraph())
+    return sent
+
+
+def notified(primary) -> list:
+    async def query():
+        async with primary.connect() as conn:
+            result = await conn.execute(select(Notification.recipient_id).order_by(Notification.recipient_id))
+            return list(result.scalars())
+    return asyncio.run(query())
+
+
+def bulk_follow(client, target_ids):
+    return client.post("/api/v1/social/follow/bulk", json={"target_ids": target_ids}, headers=auth(ME))
+
+
+def test_dedupes_and_skips_self_and_existing(client, primary, users, pushed):
+    response = bulk_follow(client, [3, 3, ME, 2, 4, 99, 4])
+    assert response.status_code == 200
+    assert response.json() == {"followed": [3, 4], "already_following": [2], "not_found": [99]}
+    assert notified(primary) == [3, 4]
+    assert [row["recipient_id"] for row in pushed] == [3, 4]
+    assert social_router.follow_graph.is_following(ME, 3)
+
+    # A repeat creates nothing and notifies nobody
+    response = bulk_follow(client, [3, 4])
+    assert response.json() == {"followed": [], "already_following": [3, 4], "not_found": []}
+    assert notified(primary) == [3, 4]
+
+
+def test_self_follow_only_is_a_no_op(client, primary, users, pushed):
+    response = bulk_follow(client, [ME, ME])
+    assert response.json() == {"followed": [], "already_following": [], "not_found": []}
+    assert notified(primary) == []
+
+
+@pytest.mark.parametrize("count, status", [(500, 200), (501, 422), (0, 422)])
+def test_batch_cap(client, users, pushed, count, status):
+    assert bulk_follow(client, list(range(10, 10 + count))).status_code == status
+
+
+def test_concurrent_follow_is_not_notified_twice(client, primary, users, pushed):
+    raced = []
+
+    async def racing_db():
+        """A session where another request follows user 4 just before our INSERT."""
+        async with AsyncSessionLocal() as session:
+            execute = session.execute
+
+            async def execute_after_race(statement, *args, **kwargs):
+                if isinstance(statement, Insert) and statement.table.name == "followers" and not raced:
+                    raced.append(True)
+                    async with primary.begin() as conn:
+                        await conn.execute(insert(Follow).values(follower_id=ME, following_id=4))
+                return await execute(statement, *args, **kwargs)
+            session.execute = execute_after_race
+            yield session
+
+    main.app.dependency_overrides[get_db] = racing_db
+    try:
+        response = bulk_follow(client, [3, 4])
+    finally:
+        main.app.dependency_overrides.pop(get_db)
+    assert raced
+    assert response.json() == {"followed": [3], "already_following": [4], "not_found": []}
+    assert notified(primary) == [3]
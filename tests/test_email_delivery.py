@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+
+import common.email as email
+from common.email import EmailDelivery, render_email
+from common.jobs import DELAYED_KEY, job_queue
+from common.redis_client import get_redis
+from services.auth.tasks import LOGIN_ALERT_JOB
+
+
+class FakeSMTP:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.delay = 0.0
+        self.is_connected = True
+        self.sent = []
+
+    async def send_message(self, message):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionResetError("server hung up")
+        self.sent.append(message["To"])
+
+    def close(self):
+        self.is_connected = False
+
+    async def quit(self):
+        self.is_connected = False
+
+
+def delivery(monkeypatch, fail: bool) -> EmailDelivery:
+    smtp = FakeSMTP(fail)
+    instance = EmailDelivery(pool_size=1, max_queue=10, max_retries=3)
+
+    async def connect():
+        smtp.is_connected = True
+        return smtp
+    monkeypatch.setattr(instance, "_connect", connect)
+    instance.smtp = smtp
+    return instance
+
+
+def alert(to: str = "a@example.com"):
+    return render_email(to, "Alert", "security_alert.html", {"time": "now", "device": "d", "location": "x"})
+
+
+def test_send_waits_for_the_smtp_transaction(monkeypatch):
+    async def scenario():
+        mail = delivery(monkeypatch, fail=False)
+        await mail.start()
+        await mail.send(alert())
+        assert mail.smtp.sent == ["a@example.com"]
+        await mail.stop()
+
+    asyncio.run(scenario())
+
+
+def test_send_raises_instead_of_retrying_in_process(monkeypatch):
+    async def scenario():
+        mail = delivery(monkeypatch, fail=True)
+        await mail.start()
+        with pytest.raises(ConnectionResetError):
+            await mail.send(alert())
+        assert mail.queue.qsize() == 0 and mail.failed == 1
+        await mail.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_login_alert_is_retried_from_redis(monkeypatch):
+    async def scenario():
+        mail = delivery(monkeypatch, fail=True)
+        monkeypatch.setattr(email, "email_delivery", mail)
+        await mail.start()
+        job = {"id": "1", "name": LOGIN_ALERT_JOB, "attempts": 0, "payload": {
+            "email": "a@example.com", "ip": "10.0.0.1", "user_agent": "ua", "time": "now",
+        }}
+        await job_queue._run(json.dumps(job))
+        [retry] = await get_redis().zrangebyscore(DELAYED_KEY, "-inf", "+inf")
+        assert json.loads(retry)["attempts"] == 1
+        await mail.stop()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_cancelled_sender_does_not_kill_the_worker(monkeypatch, fail):
+    async def scenario():
+        mail = delivery(monkeypatch, fail=fail)
+        mail.smtp.delay = 0.05
+        await mail.start()
+
+        # The caller gives up while its message is on the wire
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(mail.send(alert("slow@example.com")), timeout=0.01)
+        await asyncio.sleep(0.1)
+        assert not any(worker.done() for worker in mail._workers)
+
+        mail.smtp.fail = False
+        await asyncio.wait_for(mail.send(alert("next@example.com")), timeout=1)
+        assert mail.smtp.sent[-1] == "next@example.com"
+        await asyncio.wait_for(mail.stop(), timeout=1)
+
+    asyncio.run(scenario())
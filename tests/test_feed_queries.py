@@ -0,0 +1,92 @@
+"""
+Per-request query counts for the hydrated endpoints. The counts come from
+the X-DB-Queries header written by QueryStatsMiddleware, and must not
+grow with the number of rows on the page (no N+1).
+"""
+import pytest
+
+from services.auth.models import User
+from services.chat.models import ChatRoom, Message
+from services.discovery.models import Match
+from services.profiles.models import Profile
+from services.social.models import Comment, ContentType, Follow, Like, Post
+from conftest import add_rows, auth
+
+VIEWER = 1
+
+
+def queries(response) -> int:
+    assert response.status_code == 200, response.text
+    return int(response.headers["x-db-queries"])
+
+
+def seed_feed(engine, authors: int):
+    """`authors` users who each posted once; the viewer follows, likes and comments on all of them."""
+    rows = [User(id=VIEWER, email="viewer@example.com", is_active=True, is_verified=True)]
+    for n in range(2, authors + 2):
+        rows += [
+            User(id=n, email=f"author{n}@example.com", is_active=True, is_verified=True),
+            Profile(user_id=n, username=f"author{n}", full_name=f"Author {n}"),
+            Follow(follower_id=VIEWER, following_id=n),
+            Post(id=n, user_id=n, content_type=ContentType.text, caption=f"post {n}", is_public=True),
+        ]
+    add_rows(engine, *rows)
+    add_rows(engine, *(
+        row
+        for n in range(2, authors + 2)
+        for row in (Like(user_id=VIEWER, post_id=n), Comment(user_id=VIEWER, post_id=n, content="nice"))
+    ))
+
+
+def warm_principal(client):
+    # The first authenticated request loads the user row into the principal cache
+    client.get("/api/v1/social/feed/personalized", headers=auth(VIEWER))
+
+
+@pytest.mark.parametrize("authors", [3, 25])
+def test_global_feed_query_count(client, primary, authors):
+    seed_feed(primary, authors)
+
+    response = client.get("/api/v1/social/feed", params={"limit": 50})
+    # posts page + profiles + like counts + comment counts
+    assert queries(response) == 4
+    items = response.json()["items"]
+    assert len(items) == authors
+    assert all(item["like_count"] == 1 and item["comment_count"] == 1 for item in items)
+    assert all(item["author"]["username"] for item in items)
+
+
+@pytest.mark.parametrize("authors", [3, 25])
+def test_personalized_feed_query_count(client, primary, authors):
+    seed_feed(primary, authors)
+    warm_principal(client)
+
+    response = client.get("/api/v1/social/feed/personalized", params={"limit": 50}, headers=auth(VIEWER))
+    # follows + posts page + profiles + like counts + comment counts + liked-by-me
+    assert queries(response) == 6
+    items = response.json()["items"]
+    assert len(items) == authors
+    assert all(item["liked_by_me"] for item in items)
+
+
+@pytest.mark.parametrize("matches", [2, 20])
+def test_chat_inbox_query_count(client, primary, matches):
+    rows = [User(id=VIEWER, email="viewer@example.com", is_active=True, is_verified=True)]
+    for n in range(2, matches + 2):
+        rows += [
+            User(id=n, email=f"match{n}@example.com", is_active=True, is_verified=True),
+            Profile(user_id=n, username=f"match{n}"),
+            Match(id=n, user_one=VIEWER, user_two=n),
+            ChatRoom(id=n, match_id=n),
+        ]
+    add_rows(primary, *rows)
+    add_rows(primary, *(
+        Message(room_id=n, sender_id=n, recipient_id=VIEWER, message_text=f"hi {n}")
+        for n in range(2, matches + 2)
+    ))
+    warm_principal(client)
+
+    response = client.get("/api/v1/chat/rooms", headers=auth(VIEWER))
+    # matches + profiles + rooms + last messages
+    assert queries(response) == 4
+    assert len(response.json()) == matches
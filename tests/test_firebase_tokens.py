@@ -0,0 +1,150 @@
+import asyncio
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from jose import jwt
+
+import common.firebase_tokens as firebase_tokens
+from common.firebase_tokens import FirebaseTokenVerifier, InvalidFirebaseToken
+
+PROJECT = "meixup-test"
+
+
+class KeyServer:
+    """
+    Local stand-in for Google's x509 certificate endpoint. Serves whatever
+    signing keys are currently published; `fail` makes it answer 503.
+    """
+
+    def __init__(self, max_age: int = 3600):
+        self.max_age = max_age
+        self.fail = False
+        self.fetches = 0
+        self._private = {}
+        self._certs = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.fetches += 1
+                if server.fail:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps(server._certs).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", f"public, max-age={server.max_age}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}/certs"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def publish(self, kid: str):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        self._private[kid] = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        self._certs[kid] = cert.public_bytes(serialization.Encoding.PEM).decode()
+
+    def token(self, kid: str, uid: str = "firebase-uid-1") -> str:
+        now = int(time.time())
+        claims = {
+            "aud": PROJECT, "iss": f"https://securetoken.google.com/{PROJECT}",
+            "sub": uid, "iat": now, "exp": now + 3600,
+        }
+        return jwt.encode(claims, self._private[kid], algorithm="RS256", headers={"kid": kid})
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def key_server(monkeypatch):
+    monkeypatch.setattr(firebase_tokens.settings, "FIREBASE_PROJECT_ID", PROJECT)
+    server = KeyServer()
+    yield server
+    server.close()
+
+
+def test_verifies_locally_after_start(key_server):
+    key_server.publish("k1")
+
+    async def scenario():
+        verifier = FirebaseTokenVerifier(key_server.url)
+        await verifier.start()
+        try:
+            claims = await verifier.verify(key_server.token("k1"))
+            assert claims["uid"] == "firebase-uid-1"
+            await verifier.verify(key_server.token("k1"))
+            assert key_server.fetches == 1
+        finally:
+            await verifier.stop()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_kid_triggers_one_refresh(key_server, monkeypatch):
+    monkeypatch.setattr(firebase_tokens, "_MIN_REFRESH_INTERVAL", 0)
+    key_server.publish("k1")
+
+    async def scenario():
+        verifier = FirebaseTokenVerifier(key_server.url)
+        await verifier.start()
+        try:
+            key_server.publish("k2")
+            assert (await verifier.verify(key_server.token("k2")))["sub"] == "firebase-uid-1"
+            assert key_server.fetches == 2
+
+            with pytest.raises(InvalidFirebaseToken):
+                await verifier.verify(key_server.token("k1")[:-4] + "AAAA")
+        finally:
+            await verifier.stop()
+
+    asyncio.run(scenario())
+
+
+def test_refresh_loop_runs_when_first_fetch_fails(key_server, monkeypatch):
+    monkeypatch.setattr(firebase_tokens, "_MIN_REFRESH_INTERVAL", 0.05)
+    key_server.publish("k1")
+    key_server.fail = True
+
+    async def scenario():
+        verifier = FirebaseTokenVerifier(key_server.url)
+        await verifier.start()
+        try:
+            assert verifier._task is not None and verifier._keys == {}
+            key_server.fail = False
+            for _ in range(100):
+                if verifier._keys:
+                    break
+                await asyncio.sleep(0.02)
+            assert set(verifier._keys) == {"k1"}
+        finally:
+            await verifier.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,147 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import services.social.graph as graph_module
+import services.social.router as social_router
+from services.auth.models import User
+from services.social.graph import FollowGraph, _Adjacency
+from services.social.models import Follow
+from conftest import add_rows, auth
+
+EDGES = [(1, 2), (1, 3), (2, 1), (2, 4), (3, 4), (3, 5), (4, 1), (5, 6)]
+
+
+def make_graph(edges=EDGES, **kwargs) -> FollowGraph:
+    graph = FollowGraph(**kwargs)
+    src, dst = np.array(edges).T
+    graph.build(src, dst)
+    graph.loaded = True
+    return graph
+
+
+def as_list(ids) -> list:
+    return [int(i) for i in ids]
+
+
+def test_adjacency_rows_merge_base_and_deltas():
+    adj = _Adjacency()
+    adj.build(np.array([1, 1, 2]), np.array([5, 3, 1]), 6)
+    assert as_list(adj.row(1)) == [3, 5]
+
+    assert adj.add(1, 4) and not adj.add(1, 4) and not adj.add(1, 3)
+    assert adj.discard(1, 5) and not adj.discard(1, 5)
+    assert as_list(adj.row(1)) == [3, 4]
+    assert adj.contains(1, 4) and not adj.contains(1, 5)
+
+    # Re-adding a removed base edge just cancels the removal
+    assert adj.add(1, 5)
+    assert adj.removed[1] == set() and as_list(adj.row(1)) == [3, 4, 5]
+    assert as_list(adj.row(99)) == [] and as_list(adj.row(-1)) == []
+
+
+def test_follow_and_unfollow_survive_compaction():
+    graph = make_graph()
+    graph.add_edge(6, 1)
+    graph.remove_edge(1, 3)
+    graph.remove_edge(1, 3)
+    assert graph.edge_count == len(EDGES)
+    assert as_list(graph.followers(1)) == [2, 4, 6]
+
+    graph.compact()
+    assert graph.out.delta_size() == graph.inc.delta_size() == 0
+    assert as_list(graph.following(1)) == [2]
+    assert as_list(graph.followers(1)) == [2, 4, 6]
+    assert graph.is_following(6, 1) and not graph.is_following(1, 3)
+
+    graph.remove_edge(6, 1)
+    assert as_list(graph.followers(1)) == [2, 4]
+
+
+def test_updates_during_background_compaction_are_replayed():
+    async def scenario():
+        graph = make_graph(compact_threshold=2)
+        graph.add_edge(6, 1)
+        graph.add_edge(6, 2)  # reaches the threshold
+        compaction = graph._compaction
+        assert compaction is not None
+        await asyncio.sleep(0)
+        assert graph._replay == []
+
+        # Arrive while the rebuild runs in the worker thread
+        graph.add_edge(6, 3)
+        graph.remove_edge(1, 2)
+        await compaction
+
+        assert graph._compaction is None and graph._replay is None
+        assert as_list(graph.following(6)) == [1, 2, 3]
+        assert as_list(graph.following(1)) == [3]
+        assert as_list(graph.followers(2)) == [6]
+        assert graph.edge_count == len(EDGES) + 2
+        assert graph.out.delta_size() == 2
+
+    asyncio.run(scenario())
+
+
+def test_mutual_counts():
+    graph = make_graph()
+    assert as_list(graph.mutual_follows(1)) == [2]
+    # Viewer 1 follows 2 and 3; of those, 2 and 3 both follow 4
+    assert as_list(graph.followed_by_following(1, 4)) == [2, 3]
+    graph.remove_edge(3, 4)
+    assert as_list(graph.followed_by_following(1, 4)) == [2]
+
+
+def test_suggestions_skip_self_and_already_followed():
+    graph = make_graph()
+    candidates, counts = graph.suggestions(1)
+    # 2 -> {1, 4}, 3 -> {4, 5}: 1 is the user, so 4 (twice) then 5
+    assert as_list(candidates) == [4, 5]
+    assert as_list(counts) == [2, 1]
+
+    graph.add_edge(1, 4)
+    candidates, _ = graph.suggestions(1)
+    # 4 is followed now; 4's only following is 1 (the user)
+    assert as_list(candidates) == [5]
+    assert as_list(graph.suggestions(6)[0]) == []
+
+
+@pytest.fixture
+def follows(primary):
+    add_rows(primary, *(User(id=n, email=f"u{n}@example.com", is_active=True, is_verified=True) for n in range(1, 7)))
+    add_rows(primary, *(Follow(follower_id=u, following_id=v) for u, v in EDGES))
+
+
+def test_failed_startup_load_is_retried(follows, monkeypatch):
+    monkeypatch.setattr(graph_module.settings, "FOLLOW_GRAPH_RETRY_SECONDS", 0)
+    graph = FollowGraph()
+    load, failures = graph.load, []
+
+    async def flaky_load(db, batch_size=50_000):
+        if not failures:
+            failures.append(True)
+            raise ConnectionError("database unavailable")
+        await load(db, batch_size)
+    monkeypatch.setattr(graph, "load", flaky_load)
+
+    async def scenario():
+        await graph.start()
+        assert not graph.loaded and graph._loader is not None
+        await graph._loader
+        assert graph.loaded and graph.edge_count == len(EDGES)
+        await graph.stop()
+
+    asyncio.run(scenario())
+
+
+def test_graph_routes_wait_for_the_load(client, follows, monkeypatch):
+    graph = FollowGraph()
+    monkeypatch.setattr(social_router, "follow_graph", graph)
+    assert client.get("/api/v1/social/users/1/followers").status_code == 503
+    assert client.get("/api/v1/social/suggestions", headers=auth(1)).status_code == 503
+
+    asyncio.run(graph._load_once())
+    response = client.get("/api/v1/social/users/1/followers")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [2, 4]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+import common.metrics as metrics
+import main
+
+
+@pytest.fixture
+def graph_loaded(monkeypatch):
+    monkeypatch.setattr(main.follow_graph, "loaded", True)
+
+
+def test_ready_when_every_dependency_answers(client, graph_loaded):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"ready": True, "checks": {"database": "ok", "redis": "ok", "follow_graph": "ok"}}
+
+
+def test_not_ready_when_the_database_fails(client, graph_loaded, monkeypatch, tmp_path):
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/dir/db.sqlite")
+    monkeypatch.setattr(main, "AsyncSessionLocal", async_sessionmaker(bind=broken))
+    response = client.get("/ready")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["ready"] is False
+    assert body["checks"]["database"].startswith("error: ")
+    assert body["checks"]["redis"] == "ok"
+    asyncio.run(broken.dispose())
+
+
+class DownRedis:
+    async def ping(self):
+        raise ConnectionError("redis unavailable")
+
+
+class SlowRedis:
+    async def ping(self):
+        await asyncio.sleep(5)
+
+
+@pytest.mark.parametrize("redis, error", [(DownRedis(), "ConnectionError"), (SlowRedis(), "TimeoutError")])
+def test_not_ready_when_redis_fails(client, graph_loaded, monkeypatch, redis, error):
+    monkeypatch.setattr(main, "get_redis", lambda: redis)
+    monkeypatch.setattr(main.settings, "READINESS_TIMEOUT_SECONDS", 0.1)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"] == {"database": "ok", "redis": f"error: {error}", "follow_graph": "ok"}
+
+
+def test_not_ready_until_the_follow_graph_loads(client, monkeypatch):
+    monkeypatch.setattr(main.follow_graph, "loaded", False)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["follow_graph"] == "error: RuntimeError"
+
+
+def test_metrics_expose_route_latency_and_pool_gauges(client, monkeypatch, tmp_path):
+    pooled = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pooled.db",
+                                 poolclass=AsyncAdaptedQueuePool, pool_size=3)
+    monkeypatch.setattr(metrics, "engine", pooled)
+    monkeypatch.setattr(metrics, "read_engine", None)
+
+    client.get("/api/v1/social/users/42/followers")
+    body = client.get("/metrics").text
+
+    # Labelled by route template, not by the concrete path
+    assert 'route="/api/v1/social/users/{user_id}/followers"' in body
+    assert "/users/42/" not in body
+    assert "http_request_duration_seconds_bucket{" in body
+    assert 'db_pool_size{engine="primary"} 3.0' in body
+    assert 'db_pool_checked_out{engine="primary"} 0.0' in body
+    assert 'db_pool_overflow{engine="primary"}' in body
+    assert 'queue_depth{queue="email"}' in body
+    assert "websocket_connections " in body
+    asyncio.run(pooled.dispose())
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+from common.jobs import DEAD_KEY, DELAYED_KEY, PROCESSING_PREFIX, QUEUE_KEY, WORKERS_KEY, JobQueue
+from common.redis_client import get_redis
+
+
+def make_queue(**overrides) -> JobQueue:
+    options = dict(workers=1, max_attempts=3, lease_seconds=30, retry_base_seconds=10, retry_max_seconds=25)
+    options.update(overrides)
+    return JobQueue(**options)
+
+
+def job(name: str, attempts: int = 0) -> str:
+    return json.dumps({"id": name, "name": name, "payload": {}, "attempts": attempts})
+
+
+def test_only_expired_workers_are_reclaimed():
+    async def scenario():
+        redis = get_redis()
+        live, dead = f"{PROCESSING_PREFIX}live:0", f"{PROCESSING_PREFIX}dead:0"
+        await redis.rpush(live, job("running"))
+        await redis.rpush(dead, job("orphaned"))
+        await redis.zadd(WORKERS_KEY, {live: time.time(), dead: time.time() - 120})
+
+        assert await make_queue().reclaim_expired() == 1
+        assert await redis.lrange(QUEUE_KEY, 0, -1) == [job("orphaned")]
+        assert await redis.lrange(live, 0, -1) == [job("running")]
+        assert await redis.zrangebyscore(WORKERS_KEY, "-inf", "+inf") == [live]
+
+    asyncio.run(scenario())
+
+
+def test_failed_jobs_back_off_then_dead_letter():
+    async def scenario():
+        redis = get_redis()
+        queue = make_queue()
+
+        @queue.task("flaky")
+        async def flaky(payload):
+            raise RuntimeError("smtp down")
+
+        before = time.time()
+        await queue._run(job("flaky"))
+        assert await redis.llen(QUEUE_KEY) == 0
+        [retry] = await redis.zrangebyscore(DELAYED_KEY, "-inf", "+inf")
+        assert json.loads(retry)["attempts"] == 1
+        assert await redis.zrangebyscore(DELAYED_KEY, "-inf", before + 9) == []
+
+        # Not due yet, so nothing moves; once due, exactly one copy is queued
+        assert await queue.promote_due() == 0
+        await redis.zadd(DELAYED_KEY, {retry: before})
+        assert await queue.promote_due() == 1
+        assert await redis.lrange(QUEUE_KEY, 0, -1) == [retry]
+        assert await redis.zcard(DELAYED_KEY) == 0
+
+        await queue._run(job("flaky", attempts=2))
+        assert json.loads((await redis.lrange(DEAD_KEY, 0, -1))[0])["attempts"] == 3
+
+    asyncio.run(scenario())
+
+
+def test_retry_delay_is_exponential_and_capped():
+    queue = make_queue()
+    assert [queue.retry_delay(n) for n in (1, 2, 3, 4)] == [10, 20, 25, 25]
+
+
+def test_stop_requeues_own_in_flight_jobs():
+    async def scenario():
+        redis = get_redis()
+        queue = make_queue()
+        started = asyncio.Event()
+
+        @queue.task("slow")
+        async def slow(payload):
+            started.set()
+            await asyncio.sleep(60)
+
+        await queue.start()
+        await queue.enqueue("slow", {})
+        await asyncio.wait_for(started.wait(), 5)
+        assert await redis.llen(QUEUE_KEY) == 0
+
+        await queue.stop()
+        assert json.loads((await redis.lrange(QUEUE_KEY, 0, -1))[0])["name"] == "slow"
+        assert await redis.zcard(WORKERS_KEY) == 0
+
+    asyncio.run(scenario())
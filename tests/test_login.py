@@ -0,0 +1,35 @@
+import pytest
+
+import services.auth.router as auth_router
+from common.security import hash_password
+from services.auth.models import User
+from conftest import add_rows
+
+CREDENTIALS = {"username": "alice@example.com", "password": "s3cret-pass"}
+
+
+@pytest.fixture
+def alice(primary):
+    add_rows(primary, User(id=1, email="alice@example.com", hashed_password=hash_password("s3cret-pass"),
+                           is_active=True, is_verified=True))
+
+
+def test_login_succeeds_when_the_alert_cannot_be_queued(client, alice, monkeypatch):
+    async def queue_down(**alert):
+        raise ConnectionError("redis unavailable")
+    monkeypatch.setattr(auth_router, "enqueue_login_alert", queue_down)
+
+    response = client.post("/api/v1/auth/login", data=CREDENTIALS)
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+
+def test_login_queues_the_alert(client, alice, monkeypatch):
+    alerts = []
+
+    async def enqueue(**alert):
+        alerts.append(alert)
+    monkeypatch.setattr(auth_router, "enqueue_login_alert", enqueue)
+
+    assert client.post("/api/v1/auth/login", data=CREDENTIALS).status_code == 200
+    assert [alert["email"] for alert in alerts] == ["alice@example.com"]
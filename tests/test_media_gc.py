@@ -0,0 +1,156 @@
+import asyncio
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from PIL import Image
+from sqlalchemy import select
+
+from common.database import AsyncSessionLocal
+from common.storage import public_url, storage
+from services.auth.models import User
+from services.media.gc import MediaGC, mark_orphaned
+from services.media.pipeline import AVATAR_VARIANTS, MediaPipeline
+from services.media.models import OrphanedMedia
+from services.profiles.models import Profile
+from services.social.models import ContentType, Post
+from conftest import add_rows, auth
+
+LIVE = "media/variants/aaaa"
+DEAD = "media/variants/bbbb"
+
+
+@pytest.fixture
+def bucket(primary, monkeypatch):
+    """A post uses the 320px render of set aaaa; set bbbb and avatars/old.jpg are unused."""
+    add_rows(
+        primary,
+        User(id=1, email="u1@example.com", is_active=True, is_verified=True),
+        Profile(user_id=1, username="u1", avatar_url=public_url("avatars/1/current.jpg")),
+        Post(id=1, user_id=1, content_type=ContentType.image, media_url=public_url("posts/1/cover.jpg"),
+             thumbnail_url=public_url(f"{LIVE}/320.webp"), is_public=True),
+    )
+    objects = [
+        f"{LIVE}/320.webp", f"{LIVE}/720.webp", f"{LIVE}/1280.webp", f"{LIVE}/96.webp",
+        f"{DEAD}/96.webp", f"{DEAD}/320.webp",
+        "avatars/1/current.jpg", "avatars/old.jpg",
+        "posts/1/cover.jpg", "posts/1/carousel-2.jpg", "chat/1/photo.jpg",
+    ]
+    old = datetime.now(timezone.utc) - timedelta(days=7)
+    listed = []
+
+    async def list_objects(prefix):
+        listed.append(prefix)
+        for key in objects:
+            if key.startswith(prefix):
+                yield key, old
+
+    async def delete_objects(keys):
+        # Like S3, deleting a missing key succeeds
+        for key in keys:
+            if key in objects:
+                objects.remove(key)
+        return list(keys), {}
+
+    monkeypatch.setattr(storage, "list_objects", list_objects)
+    monkeypatch.setattr(storage, "delete_objects", delete_objects)
+    return objects, listed
+
+
+def queued() -> set:
+    async def load():
+        async with AsyncSessionLocal() as db:
+            return set((await db.execute(select(OrphanedMedia.object_key))).scalars().all())
+    return asyncio.run(load())
+
+
+def test_reconcile_keeps_referenced_variant_sets_and_skips_untracked_prefixes(bucket):
+    objects, listed = bucket
+    assert asyncio.run(MediaGC().reconcile()) == 3
+    # The whole dead set is queued, including sizes that were never rendered for it
+    assert queued() == {f"{DEAD}/{size}.webp" for size in (96, 320, 720, 1280)} | {"avatars/old.jpg"}
+    assert not any(prefix.startswith(("posts/", "chat/")) for prefix in listed)
+
+
+def test_collect_spares_siblings_of_a_referenced_variant(bucket, monkeypatch):
+    objects, _ = bucket
+    monkeypatch.setattr("services.media.gc.settings.MEDIA_GC_GRACE_SECONDS", -1)
+
+    async def queue():
+        async with AsyncSessionLocal() as db:
+            await mark_orphaned(db, [f"{LIVE}/1280.webp", f"{DEAD}/320.webp"], "test")
+            await db.commit()
+    asyncio.run(queue())
+
+    asyncio.run(MediaGC().collect())
+    assert f"{LIVE}/1280.webp" in objects
+    # The dead set goes as a unit, including the 96px marker nobody queued
+    assert not any(key.startswith(DEAD) for key in objects)
+    assert queued() == set()
+
+
+def jpeg(color: str) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def objects(primary, monkeypatch):
+    """Dict-backed bucket for the pipeline, the profile route and the GC."""
+    store = {}
+
+    async def get_object_bytes(key, max_bytes):
+        return store[key]
+
+    async def exists(key):
+        return key in store
+
+    async def put_object(key, body, content_type, cache_control=None):
+        store[key] = body
+
+    async def delete_objects(keys):
+        for key in keys:
+            store.pop(key, None)
+        return list(keys), {}
+
+    async def upload_file_direct(file, folder="profiles"):
+        key = f"{folder}/{len(store)}.jpg"
+        store[key] = file.file.read()
+        return public_url(key)
+
+    for name, fn in (("get_object_bytes", get_object_bytes), ("exists", exists), ("put_object", put_object),
+                     ("delete_objects", delete_objects), ("upload_file_direct", upload_file_direct)):
+        monkeypatch.setattr(storage, name, fn)
+    monkeypatch.setattr("services.media.gc.settings.MEDIA_GC_GRACE_SECONDS", -1)
+    return store
+
+
+def test_replaced_avatar_set_is_rendered_again_for_the_same_bytes(client, primary, objects):
+    objects["avatars/1/first.jpg"] = jpeg("teal")
+    add_rows(
+        primary,
+        User(id=1, email="u1@example.com", is_active=True, is_verified=True),
+        Profile(user_id=1, username="u1", avatar_url=public_url("avatars/1/first.jpg")),
+    )
+    media = MediaPipeline(workers=1)
+    try:
+        asyncio.run(media.process_avatar(1, public_url("avatars/1/first.jpg")))
+        first_set = {key for key in objects if key.startswith("media/variants/")}
+        assert len(first_set) == len(AVATAR_VARIANTS)
+
+        # Replace the processed avatar, then let the GC run
+        response = client.put(
+            "/api/v1/profiles/me", data={"username": "u1"},
+            files={"profile_picture": ("b.jpg", jpeg("navy"), "image/jpeg")}, headers=auth(1)
+        )
+        assert response.status_code == 200
+        asyncio.run(MediaGC().collect())
+        assert not first_set & set(objects)
+
+        # Uploading the first picture again must render and store its sizes anew
+        objects["avatars/1/again.jpg"] = jpeg("teal")
+        urls = asyncio.run(media.image_variants("avatars/1/again.jpg", AVATAR_VARIANTS))
+    finally:
+        media.shutdown()
+    assert {url.split("/", 3)[3] for url in urls.values()} <= set(objects)
@@ -0,0 +1,81 @@
+import asyncio
+import io
+import subprocess
+
+import pytest
+from PIL import Image
+
+import services.media.pipeline as pipeline
+from common.storage import public_url, storage
+from services.auth.models import User
+from services.media.pipeline import POST_VARIANTS, MediaPipeline
+from services.social.models import ContentType, Post
+from conftest import add_rows
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    """In-memory stand-in for the storage calls the pipeline makes."""
+    image = Image.new("RGB", (2000, 1500), "teal")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    objects = {"posts/1/photo.jpg": buffer.getvalue()}
+
+    async def get_object_bytes(key, max_bytes):
+        return objects[key]
+
+    async def exists(key):
+        return key in objects
+
+    async def put_object(key, body, content_type, cache_control=None):
+        objects[key] = body
+
+    monkeypatch.setattr(storage, "get_object_bytes", get_object_bytes)
+    monkeypatch.setattr(storage, "exists", exists)
+    monkeypatch.setattr(storage, "put_object", put_object)
+    return objects
+
+
+def test_post_variants_are_stored_and_served(client, primary, bucket):
+    media_url = public_url("posts/1/photo.jpg")
+    add_rows(
+        primary,
+        User(id=1, email="u1@example.com", is_active=True, is_verified=True),
+        Post(id=1, user_id=1, content_type=ContentType.image, media_url=media_url, is_public=True),
+    )
+    media = MediaPipeline(workers=1)
+    try:
+        asyncio.run(media.process_post(1, media_url, is_video=False))
+    finally:
+        media.shutdown()
+
+    # Every rendered size was uploaded and is reachable from the feed
+    variants = client.get("/api/v1/social/feed").json()["items"][0]["media_variants"]
+    assert set(variants) == set(POST_VARIANTS)
+    for name, url in variants.items():
+        key = url.split("/", 3)[3]
+        with Image.open(io.BytesIO(bucket[key])) as rendered:
+            assert max(rendered.size) == POST_VARIANTS[name]
+
+
+def test_pool_workers_are_spawned():
+    media = MediaPipeline(workers=1)
+    try:
+        assert media._executor()._mp_context.get_start_method() == "spawn"
+    finally:
+        media.shutdown()
+
+
+def test_ffmpeg_input_is_locked_down(monkeypatch):
+    seen = []
+
+    def run(args, **kwargs):
+        seen.append(args)
+        return subprocess.CompletedProcess(args, 0, stdout=b"png", stderr=b"")
+    monkeypatch.setattr(pipeline.subprocess, "run", run)
+
+    assert pipeline.extract_poster_frame("https://r2.example/v.webm?sig", "matroska") == b"png"
+    args = seen[0]
+    assert args[args.index("-protocol_whitelist") + 1] == "https,tls,tcp"
+    # The forced demuxer applies to the input, so it must come before -i
+    assert args.index("-f") < args.index("-i") and args[args.index("-f") + 1] == "matroska"
@@ -0,0 +1,43 @@
+import pytest
+
+from common.storage import public_url
+from services.auth.models import User
+from services.chat.models import ChatRoom, Message
+from conftest import add_rows, auth
+
+READ_URLS = "/api/v1/media/read-urls"
+
+
+@pytest.fixture
+def chat(primary):
+    """User 1 sent user 2 a photo by key and a video by URL; user 3 is a stranger."""
+    add_rows(primary, *(User(id=n, email=f"u{n}@example.com", is_active=True, is_verified=True) for n in (1, 2, 3)))
+    add_rows(
+        primary,
+        ChatRoom(id=1),
+        Message(room_id=1, sender_id=1, recipient_id=2, media_url="chat/1/photo.jpg"),
+        Message(room_id=1, sender_id=1, recipient_id=2, media_url=public_url("chat/1/clip.mp4")),
+    )
+
+
+def read_urls(client, user_id: int, *keys: str):
+    return client.post(READ_URLS, json={"keys": list(keys)}, headers=auth(user_id))
+
+
+def test_uploader_and_recipient_can_read(client, chat):
+    assert set(read_urls(client, 1, "chat/1/photo.jpg", "chat/1/unsent.jpg").json()) == {
+        "chat/1/photo.jpg", "chat/1/unsent.jpg"
+    }
+    response = read_urls(client, 2, "chat/1/photo.jpg", "chat/1/clip.mp4")
+    assert response.status_code == 200
+    assert "X-Amz-Signature" in response.json()["chat/1/clip.mp4"]
+
+
+@pytest.mark.parametrize("user_id, key", [(3, "chat/1/photo.jpg"), (2, "chat/1/unsent.jpg")])
+def test_other_users_are_refused(client, chat, user_id, key):
+    assert read_urls(client, user_id, key).status_code == 403
+
+
+@pytest.mark.parametrize("key", ["posts/1/a.jpg", "chat/1/../2/a.jpg", "chat/a.jpg"])
+def test_only_private_keys_are_signed(client, chat, key):
+    assert read_urls(client, 1, key).status_code == 400
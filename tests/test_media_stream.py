@@ -0,0 +1,67 @@
+import pytest
+
+import services.profiles.media_router as media_router
+from common.storage import storage
+from services.auth.models import User
+from conftest import add_rows, auth
+
+STREAM = "/api/v1/media/stream"
+PART = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def bucket(primary, monkeypatch):
+    """Records multipart calls instead of talking to R2; the cap is 12 MiB."""
+    add_rows(primary, User(id=1, email="u1@example.com", is_active=True, is_verified=True))
+    monkeypatch.setattr(media_router.settings, "MEDIA_MAX_STREAM_BYTES", 12 * 1024 * 1024)
+    monkeypatch.setattr(media_router.settings, "MEDIA_MULTIPART_PART_SIZE", PART)
+    calls = []
+
+    async def create(key, content_type):
+        calls.append("create")
+        return "upload-1"
+
+    async def upload_part(key, upload_id, part_number, body, content_md5=None):
+        calls.append(f"part {part_number}")
+        return f'"etag-{part_number}"'
+
+    async def complete(key, upload_id, parts):
+        calls.append("complete")
+
+    async def abort(key, upload_id):
+        calls.append("abort")
+
+    monkeypatch.setattr(storage, "create_multipart_upload", create)
+    monkeypatch.setattr(storage, "upload_part", upload_part)
+    monkeypatch.setattr(storage, "complete_multipart_upload", complete)
+    monkeypatch.setattr(storage, "abort_multipart_upload", abort)
+    return calls
+
+
+def chunked(total: int, chunk: int = 1024 * 1024):
+    # A generator body is sent without Content-Length, like a streaming client
+    for start in range(0, total, chunk):
+        yield b"x" * min(chunk, total - start)
+
+
+def upload(client, body):
+    return client.post(STREAM, params={"file_type": "video/mp4"}, content=body, headers=auth(1))
+
+
+def test_stream_within_limit_completes(client, bucket):
+    response = upload(client, chunked(11 * 1024 * 1024))
+    assert response.status_code == 200
+    assert response.json()["size"] == 11 * 1024 * 1024
+    assert bucket == ["create", "part 1", "part 2", "part 3", "complete"]
+
+
+def test_stream_past_limit_is_aborted(client, bucket):
+    response = upload(client, chunked(20 * 1024 * 1024))
+    assert response.status_code == 413
+    assert bucket[0] == "create" and bucket[-1] == "abort"
+    assert "complete" not in bucket
+
+
+def test_declared_oversize_body_never_starts_an_upload(client, bucket):
+    assert upload(client, b"x" * (13 * 1024 * 1024)).status_code == 413
+    assert bucket == []
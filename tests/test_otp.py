@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+import services.auth.router as auth_router
+from common.redis_client import get_redis
+from services.auth.models import User
+from services.auth.otp import OTPStore
+from conftest import add_rows
+
+KEY = "otp:verification:7"
+
+
+def test_issue_sets_code_and_ttl_together():
+    async def scenario():
+        store = OTPStore(ttl_seconds=600, max_attempts=3)
+        code = await store.issue(7, "verification")
+        redis = get_redis()
+        assert 0 < await redis.ttl(KEY) <= 600
+        assert (await redis.hgetall(KEY))["attempts"] == "0"
+        assert await store.verify(7, "verification", code)
+
+    asyncio.run(scenario())
+
+
+def test_verify_never_recreates_a_missing_code():
+    async def scenario():
+        store = OTPStore(ttl_seconds=600, max_attempts=3)
+        code = await store.issue(7, "verification")
+        assert await store.verify(7, "verification", code)
+
+        # Consumed (or expired) codes stay gone instead of coming back without a TTL
+        assert not await store.verify(7, "verification", code)
+        assert not await store.verify(7, "verification", "000000")
+        assert await get_redis().ttl(KEY) == -2
+
+    asyncio.run(scenario())
+
+
+def test_code_is_burnt_after_max_attempts():
+    async def scenario():
+        store = OTPStore(ttl_seconds=600, max_attempts=2)
+        code = await store.issue(7, "verification")
+        wrong = "100000" if code != "100000" else "100001"
+        assert not await store.verify(7, "verification", wrong)
+        assert not await store.verify(7, "verification", wrong)
+        assert not await store.verify(7, "verification", code)
+
+    asyncio.run(scenario())
+
+
+def count_users(engine) -> int:
+    async def count():
+        async with engine.connect() as conn:
+            return await conn.scalar(select(func.count()).select_from(User))
+    return asyncio.run(count())
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    sent = []
+
+    async def send(**message):
+        sent.append(message)
+    monkeypatch.setattr(auth_router, "send_professional_email", send)
+    return sent
+
+
+def test_register_rolls_back_when_otp_cannot_be_issued(client, primary, outbox, monkeypatch):
+    issue = auth_router.otp_store.issue
+
+    async def redis_down(user_id, purpose):
+        raise ConnectionError("redis unavailable")
+    monkeypatch.setattr(auth_router.otp_store, "issue", redis_down)
+
+    signup = {"email": "new@example.com", "password": "s3cret-pass"}
+    assert client.post("/api/v1/auth/register", json=signup).status_code == 503
+    assert count_users(primary) == 0
+    assert outbox == []
+
+    # Nothing was left behind, so the same address can register once Redis is back
+    monkeypatch.setattr(auth_router.otp_store, "issue", issue)
+    assert client.post("/api/v1/auth/register", json=signup).status_code == 201
+    assert count_users(primary) == 1
+    assert outbox[0]["context"]["otp"]
+
+
+def test_forgot_password_reports_otp_outage(client, primary, outbox, monkeypatch):
+    add_rows(primary, User(id=1, email="alice@example.com", is_active=True, is_verified=True))
+
+    async def redis_down(user_id, purpose):
+        raise ConnectionError("redis unavailable")
+    monkeypatch.setattr(auth_router.otp_store, "issue", redis_down)
+
+    response = client.post("/api/v1/auth/forgot-password", params={"email": "alice@example.com"})
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Password reset is temporarily unavailable. Please try again."
+    assert outbox == []
+
+    # Unknown addresses never touch Redis, so they still get the neutral answer
+    response = client.post("/api/v1/auth/forgot-password", params={"email": "nobody@example.com"})
+    assert response.status_code == 200
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import common.security as security
+from common.security import (
+    PasswordHasherBusy, hash_password_async, pending_password_hashes, shutdown_password_hasher,
+    verify_password_async
+)
+
+
+def wait_for_idle(timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while pending_password_hashes() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pending_password_hashes() == 0
+
+
+def test_cancelled_caller_keeps_its_slot_until_bcrypt_finishes(monkeypatch):
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_MAX_PENDING", 1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait(5)
+        return "hashed"
+
+    async def scenario():
+        request = asyncio.create_task(security._run_in_hasher(slow_hash))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+        # The worker thread is still busy, so the slot is still taken
+        assert pending_password_hashes() == 1
+        with pytest.raises(PasswordHasherBusy):
+            await hash_password_async("s3cret-pass")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+    wait_for_idle()
+
+
+def test_hasher_comes_back_after_shutdown():
+    async def scenario():
+        return await hash_password_async("s3cret-pass")
+
+    shutdown_password_hasher()
+    shutdown_password_hasher()
+    hashed = asyncio.run(scenario())
+    assert asyncio.run(verify_password_async("s3cret-pass", hashed))
+    wait_for_idle()
@@ -0,0 +1,139 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import update
+
+from common.database import AsyncSessionLocal
+from services.auth.models import User
+from services.search.post_index import PostSearchIndex
+from services.social.models import ContentType, Post
+from conftest import add_rows
+
+CAPTIONS = {
+    1: "sunset at the beach",
+    2: "beach beach beach volleyball",
+    3: "mountain sunrise",
+    4: "a long walk along the beach after a long week of work and more work",
+    5: "beach",
+}
+
+
+def build() -> PostSearchIndex:
+    index = PostSearchIndex()
+    for post_id, caption in CAPTIONS.items():
+        index.add(post_id, caption)
+    return index
+
+
+def test_bm25_ranks_term_frequency_then_shorter_captions():
+    total, hits = build().search("beach")
+    assert total == 4
+    # Three hits beat one; among single hits the shortest caption wins
+    assert [post_id for post_id, _ in hits] == [2, 5, 1, 4]
+    assert hits[0][1] > hits[1][1] > hits[2][1] > hits[3][1]
+
+
+def test_newer_posts_win_ties():
+    index = PostSearchIndex()
+    for post_id in (1, 2, 3):
+        index.add(post_id, "same caption")
+    assert [post_id for post_id, _ in index.search("caption")[1]] == [3, 2, 1]
+
+
+def test_tombstoned_posts_leave_results_and_count():
+    index = build()
+    index.remove(2)
+    total, hits = index.search("beach")
+    assert total == 3
+    assert 2 not in [post_id for post_id, _ in hits]
+    assert len(index) == 4
+
+    # A post made public again is indexed afresh
+    index.add(2, "volleyball")
+    assert index.search("beach")[0] == 3
+    assert [post_id for post_id, _ in index.search("volleyball")[1]] == [2]
+    assert len(index) == 5
+
+
+def test_pagination_walks_the_full_ranking():
+    index = build()
+    _, everything = index.search("beach", limit=10)
+    pages = [index.search("beach", offset=offset, limit=2) for offset in (0, 2, 4)]
+    assert [total for total, _ in pages] == [4, 4, 4]
+    assert [hit for _, page in pages for hit in page] == everything
+    assert pages[-1][1] == []
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = build()
+    index.remove(1)
+    path = str(tmp_path / "index" / "posts.snapshot")
+    index.snapshot(path)
+    assert os.listdir(tmp_path / "index") == ["posts.snapshot"]
+
+    restored = PostSearchIndex()
+    assert restored.restore(path)
+    assert restored.search("beach") == index.search("beach")
+    assert restored.search_hashtags("") == index.search_hashtags("")
+    assert len(restored) == len(index)
+    assert restored.max_post_id == 5
+
+
+@pytest.fixture
+def posts(primary):
+    add_rows(primary, User(id=1, email="u1@example.com", is_active=True, is_verified=True))
+    add_rows(primary, *(
+        Post(id=post_id, user_id=1, content_type=ContentType.text, caption=caption, is_public=True)
+        for post_id, caption in CAPTIONS.items()
+    ))
+
+
+def load(index: PostSearchIndex, path: str):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await index.load(db, path, batch_size=2)
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("content", [b"", b"not a pickle", b"\x80\x05\x95garbage"])
+def test_corrupt_snapshot_falls_back_to_full_reindex(tmp_path, posts, content):
+    path = tmp_path / "posts.snapshot"
+    path.write_bytes(content)
+    index = PostSearchIndex()
+    load(index, str(path))
+    assert len(index) == 5
+    assert index.search("beach")[0] == 4
+
+
+def test_load_reconciles_posts_changed_since_the_snapshot(tmp_path, primary, posts):
+    path = str(tmp_path / "posts.snapshot")
+    before = PostSearchIndex()
+    load(before, path)
+    before.snapshot(path)
+
+    # Down time: posts deleted or made private are tombstoned on the next load
+    async def change():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Post).where(Post.id == 5).values(is_public=False))
+            await db.delete(await db.get(Post, 2))
+            await db.execute(update(Post).where(Post.id == 3).values(is_public=False))
+            await db.commit()
+    asyncio.run(change())
+    restored_private = PostSearchIndex()
+    load(restored_private, path)
+    restored_private.snapshot(path)
+
+    # ...and older posts made public again come back, next to the new ones
+    async def change_again():
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Post).where(Post.id == 3).values(is_public=True))
+            db.add(Post(id=6, user_id=1, content_type=ContentType.text, caption="beach party", is_public=True))
+            await db.commit()
+    asyncio.run(change_again())
+
+    index = PostSearchIndex()
+    load(index, path)
+    assert sorted(post_id for post_id, _ in index.search("beach", limit=10)[1]) == [1, 4, 6]
+    assert [post_id for post_id, _ in index.search("mountain")[1]] == [3]
+    assert len(index) == 4
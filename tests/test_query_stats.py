@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from common.config import settings
+from common.database import AsyncSessionLocal
+from common.query_stats import QueryStats, QueryStatsMiddleware, statement_shape
+
+
+def test_shapes_ignore_whitespace_and_in_list_length():
+    one = statement_shape("SELECT * FROM posts\n  WHERE id IN (?)")
+    many = statement_shape("SELECT * FROM posts WHERE id IN (?, ?, ?)")
+    named = statement_shape("SELECT * FROM posts WHERE id IN (%(id_1)s, %(id_2)s)")
+    assert one == many == named == "SELECT * FROM posts WHERE id IN (?)"
+
+
+def test_shape_is_flagged_at_the_threshold():
+    stats = QueryStats(repeat_threshold=3)
+    for _ in range(2):
+        stats.record("SELECT * FROM likes WHERE post_id = ?", 0.001)
+    stats.record("SELECT * FROM posts", 0.001)
+    assert stats.repeated() == {}
+
+    stats.record("SELECT  *  FROM likes WHERE post_id = ?", 0.001)
+    assert stats.repeated() == {"SELECT * FROM likes WHERE post_id = ?": 3}
+    assert stats.count == 4 and stats.seconds == pytest.approx(0.004)
+    assert list(stats.samples) == ["SELECT * FROM likes WHERE post_id = ?"]
+
+
+@pytest.fixture
+def app_client():
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, debug_headers=True)
+
+    @app.get("/loop/{n}")
+    async def loop(n: int):
+        async with AsyncSessionLocal() as db:
+            for i in range(n):
+                await db.execute(text("SELECT :i"), {"i": i})
+            await db.execute(text("SELECT 'once'"))
+        return {}
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("n, repeated", [(settings.SQL_REPEAT_THRESHOLD - 1, 0), (settings.SQL_REPEAT_THRESHOLD, 1)])
+def test_middleware_reports_repeated_statements(app_client, caplog, n, repeated):
+    with caplog.at_level(logging.WARNING, logger="uvicorn"):
+        response = app_client.get(f"/loop/{n}")
+    assert int(response.headers["x-db-queries"]) == n + 1
+    assert int(response.headers["x-db-repeated"]) == repeated
+
+    warnings = [record.getMessage() for record in caplog.records if "possible N+1" in record.getMessage()]
+    assert len(warnings) == repeated
+    if repeated:
+        # The stack sample points at the route that ran the loop
+        assert "tests/test_query_stats.py" in warnings[0] and "in loop" in warnings[0]
+
+
+def test_middleware_logs_requests_over_the_query_budget(app_client, caplog, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", 2)
+    with caplog.at_level(logging.WARNING, logger="uvicorn"):
+        app_client.get("/loop/2")
+    assert any("GET /loop/2 ran 3 queries" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,26 @@
+import pytest
+
+import common.rate_limit as rate_limit
+from common.rate_limit import client_ip
+
+
+def scope(*forwarded: str, peer: str = "10.0.0.2"):
+    return {
+        "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded],
+        "client": (peer, 50000),
+    }
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (0, ["1.1.1.1"], "10.0.0.2"),
+    # A client-supplied entry on the left can't pick the identity
+    (1, ["6.6.6.6, 203.0.113.9"], "203.0.113.9"),
+    (2, ["6.6.6.6, 203.0.113.9, 10.0.0.7"], "203.0.113.9"),
+    (2, ["6.6.6.6, 203.0.113.9", "10.0.0.7"], "203.0.113.9"),
+    # Fewer entries than trusted hops: the header wasn't written by our proxies
+    (2, ["203.0.113.9"], "10.0.0.2"),
+    (1, [], "10.0.0.2"),
+])
+def test_client_ip_counts_trusted_hops_from_the_right(monkeypatch, hops, forwarded, expected):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_TRUSTED_PROXIES", hops)
+    assert client_ip(scope(*forwarded)) == expected
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import common.database as database
+from common.database import replica_monitor
+from services.auth.models import User
+from services.notifications.models import Notification
+from services.profiles.models import Profile
+from conftest import add_rows, auth, create_schema, make_engine
+
+NOTIFICATIONS = "/api/v1/notifications/"
+
+
+def user():
+    return User(id=1, email="reader@example.com", hashed_password="x", is_active=True, is_verified=True)
+
+
+@pytest.fixture
+def replica(tmp_path, primary, monkeypatch):
+    """
+    A second database standing in for the replica. The two are never
+    synced, so every row tells which one served a read: the notification
+    exists only on the replica, the profile only on the primary.
+    """
+    engine = make_engine(tmp_path / "replica.db")
+    create_schema(engine)
+    monkeypatch.setattr(database, "read_engine", engine)
+    monkeypatch.setattr(database, "ReadSessionLocal", async_sessionmaker(bind=engine, expire_on_commit=False))
+    monkeypatch.setattr(replica_monitor, "healthy", False)
+    monkeypatch.setattr(replica_monitor, "lag", None)
+
+    add_rows(primary, user(), Profile(user_id=1, username="reader"))
+    add_rows(engine, user(), Notification(recipient_id=1, notification_type="like", content="replica row"))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def test_read_routes_use_healthy_replica(client, replica):
+    asyncio.run(replica_monitor.check())
+    assert replica_monitor.healthy and replica_monitor.lag == 0.0
+
+    response = client.get(NOTIFICATIONS, headers=auth(1))
+    assert response.status_code == 200
+    assert [n["content"] for n in response.json()] == ["replica row"]
+
+
+def test_lagging_replica_falls_back_to_primary(client, replica, monkeypatch):
+    async def lagging():
+        return replica_monitor.max_lag + 1
+
+    monkeypatch.setattr(replica_monitor, "measure_lag", lagging)
+    asyncio.run(replica_monitor.check())
+    assert not replica_monitor.healthy
+
+    response = client.get(NOTIFICATIONS, headers=auth(1))
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.parametrize("lag", [None, RuntimeError("replica unreachable")])
+def test_unknown_lag_falls_back_to_primary(client, replica, monkeypatch, lag):
+    async def measure():
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+    monkeypatch.setattr(replica_monitor, "measure_lag", measure)
+    asyncio.run(replica_monitor.check())
+    assert not replica_monitor.healthy
+    assert client.get(NOTIFICATIONS, headers=auth(1)).json() == []
+
+
+def test_read_your_writes_routes_stay_on_primary(client, replica):
+    asyncio.run(replica_monitor.check())
+    assert replica_monitor.healthy
+
+    # Only the primary has the profile row
+    response = client.get("/api/v1/profiles/me", headers=auth(1))
+    assert response.status_code == 200
+    assert response.json()["username"] == "reader"
@@ -0,0 +1,127 @@
+import pytest
+
+import services.profiles.router as profiles_router
+import services.search.cache as cache_module
+import services.search.router as search_router
+import services.social.router as social_router
+from services.auth.models import User
+from services.profiles.models import Profile
+from services.search.cache import SearchCache, is_miss
+from services.search.post_index import PostSearchIndex
+from conftest import add_rows, auth
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_queries_are_normalized_but_params_are_not():
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+    cache.set("users", "  ZOË ", ["zoe"], limit=5, offset=0)
+    assert cache.get("users", "zoe", offset=0, limit=5) == ["zoe"]
+    assert is_miss(cache.get("users", "zoe", limit=5, offset=5))
+    assert is_miss(cache.get("posts", "zoe", limit=5, offset=0))
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+    cache.set("users", "zoe", ["zoe"])
+    clock.now += 59
+    assert cache.get("users", "zoe") == ["zoe"]
+    clock.now += 1
+    assert is_miss(cache.get("users", "zoe"))
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SearchCache(max_entries=2, ttl_seconds=60)
+    cache.set("posts", "a", 1)
+    cache.set("posts", "b", 2)
+    cache.get("posts", "a")
+    cache.set("posts", "c", 3)
+    assert cache.get("posts", "a") == 1
+    assert is_miss(cache.get("posts", "b"))
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidation_by_namespace_and_by_term():
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+    cache.set("posts", "beach sunset", 1)
+    cache.set("posts", "mountain", 2)
+    cache.set("users", "beach", 3)
+
+    cache.invalidate("posts", terms=["sunset", "party"])
+    assert is_miss(cache.get("posts", "beach sunset"))
+    assert cache.get("posts", "mountain") == 2
+    assert cache.get("users", "beach") == 3
+
+    cache.invalidate("users")
+    assert is_miss(cache.get("users", "beach"))
+    assert cache.get("posts", "mountain") == 2
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    """Fresh cache and post index behind every route that uses them."""
+    cache, index = SearchCache(max_entries=100, ttl_seconds=60), PostSearchIndex()
+    for module in (search_router, social_router, profiles_router):
+        monkeypatch.setattr(module, "search_cache", cache)
+    for module in (search_router, social_router):
+        monkeypatch.setattr(module, "post_index", index)
+
+    async def no_processing(*args):
+        pass
+    monkeypatch.setattr(social_router, "enqueue_post_processing", no_processing)
+    return cache
+
+
+@pytest.fixture
+def alice(primary):
+    add_rows(
+        primary,
+        User(id=1, email="alice@example.com", is_active=True, is_verified=True),
+        Profile(user_id=1, username="alice_w", full_name="Alice Walker"),
+    )
+
+
+def post_ids(client, q: str) -> list:
+    response = client.get("/api/v1/search/posts", params={"q": q}, headers=auth(1))
+    assert response.status_code == 200
+    return [item["id"] for item in response.json()["items"]]
+
+
+def test_new_post_invalidates_matching_post_searches(client, alice, isolated):
+    assert post_ids(client, "beach") == []
+    assert post_ids(client, "mountain") == []
+
+    post = {"caption": "Beach party", "media_url": "https://example.com/a.jpg", "content_type": "image"}
+    post_id = client.post("/api/v1/social/post", json=post, headers=auth(1)).json()["post_id"]
+
+    assert post_ids(client, "BEACH") == [post_id]
+    # Unrelated queries keep their entries
+    assert isolated.stats()["entries"] == 2
+    assert post_ids(client, "mountain") == []
+
+
+def test_profile_change_invalidates_user_searches(client, alice, isolated):
+    def usernames():
+        response = client.get("/api/v1/search/users", params={"q": "alice@example.com"}, headers=auth(1))
+        assert response.status_code == 200
+        return [profile["username"] for profile in response.json()]
+
+    assert usernames() == ["alice_w"]
+    response = client.put("/api/v1/profiles/me", data={"username": "wonderland"}, headers=auth(1))
+    assert response.status_code == 200
+    assert usernames() == ["wonderland"]
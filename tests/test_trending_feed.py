@@ -0,0 +1,141 @@
+import math
+
+import pytest
+
+import services.social.ranking as ranking
+import services.social.router as social_router
+from services.auth.models import User
+from services.social.models import ContentType, Post
+from services.social.ranking import TrendingIndex
+from conftest import add_rows, auth
+
+TRENDING = "/api/v1/social/feed/trending"
+
+
+@pytest.fixture
+def index(monkeypatch):
+    fresh = TrendingIndex(half_life_hours=6, capacity=100)
+    monkeypatch.setattr(social_router, "trending_index", fresh)
+    return fresh
+
+
+@pytest.fixture
+def posts(primary):
+    """Posts 1-5 are public, 6-7 private."""
+    rows = [User(id=1, email="author@example.com", is_active=True, is_verified=True)]
+    rows += [
+        Post(id=n, user_id=1, content_type=ContentType.text, caption=f"post {n}", is_public=n <= 5)
+        for n in range(1, 8)
+    ]
+    add_rows(primary, *rows)
+
+
+def test_engagement_on_private_posts_is_not_ranked(client, index, posts):
+    for post_id in (6, 7, 2):
+        assert client.post(f"/api/v1/social/post/{post_id}/like", headers=auth(1)).status_code == 200
+        response = client.post(f"/api/v1/social/post/{post_id}/comment", json={"content": "hi"}, headers=auth(1))
+        assert response.status_code == 200
+    assert len(index) == 1
+
+    page = client.get(TRENDING).json()
+    assert [item["id"] for item in page["items"]] == [2]
+    assert page["next_cursor"] is None
+
+
+def test_trending_pages_use_feed_envelope(client, index, posts):
+    for post_id in range(1, 6):
+        for _ in range(post_id):
+            index.record(post_id, "like")
+
+    first = client.get(TRENDING, params={"limit": 2, "debug": True}).json()
+    assert [item["id"] for item in first["items"]] == [5, 4]
+    assert [item["rank"] for item in first["items"]] == [1, 2]
+
+    second = client.get(TRENDING, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    third = client.get(TRENDING, params={"limit": 2, "cursor": second["next_cursor"]}).json()
+    assert [item["id"] for item in second["items"]] == [3, 2]
+    assert [item["id"] for item in third["items"]] == [1]
+    assert third["next_cursor"] is None
+
+    assert client.get(TRENDING, params={"cursor": "abc"}).status_code == 400
+
+
+def test_comment_on_missing_post_is_404(client, index, posts):
+    response = client.post("/api/v1/social/post/999/comment", json={"content": "hi"}, headers=auth(1))
+    assert response.status_code == 404
+
+
+def test_pages_do_not_shift_when_posts_rise_above_them(client, index, posts):
+    for post_id in range(1, 6):
+        for _ in range(post_id):
+            index.record(post_id, "like")
+
+    first = client.get(TRENDING, params={"limit": 2}).json()
+    assert [item["id"] for item in first["items"]] == [5, 4]
+
+    # Post 1 jumps to the top between requests; offsets would repeat post 4
+    for _ in range(10):
+        index.record(1, "like")
+    second = client.get(TRENDING, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [item["id"] for item in second["items"]] == [3, 2]
+    assert second["next_cursor"] is None
+
+
+def test_scores_decay_with_time(monkeypatch):
+    index = TrendingIndex(half_life_hours=1, capacity=10)
+    now = index.epoch
+    index.record(1, "like", at=now)
+    index.record(1, "like", at=now)
+    index.record(2, "like", at=now + 3600)
+    # A like one half-life later is worth twice as much, so both rank level on stored score
+    assert index._scores[1] == pytest.approx(index._scores[2])
+
+    index.record(3, "comment", at=now + 3600)
+    monkeypatch.setattr(ranking.time, "time", lambda: now + 3 * 3600)
+    (rank, post_id, score), *_ = index.page(0, 10)
+    # The comment's three points, two half-lives after it was made
+    assert (rank, post_id) == (1, 3)
+    assert score == pytest.approx(3.0 / 4)
+
+
+def test_rebase_keeps_order_and_cursors(monkeypatch):
+    index = TrendingIndex(half_life_hours=1, capacity=10)
+    start = index.epoch
+    for post_id, likes in ((1, 3), (2, 2), (3, 1)):
+        for _ in range(likes):
+            index.record(post_id, "like", at=start)
+    _, cursor = index.page_after(None, 1)
+
+    # Far enough ahead that 2 ** exponent would overflow without a rebase
+    later = start + 600 * 3600
+    index.record(4, "like", at=later)
+    assert index.epoch == later
+    assert all(math.isfinite(score) for score in index._scores.values())
+    assert [post_id for _, post_id, _ in index.page(0, 10)] == [4, 1, 2, 3]
+
+    # A cursor issued before the rebase still continues after post 1
+    page, _ = index.page_after(cursor, 10)
+    assert [post_id for _, post_id, _ in page] == [2, 3]
+
+
+def test_capacity_keeps_the_top_k():
+    index = TrendingIndex(half_life_hours=6, capacity=3)
+    at = index.epoch
+    # Once full, a post has to outscore the last ranked one to get in
+    for post_id in range(5, 0, -1):
+        for _ in range(post_id):
+            index.record(post_id, "like", at=at)
+    assert len(index) == 3
+    assert [post_id for _, post_id, _ in index.page(0, 10)] == [5, 4, 3]
+
+    # Unlikes below zero drop a post; an unlike for an evicted post is ignored
+    for _ in range(3):
+        index.record(3, "unlike", at=at)
+    index.record(1, "unlike", at=at)
+    assert [post_id for _, post_id, _ in index.page(0, 10)] == [5, 4]
+
+
+@pytest.mark.parametrize("cursor", ["abc", "MTIz", "bmFufG5hbnwx", "MXwxZTQwMHwx"])
+def test_malformed_trending_cursor_is_a_400(client, index, cursor):
+    index.record(1, "like")
+    assert client.get(TRENDING, params={"cursor": cursor}).status_code == 400
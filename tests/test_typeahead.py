@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+import services.profiles.router as profiles_router
+import services.search.router as search_router
+from common.database import AsyncSessionLocal
+from services.auth.models import User
+from services.profiles.models import Profile
+from services.search.typeahead import TypeaheadIndex
+from conftest import add_rows, auth
+
+BUDGET = 1024 * 1024
+
+
+def usernames(results) -> list:
+    return [result["username"] for result in results]
+
+
+@pytest.fixture
+def index() -> TypeaheadIndex:
+    index = TypeaheadIndex(memory_budget_bytes=BUDGET)
+    index.upsert(1, "alice_w", "Alice Walker")
+    index.upsert(2, "al", "Albert Lee")
+    index.upsert(3, "bob", "Bob Alton")
+    return index
+
+
+def test_prefix_matches_usernames_names_and_later_name_words(index):
+    assert usernames(index.search("alice")) == ["alice_w"]
+    assert usernames(index.search("walk")) == ["alice_w"]
+    assert usernames(index.search("ALTON")) == ["bob"]
+    assert index.search("zed") == [] and index.search("   ") == []
+
+
+def test_results_are_ordered_by_key_and_deduplicated(index):
+    # "al" (exact) < "albert lee" < "alice walker" < "alice_w" < "alton": each user once, shortest key first
+    assert usernames(index.search("al")) == ["al", "alice_w", "bob"]
+    assert usernames(index.search("al", limit=2)) == ["al", "alice_w"]
+
+
+def test_rename_drops_the_old_prefix(index):
+    index.upsert(1, "wonderland", "Alice Walker")
+    assert usernames(index.search("alice_")) == []
+    assert usernames(index.search("wonder")) == ["wonderland"]
+    # The unchanged name still matches
+    assert usernames(index.search("alice")) == ["wonderland"]
+
+    index.upsert(1, "wonderland", None)
+    assert usernames(index.search("alice")) == []
+    assert usernames(index.search("walker")) == []
+
+
+def test_remove_forgets_every_key_and_its_memory():
+    index = TypeaheadIndex(memory_budget_bytes=BUDGET)
+    index.upsert(1, "alice_w", "Alice Walker")
+    index.upsert(2, "alice_x", "Alice Walker")
+    before = index.memory_bytes
+
+    index.remove(1)
+    index.remove(1)
+    assert usernames(index.search("alice")) == ["alice_x"]
+    assert index.memory_bytes < before
+    index.remove(2)
+    assert len(index) == 0 and index.memory_bytes == 0
+
+
+def test_names_past_the_memory_budget_are_skipped():
+    index = TypeaheadIndex(memory_budget_bytes=300)
+    index.upsert(1, "alice", None)
+    index.upsert(2, "a_much_longer_username_than_the_budget_allows", "And A Long Full Name Too")
+    assert usernames(index.search("a")) == ["alice"]
+    assert index.memory_bytes <= 300
+
+
+def test_load_builds_the_index_from_profiles(primary):
+    add_rows(primary, *(User(id=n, email=f"u{n}@example.com", is_active=True, is_verified=True) for n in (1, 2)))
+    add_rows(primary, Profile(user_id=1, username="alice_w", full_name="Alice Walker"),
+             Profile(user_id=2, username="bob", full_name=None))
+    index = TypeaheadIndex(memory_budget_bytes=BUDGET)
+
+    async def load():
+        async with AsyncSessionLocal() as db:
+            await index.load(db)
+    asyncio.run(load())
+    assert usernames(index.search("walker")) == ["alice_w"]
+    assert usernames(index.search("b")) == ["bob"]
+
+
+def test_profile_update_reindexes_the_username(client, primary, monkeypatch):
+    index = TypeaheadIndex(memory_budget_bytes=BUDGET)
+    monkeypatch.setattr(profiles_router, "typeahead_index", index)
+    monkeypatch.setattr(search_router, "typeahead_index", index)
+    add_rows(primary, User(id=1, email="u1@example.com", is_active=True, is_verified=True))
+
+    for username in ("alice_w", "wonderland"):
+        response = client.put("/api/v1/profiles/me", data={"username": username, "full_name": "Alice"}, headers=auth(1))
+        assert response.status_code == 200
+
+    typeahead = client.get("/api/v1/search/typeahead", params={"q": "ali"}, headers=auth(1)).json()
+    assert usernames(typeahead) == ["wonderland"]
+    assert client.get("/api/v1/search/typeahead", params={"q": "alice_"}, headers=auth(1)).json() == []
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import services.search.router as search_router
+from services.auth.models import User
+from services.profiles.models import Profile
+from services.search.cache import SearchCache
+from services.search.post_index import PostSearchIndex
+from conftest import add_rows, auth
+
+SEARCH = "/api/v1/search"
+
+
+@pytest.fixture
+def backends(primary, monkeypatch):
+    add_rows(
+        primary,
+        User(id=1, email="alice@example.com", is_active=True, is_verified=True),
+        Profile(user_id=1, username="alice_w", full_name="Alice Walker"),
+    )
+    index = PostSearchIndex()
+    index.add(1, "#alice fan club")
+    monkeypatch.setattr(search_router, "post_index", index)
+    monkeypatch.setattr(search_router, "search_cache", SearchCache(max_entries=100, ttl_seconds=60))
+    monkeypatch.setattr(search_router.settings, "SEARCH_BACKEND_TIMEOUT_MS", 200)
+
+
+def test_slow_backend_is_dropped_and_the_rest_returned(client, backends, monkeypatch):
+    async def stuck_posts(*args, **kwargs):
+        await asyncio.sleep(5)
+    monkeypatch.setattr(search_router, "find_posts", stuck_posts)
+
+    response = client.get(SEARCH, params={"q": "alice@example.com"}, headers=auth(1))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["partial"] is True
+    assert body["timed_out"] == ["posts"] and body["failed"] == []
+    assert body["posts"] is None
+    assert [user["username"] for user in body["users"]] == ["alice_w"]
+
+
+def test_failing_backend_is_reported(client, backends, monkeypatch):
+    async def broken_users(*args, **kwargs):
+        raise RuntimeError("database gone")
+    monkeypatch.setattr(search_router, "find_users", broken_users)
+
+    body = client.get(SEARCH, params={"q": "alice"}, headers=auth(1)).json()
+    assert body["partial"] is True
+    assert body["failed"] == ["users"] and body["users"] is None
+    assert body["hashtags"] == [{"tag": "alice", "post_count": 1}]
+
+
+def test_complete_response_is_not_partial(client, backends):
+    body = client.get(SEARCH, params={"q": "alice@example.com"}, headers=auth(1)).json()
+    assert body["partial"] is False
+    assert body["timed_out"] == [] and body["failed"] == []
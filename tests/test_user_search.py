@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from services.auth.models import User
+from services.profiles.models import Profile
+from services.search.logic import search_profiles
+from conftest import add_rows, auth
+
+
+class CaptureDB:
+    """Records the compiled MySQL statement instead of running it."""
+
+    class _Empty:
+        def scalars(self):
+            return self
+
+        def all(self):
+            return []
+
+    async def execute(self, query):
+        self.sql = str(query.compile(dialect=mysql.dialect()))
+        return self._Empty()
+
+
+@pytest.fixture
+def alice(primary):
+    add_rows(
+        primary,
+        User(id=1, email="alice@example.com", is_active=True, is_verified=True),
+        Profile(user_id=1, username="alice_w", full_name="Alice Walker"),
+    )
+
+
+@pytest.mark.parametrize("q", ["alice@example.com", "  alice@example.com "])
+def test_email_lookup_needs_match_email(q):
+    db = CaptureDB()
+    asyncio.run(search_profiles(db, q))
+    assert "email" not in db.sql
+
+    asyncio.run(search_profiles(db, q, match_email=True))
+    assert "users.email = " in db.sql
+
+
+def test_public_route_finds_handles_by_username_prefix(client, alice):
+    response = client.get("/api/v1/profiles/search/users", params={"query": "@ali"})
+    assert response.status_code == 200
+    assert [p["username"] for p in response.json()] == ["alice_w"]
+
+
+def test_authenticated_search_matches_exact_email(client, alice):
+    response = client.get("/api/v1/search/users", params={"q": "alice@example.com"}, headers=auth(1))
+    assert response.status_code == 200
+    assert [p["username"] for p in response.json()] == ["alice_w"]